@@ -51,6 +51,29 @@ class ExampleProviderCharm(CharmBase):
         )
 ```
 
+When a requirer asks for many certificates at once, the provider can emit a single
+`certificate_requests` event per relation changed event and answer all requests at once:
+
+```python
+self.tls_certificates = TLSCertificatesProvides(
+    self, "certificates", batch_certificate_requests=True
+)
+self.framework.observe(
+    self.tls_certificates.on.certificate_requests, self._on_certificate_requests
+)
+
+def _on_certificate_requests(self, event):
+    self.tls_certificates.set_relation_certificates(
+        certificates=[
+            self._generate_certificate(
+                request["common_name"], request["sans"], request["cert_type"]
+            )
+            for request in event.certificate_requests
+        ],
+        relation_id=event.relation_id,
+    )
+```
+
 ### Requirer charm
 Example:
 
@@ -80,14 +103,22 @@ class ExampleRequirerCharm(CharmBase):
         print(certificate_data["cert"])
 ```
 
+`certificate_available` is emitted once for each certificate whose key, certificate or CA
+changed since the last relation changed event of the provider unit. A charm that is not ready
+to use the certificate must call `event.defer()` rather than return early, otherwise the event
+is not emitted again until the provider changes the certificate. The requirer forgets the
+certificates of a provider unit when it departs and those of a relation when it is broken, so
+they are emitted again if the provider comes back.
+
 """
+import hashlib
 import json
 import logging
-from typing import List, Literal, Optional, TypedDict
+from typing import Any, Dict, List, Literal, Optional, TypedDict
 
 from jsonschema import exceptions, validate  # type: ignore[import]
 from ops.charm import CharmBase, CharmEvents
-from ops.framework import EventBase, EventSource, Object
+from ops.framework import EventBase, EventSource, Object, StoredState
 
 # The unique Charmhub library identifier, never change it
 LIBID = "afd8c2bccf834997afce12c2706d2ede"
@@ -97,7 +128,7 @@ LIBAPI = 0
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 26
+LIBPATCH = 29
 
 REQUIRER_JSON_SCHEMA = {
     "$schema": "http://json-schema.org/draft-04/schema#",
@@ -221,6 +252,31 @@ class CertificateRequestEvent(EventBase):
         self.relation_id = snapshot["relation_id"]
 
 
+class CertificateRequestsEvent(EventBase):
+    """Charm Event triggered when TLS certificates are required.
+
+    Carries all the server and client certificate requests of a relation changed event when
+    the provider batches them.
+    """
+
+    def __init__(self, handle, certificate_requests: List[dict], relation_id: int):
+        super().__init__(handle)
+        self.certificate_requests = certificate_requests
+        self.relation_id = relation_id
+
+    def snapshot(self) -> dict:
+        """Returns snapshot."""
+        return {
+            "certificate_requests": self.certificate_requests,
+            "relation_id": self.relation_id,
+        }
+
+    def restore(self, snapshot: dict):
+        """Restores snapshot."""
+        self.certificate_requests = snapshot["certificate_requests"]
+        self.relation_id = snapshot["relation_id"]
+
+
 def _load_relation_data(raw_relation_data: dict) -> dict:
     """Loads relation data from the relation data bag.
 
@@ -245,6 +301,7 @@ class CertificatesProviderCharmEvents(CharmEvents):
     """List of events that the TLS Certificates provider charm can leverage."""
 
     certificate_request = EventSource(CertificateRequestEvent)
+    certificate_requests = EventSource(CertificateRequestsEvent)
 
 
 class CertificatesRequirerCharmEvents(CharmEvents):
@@ -258,13 +315,28 @@ class TLSCertificatesProvides(Object):
 
     on = CertificatesProviderCharmEvents()
 
-    def __init__(self, charm: CharmBase, relationship_name: str):
+    def __init__(
+        self,
+        charm: CharmBase,
+        relationship_name: str,
+        batch_certificate_requests: bool = False,
+    ):
+        """Observes relation changed event.
+
+        Args:
+            charm: Charm object
+            relationship_name: Juju relation name
+            batch_certificate_requests: When True, a single `certificate_requests` event
+                carrying all the requests of a relation changed event is emitted instead of
+                one `certificate_request` event per request.
+        """
         super().__init__(charm, relationship_name)
         self.framework.observe(
             charm.on[relationship_name].relation_changed, self._on_relation_changed
         )
         self.charm = charm
         self.relationship_name = relationship_name
+        self.batch_certificate_requests = batch_certificate_requests
 
     @staticmethod
     def _relation_data_is_valid(certificates_data: dict) -> bool:
@@ -292,22 +364,41 @@ class TLSCertificatesProvides(Object):
         Returns:
             None
         """
+        self.set_relation_certificates(certificates=[certificate], relation_id=relation_id)
+
+    def set_relation_certificates(self, certificates: List[Cert], relation_id: int) -> None:
+        """Adds several certificates to relation data.
+
+        The relation is fetched once and each common name is serialized once. Identical
+        certificates are deduplicated, the last one wins when a common name appears more than
+        once, and keys that already hold the same value are not written again.
+
+        Args:
+            certificates (list): Certificate objects
+            relation_id (int): Juju relation ID
+
+        Returns:
+            None
+        """
+        if not certificates:
+            return
         certificates_relation = self.model.get_relation(
             relation_name=self.relationship_name, relation_id=relation_id
         )
         relation_data = certificates_relation.data[self.model.unit]  # type: ignore[union-attr]
 
-        current_ca = relation_data.get("ca")
-        current_chain = relation_data.get("chain")
-        if not current_ca:
-            relation_data["ca"] = certificate["ca"]
-        if not current_chain:
-            relation_data["chain"] = certificate["ca"]
-        certificate_dict = {"key": certificate["key"], "cert": certificate["cert"]}
-        relation_data[certificate["common_name"]] = json.dumps(certificate_dict)
-
-        certificate_dict = {"key": certificate["key"], "cert": certificate["cert"]}
-        relation_data[certificate["common_name"]] = json.dumps(certificate_dict)
+        new_relation_data = {}
+        if not relation_data.get("ca"):
+            new_relation_data["ca"] = certificates[0]["ca"]
+        if not relation_data.get("chain"):
+            new_relation_data["chain"] = certificates[0]["ca"]
+        for certificate in certificates:
+            new_relation_data[certificate["common_name"]] = json.dumps(
+                {"key": certificate["key"], "cert": certificate["cert"]}
+            )
+        for key, value in new_relation_data.items():
+            if relation_data.get(key) != value:
+                relation_data[key] = value
 
     def _on_relation_changed(self, event) -> None:
         """Handler triggerred on relation changed event.
@@ -328,18 +419,31 @@ class TLSCertificatesProvides(Object):
         if not self._relation_data_is_valid(relation_data):
             logger.warning("Relation data did not pass JSON Schema validation")
             return
-        for server_cert_request in relation_data.get("cert_requests", {}):
-            self.on.certificate_request.emit(
-                common_name=server_cert_request.get("common_name"),
-                sans=server_cert_request.get("sans"),
-                cert_type="server",
-                relation_id=event.relation.id,
-            )
-        for client_cert_requests in relation_data.get("client_cert_requests", {}):
+        certificate_requests = [
+            {
+                "common_name": certificate_request.get("common_name"),
+                "sans": certificate_request.get("sans"),
+                "cert_type": cert_type,
+            }
+            for cert_type, key in (("server", "cert_requests"), ("client", "client_cert_requests"))
+            for certificate_request in relation_data.get(key, {})
+        ]
+        if self.batch_certificate_requests:
+            unique_certificate_requests = {
+                json.dumps(certificate_request, sort_keys=True): certificate_request
+                for certificate_request in certificate_requests
+            }
+            if unique_certificate_requests:
+                self.on.certificate_requests.emit(
+                    certificate_requests=list(unique_certificate_requests.values()),
+                    relation_id=event.relation.id,
+                )
+            return
+        for certificate_request in certificate_requests:
             self.on.certificate_request.emit(
-                common_name=client_cert_requests.get("common_name"),
-                sans=client_cert_requests.get("sans"),
-                cert_type="client",
+                common_name=certificate_request["common_name"],
+                sans=certificate_request["sans"],
+                cert_type=certificate_request["cert_type"],
                 relation_id=event.relation.id,
             )
 
@@ -348,6 +452,7 @@ class TLSCertificatesRequires(Object):
     """TLS certificates requirer class to be instantiated by TLS certificates requirers."""
 
     on = CertificatesRequirerCharmEvents()
+    _stored: Any = StoredState()
 
     def __init__(
         self,
@@ -360,10 +465,17 @@ class TLSCertificatesRequires(Object):
         self.framework.observe(
             charm.on[relationship_name].relation_changed, self._on_relation_changed
         )
+        self.framework.observe(
+            charm.on[relationship_name].relation_departed, self._on_relation_departed
+        )
+        self.framework.observe(
+            charm.on[relationship_name].relation_broken, self._on_relation_broken
+        )
         self.relationship_name = relationship_name
         self.charm = charm
         self.common_name = common_name
         self.sans = sans
+        self._stored.set_default(certificate_digests={})
 
     def request_certificate(
         self,
@@ -430,28 +542,42 @@ class TLSCertificatesRequires(Object):
     def _parse_certificates_from_relation_data(relation_data: dict) -> List[Cert]:
         """Loops over all relation data and returns list of Cert objects.
 
+        The relation data is left untouched.
+
         Args:
             relation_data: Relation data json formatted.
 
         Returns:
             list: List of certificates
         """
-        certificates = []
-        ca = relation_data.pop("ca")
-        relation_data.pop("chain")
-        for key in relation_data:
-            if type(relation_data[key]) == dict:
-                private_key = relation_data[key].get("key")
-                certificate = relation_data[key].get("cert")
-                if private_key and certificate:
-                    certificates.append(
-                        Cert(common_name=key, key=private_key, cert=certificate, ca=ca)
-                    )
-        return certificates
+        ca = relation_data["ca"]
+        return [
+            Cert(common_name=key, key=value["key"], cert=value["cert"], ca=ca)
+            for key, value in relation_data.items()
+            if key not in ("ca", "chain")
+            and isinstance(value, dict)
+            and value.get("key")
+            and value.get("cert")
+        ]
+
+    @staticmethod
+    def _get_certificate_digest(certificate: Cert) -> str:
+        """Returns a digest of the common name, key, certificate and CA of a certificate.
+
+        Args:
+            certificate (Cert): Certificate object
+
+        Returns:
+            str: Hex encoded digest
+        """
+        return hashlib.sha256(json.dumps(certificate, sort_keys=True).encode()).hexdigest()
 
     def _on_relation_changed(self, event) -> None:
         """Handler triggerred on relation changed events.
 
+        Emits a certificate available event for each common name whose key, certificate or CA
+        changed since the last relation changed event of the provider unit.
+
         Args:
             event: Juju event
 
@@ -466,6 +592,50 @@ class TLSCertificatesRequires(Object):
             logger.warning("Relation data did not pass JSON Schema validation")
             return
 
-        certificates = self._parse_certificates_from_relation_data(relation_data)
-        for certificate in certificates:
-            self.on.certificate_available.emit(certificate_data=certificate)
+        databag_key = f"{event.relation.id}/{event.unit.name}"
+        previous_digests: Dict[str, str] = dict(
+            self._stored.certificate_digests.get(databag_key, {})
+        )
+        digests = {}
+        for certificate in self._parse_certificates_from_relation_data(relation_data):
+            digest = self._get_certificate_digest(certificate)
+            digests[certificate["common_name"]] = digest
+            if previous_digests.get(certificate["common_name"]) != digest:
+                self.on.certificate_available.emit(certificate_data=certificate)
+        self._stored.certificate_digests[databag_key] = digests
+
+    def _on_relation_departed(self, event) -> None:
+        """Handler triggerred on relation departed events.
+
+        Forgets the certificates received from the departing provider unit.
+
+        Args:
+            event: Juju event
+
+        Returns:
+            None
+        """
+        if not event.departing_unit:
+            return
+        databag_key = f"{event.relation.id}/{event.departing_unit.name}"
+        if databag_key in self._stored.certificate_digests:
+            del self._stored.certificate_digests[databag_key]
+
+    def _on_relation_broken(self, event) -> None:
+        """Handler triggerred on relation broken events.
+
+        Forgets the certificates received in the relation.
+
+        Args:
+            event: Juju event
+
+        Returns:
+            None
+        """
+        broken_databag_keys = [
+            databag_key
+            for databag_key in self._stored.certificate_digests
+            if databag_key.startswith(f"{event.relation.id}/")
+        ]
+        for databag_key in broken_databag_keys:
+            del self._stored.certificate_digests[databag_key]
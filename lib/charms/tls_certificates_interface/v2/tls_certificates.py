@@ -69,6 +69,7 @@ class ExampleProviderCharm(CharmBase):
             self._on_certificate_revocation_request
         )
         self.framework.observe(self.on.install, self._on_install)
+        self.framework.observe(self.on.update_status, self._process_certificate_requests)
 
     def _on_install(self, event: InstallEvent) -> None:
         private_key_password = b"banana"
@@ -89,25 +90,43 @@ class ExampleProviderCharm(CharmBase):
         self.unit.status = ActiveStatus()
 
     def _on_certificate_request(self, event: CertificateCreationRequestEvent) -> None:
+        self.certificates.queue_certificate_creation_request(
+            certificate_signing_request=event.certificate_signing_request,
+            relation_id=event.relation_id,
+        )
+        self._process_certificate_requests()
+
+    def _process_certificate_requests(self, *args) -> None:
+        # Queued requests are processed on later hooks (e.g. update-status) if the CA is not
+        # available yet, instead of deferring the events.
         replicas_relation = self.model.get_relation("replicas")
         if not replicas_relation:
             self.unit.status = WaitingStatus("Waiting for peer relation to be created")
-            event.defer()
             return
+        replicas_data = replicas_relation.data[self.app]
+        if not replicas_data.get("ca_certificate") or not replicas_data.get("private_key"):
+            self.unit.status = WaitingStatus("Waiting for the CA certificate to be stored")
+            return
+        self.certificates.process_certificate_creation_requests(
+            handler=self._issue_certificate, max_requests=50
+        )
+
+    def _issue_certificate(self, certificate_signing_request: str, relation_id: int) -> None:
+        replicas_relation = self.model.get_relation("replicas")
         ca_certificate = replicas_relation.data[self.app].get("ca_certificate")
         private_key = replicas_relation.data[self.app].get("private_key")
         certificate = generate_certificate(
             ca=ca_certificate,
             private_key=private_key,
-            csr=event.certificate_signing_request,
+            csr=certificate_signing_request,
         )
 
         self.certificates.set_relation_certificate(
             certificate=certificate,
-            certificate_signing_request=event.certificate_signing_request,
+            certificate_signing_request=certificate_signing_request,
             ca=ca_certificate,
             chain=[ca_certificate, certificate],
-            relation_id=event.relation_id,
+            relation_id=relation_id,
         )
 
     def _on_certificate_revocation_request(self, event: CertificateRevocationRequestEvent) -> None:
@@ -119,6 +138,80 @@ if __name__ == "__main__":
     main(ExampleProviderCharm)
 ```
 
+#### Batching certificate requests
+When many CSRs are requested at once, the provider can emit a single
+`certificate_creation_requests` event per hook carrying all the (relation id, CSR) pairs. The
+charm can then sign them and publish the certificates with a single write per relation:
+
+```python
+self.certificates = TLSCertificatesProvidesV2(
+    self, "certificates", batch_certificate_requests=True
+)
+self.framework.observe(
+    self.certificates.on.certificate_creation_requests, self._on_certificate_requests
+)
+
+def _on_certificate_requests(self, event: CertificateCreationRequestsEvent) -> None:
+    self.certificates.set_relation_certificates(
+        [
+            {
+                "relation_id": request["relation_id"],
+                "certificate_signing_request": request["certificate_signing_request"],
+                "certificate": sign(request["certificate_signing_request"]),
+                "ca": ca_certificate,
+                "chain": [ca_certificate],
+            }
+            for request in event.certificate_creation_requests
+        ]
+    )
+```
+
+#### Spreading signing across provider units
+By default, only the leader unit signs certificates. When a peer relation name is given,
+CSRs are assigned to the provider units using consistent hashing of the CSR fingerprint, and
+`certificate_creation_request` is only emitted on the unit responsible for the CSR. Each unit
+would typically sign with its own intermediate CA (see `generate_intermediate_ca`) and include
+it in the published chain. Certificates set by non-leader units are published by the leader.
+The leader records the fingerprints of the answered CSRs in the peer relation application data,
+so that the other units, which can't read the provider application data, don't request them
+again. When a unit joins or leaves the peer relation, the unanswered CSRs are assigned again
+and requested on their new unit.
+
+```python
+self.certificates = TLSCertificatesProvidesV2(self, "certificates", peer_relation_name="replicas")
+```
+
+#### Rotating the CA
+Instead of revoking all certificates when the CA changes, the leader unit can re-issue them
+progressively. `certificate_creation_request` is emitted for a batch of existing CSRs per hook
+and the new certificates are set with `set_relation_certificate` as usual. Both CAs are
+published in the "ca_bundle" key until the rotation completes.
+
+```python
+self.certificates.start_ca_rotation(ca=new_ca_certificate, batch_size=10)
+logger.info("CA rotation status: %s", self.certificates.get_ca_rotation_status())
+```
+
+### Instrumentation
+Counters and timings of the library's handlers (JSON decoding, schema validation, X.509 parsing,
+signing, databag writes and secret calls) can be recorded to find out where time is spent in
+slow hooks:
+
+```python
+enable_instrumentation(log_per_hook=True)
+logger.info(get_instrumentation_snapshot())
+```
+
+### Querying issued certificates
+`get_certificate_inventory` indexes the issued certificates by application, unit, SAN and expiry
+time, for example to report the certificates of an application expiring within 30 days:
+
+```python
+inventory = self.certificates.get_certificate_inventory()
+expiring = inventory.get_expiring_certificates(within=timedelta(days=30), application_name="app")
+event.set_results({"expiring": [certificate.csr for certificate in expiring]})
+```
+
 ### Requirer charm
 The requirer charm is the charm requiring certificates from another charm that provides them. In
 this example, the requirer charm is storing its certificates using a peer relation interface called
@@ -270,36 +363,171 @@ You can relate both charms by running:
 juju relate <tls-certificates provider charm> <tls-certificates requirer charm>
 ```
 
+#### Writing certificates to disk
+
+`write_certificate_files` writes the certificate, private key, CA and chain to the given paths
+through atomic renames, skipping files whose content did not change. It returns the written
+paths, so that the workload is only reloaded when needed:
+
+```python
+def _on_certificate_available(self, event: CertificateAvailableEvent) -> None:
+    if write_certificate_files(
+        certificate=event.certificate,
+        certificate_path="/etc/workload/tls.crt",
+        ca=event.ca,
+        ca_path="/etc/workload/ca.crt",
+    ):
+        self._reload_workload()
+```
+
+#### Verifying certificate chains
+
+With `verify_certificate_chain=True`, the requirer verifies that each certificate chains up to
+the published `ca` through the published `chain` before emitting `certificate_available`.
+Certificates that don't are invalidated with the `"invalid_chain"` reason. Verified issuer
+signatures are remembered, so intermediates shared by many certificates are checked once.
+
+#### Trusting every CA of the endpoint
+
+`get_trust_bundle` returns the CA certificates published in all relations, deduplicated by
+fingerprint. Its `pem` is sorted, so its `digest` only changes when the set of CAs does:
+
+```python
+trust_bundle = self.certificates.get_trust_bundle()
+write_certificate_files(ca=trust_bundle.pem, ca_path="/etc/workload/trusted-cas.pem")
+```
+
+#### Requesting many certificates
+
+`request_certificates_creation` and `request_certificates_revocation` take lists of CSRs and
+update the unit databag once, which avoids rewriting it for every CSR:
+
+```python
+self.certificates.request_certificates_creation(certificate_signing_requests=csrs)
+```
+
+#### Using several providers
+
+The requirer endpoint can be related to several providers. Each CSR is sent to the provider
+with the fewest CSRs of the unit, unless a `relation_id` is given to
+`request_certificate_creation`. Renewed certificates are requested from the provider of the
+old certificate. With `pending_csr_timeout` set, CSRs left without a certificate for longer
+than the timeout are requested from another provider on update status:
+
+```python
+self.certificates = TLSCertificatesRequiresV2(self, "certificates", pending_csr_timeout=600)
+```
+
+When one of several provider relations is broken, `certificate_invalidated` is emitted with
+the `relation_broken` reason for the certificates of that relation only, and its CSRs are
+requested from the remaining providers. `all_certificates_invalidated` is emitted once the last
+provider relation is broken.
+
+`get_provider_certificates`, `get_assigned_certificates` and `get_ca_bundle` cover all
+providers unless a `relation_id` is given.
+
+### Migrating from v0 and v1
+
+v1 relation data already follows the v2 layout. For v0, instantiate `TLSCertificatesMigrationV2`
+next to the v2 provider or requirer. On relation changed and update status, it converts at most
+`batch_size` certificates of the v0 layout to the v2 one:
+
+- The provider leader adds the certificates it published with v0 to the `certificates` of the
+  application databag, with a CSR derived from the certificate and its private key. The v2
+  provider does not revoke these certificates while it still publishes them with the v0 layout,
+  even if no requirer has adopted their CSR yet.
+- The requirer adds the CSRs of its v0 certificates to its `certificate_signing_requests`, once
+  the provider has migrated them.
+
+The v0 layout is kept, so both remain readable during the transition, and progress is read from
+the relation data, so the migration resumes where it stopped:
+
+```python
+self.migration = TLSCertificatesMigrationV2(self, "certificates", batch_size=50)
+if self.migration.migration_is_complete():
+    ...
+```
+
 """  # noqa: D405, D410, D411, D214, D416
 
+from __future__ import annotations
+
+import bisect
 import copy
+import hashlib
+import importlib
 import json
 import logging
+import os
+import re
+import tempfile
+import time
 import uuid
-from collections import defaultdict
-from contextlib import suppress
+from collections import OrderedDict, defaultdict
+from contextlib import nullcontext, suppress
 from datetime import datetime, timedelta
 from ipaddress import IPv4Address
-from typing import Any, Dict, List, Literal, Optional, Union
-
-from cryptography import x509
-from cryptography.hazmat._oid import ExtensionOID
-from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
-from cryptography.hazmat.primitives.serialization import pkcs12
-from cryptography.x509.extensions import Extension, ExtensionNotFound
-from jsonschema import exceptions, validate  # type: ignore[import]
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
 from ops.charm import (
     CharmBase,
     CharmEvents,
     RelationBrokenEvent,
     RelationChangedEvent,
+    RelationEvent,
     SecretExpiredEvent,
     UpdateStatusEvent,
 )
-from ops.framework import EventBase, EventSource, Handle, Object
+from ops.framework import EventBase, EventSource, Handle, Object, StoredState
 from ops.jujuversion import JujuVersion
-from ops.model import SecretNotFoundError
+from ops.model import Relation, SecretNotFoundError, Unit
+
+
+class _LazyModule:
+    """Module imported on first attribute access.
+
+    cryptography and jsonschema take longer to import than most hooks take to run, they are
+    only imported when a hook actually uses them.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Any = None
+
+    def __getattr__(self, attribute: str) -> Any:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+
+if TYPE_CHECKING:
+    import jsonschema  # type: ignore[import]
+    from cryptography import exceptions, x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.primitives.serialization import pkcs12
+else:
+    x509 = _LazyModule("cryptography.x509")
+    exceptions = _LazyModule("cryptography.exceptions")
+    hashes = _LazyModule("cryptography.hazmat.primitives.hashes")
+    serialization = _LazyModule("cryptography.hazmat.primitives.serialization")
+    rsa = _LazyModule("cryptography.hazmat.primitives.asymmetric.rsa")
+    pkcs12 = _LazyModule("cryptography.hazmat.primitives.serialization.pkcs12")
+    jsonschema = _LazyModule("jsonschema")
 
 # The unique Charmhub library identifier, never change it
 LIBID = "afd8c2bccf834997afce12c2706d2ede"
@@ -309,7 +537,7 @@ LIBAPI = 2
 
 # Increment this PATCH version before using `charmcraft publish-lib` or reset
 # to 0 if you are raising the major API version
-LIBPATCH = 10
+LIBPATCH = 32
 
 PYDEPS = ["cryptography", "jsonschema"]
 
@@ -411,7 +639,14 @@ PROVIDER_JSON_SCHEMA = {
                 },
                 "additionalProperties": True,
             },
-        }
+        },
+        "crl": {"$id": "#/properties/crl", "type": "string"},
+        "delta_crl": {"$id": "#/properties/delta_crl", "type": "string"},
+        "ca_bundle": {
+            "$id": "#/properties/ca_bundle",
+            "type": "array",
+            "items": {"type": "string", "$id": "#/properties/ca_bundle/items"},
+        },
     },
     "required": ["certificates"],
     "additionalProperties": True,
@@ -487,7 +722,7 @@ class CertificateInvalidatedEvent(EventBase):
     def __init__(
         self,
         handle: Handle,
-        reason: Literal["expired", "revoked"],
+        reason: Literal["expired", "revoked", "invalid_chain", "relation_broken"],
         certificate: str,
         certificate_signing_request: str,
         ca: str,
@@ -534,6 +769,26 @@ class AllCertificatesInvalidatedEvent(EventBase):
         pass
 
 
+class RelationDataSizeWarningEvent(EventBase):
+    """Charm Event triggered when the relation data written by this charm grows too large."""
+
+    def __init__(self, handle: Handle, relation_id: int, size: int, threshold: int):
+        super().__init__(handle)
+        self.relation_id = relation_id
+        self.size = size
+        self.threshold = threshold
+
+    def snapshot(self) -> dict:
+        """Returns snapshot."""
+        return {"relation_id": self.relation_id, "size": self.size, "threshold": self.threshold}
+
+    def restore(self, snapshot: dict):
+        """Restores snapshot."""
+        self.relation_id = snapshot["relation_id"]
+        self.size = snapshot["size"]
+        self.threshold = snapshot["threshold"]
+
+
 class CertificateCreationRequestEvent(EventBase):
     """Charm Event triggered when a TLS certificate is required."""
 
@@ -555,6 +810,25 @@ class CertificateCreationRequestEvent(EventBase):
         self.relation_id = snapshot["relation_id"]
 
 
+class CertificateCreationRequestsEvent(EventBase):
+    """Charm Event triggered when TLS certificates are required.
+
+    Carries all the certificate creation requests of a hook when the provider batches them.
+    """
+
+    def __init__(self, handle: Handle, certificate_creation_requests: List[Dict[str, Any]]):
+        super().__init__(handle)
+        self.certificate_creation_requests = certificate_creation_requests
+
+    def snapshot(self) -> dict:
+        """Returns snapshot."""
+        return {"certificate_creation_requests": self.certificate_creation_requests}
+
+    def restore(self, snapshot: dict):
+        """Restores snapshot."""
+        self.certificate_creation_requests = snapshot["certificate_creation_requests"]
+
+
 class CertificateRevocationRequestEvent(EventBase):
     """Charm Event triggered when a TLS certificate needs to be revoked."""
 
@@ -589,183 +863,1554 @@ class CertificateRevocationRequestEvent(EventBase):
         self.chain = snapshot["chain"]
 
 
-def _load_relation_data(raw_relation_data: dict) -> dict:
-    """Loads relation data from the relation data bag.
+class _X509ObjectCache:
+    """Bounded LRU cache of parsed X.509 objects keyed by the hash of their PEM string."""
 
-    Json loads all data.
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._objects: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
 
-    Args:
-        raw_relation_data: Relation data from the databag
+    def get(self, kind: str, pem: str, loader: Callable[[bytes], Any]) -> Any:
+        """Returns the parsed object for a PEM string, parsing it on a cache miss.
 
-    Returns:
-        dict: Relation data in dict format.
-    """
-    certificate_data = dict()
-    for key in raw_relation_data:
+        Args:
+            kind (str): Type of object ("certificate" or "csr")
+            pem (str): PEM string
+            loader (Callable): Function used to parse the PEM bytes on a cache miss
+
+        Returns:
+            The parsed X.509 object.
+
+        Raises:
+            ValueError: If the PEM string can't be parsed.
+        """
+        key = (kind, hashlib.sha256(pem.encode()).hexdigest())
         try:
-            certificate_data[key] = json.loads(raw_relation_data[key])
-        except (json.decoder.JSONDecodeError, TypeError):
-            certificate_data[key] = raw_relation_data[key]
-    return certificate_data
+            parsed_object = self._objects[key]
+        except KeyError:
+            self.misses += 1
+            with _instrumentation.measure("x509_parsing"):
+                parsed_object = loader(pem.encode())
+            if self.maxsize > 0:
+                self._objects[key] = parsed_object
+                while len(self._objects) > self.maxsize:
+                    self._objects.popitem(last=False)
+            return parsed_object
+        self.hits += 1
+        self._objects.move_to_end(key)
+        return parsed_object
+
+    def resize(self, maxsize: int) -> None:
+        """Changes the maximum number of cached objects, evicting the oldest ones if needed.
 
+        Args:
+            maxsize (int): Maximum number of cached objects. 0 disables caching.
 
-def generate_ca(
-    private_key: bytes,
-    subject: str,
-    private_key_password: Optional[bytes] = None,
-    validity: int = 365,
-    country: str = "US",
-) -> bytes:
-    """Generates a CA Certificate.
+        Returns:
+            None
+        """
+        if maxsize < 0:
+            raise ValueError("Cache size can't be negative")
+        self.maxsize = maxsize
+        while len(self._objects) > self.maxsize:
+            self._objects.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all cached objects and resets the hit/miss counters."""
+        self._objects.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        """Returns the cache statistics."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._objects),
+            "maxsize": self.maxsize,
+        }
 
-    Args:
-        private_key (bytes): Private key
-        subject (str): Certificate subject
-        private_key_password (bytes): Private key password
-        validity (int): Certificate validity time (in days)
-        country (str): Certificate Issuing country
 
-    Returns:
-        bytes: CA Certificate.
-    """
-    private_key_object = serialization.load_pem_private_key(
-        private_key, password=private_key_password
-    )
-    subject = issuer = x509.Name(
-        [
-            x509.NameAttribute(x509.NameOID.COUNTRY_NAME, country),
-            x509.NameAttribute(x509.NameOID.COMMON_NAME, subject),
-        ]
-    )
-    subject_identifier_object = x509.SubjectKeyIdentifier.from_public_key(
-        private_key_object.public_key()  # type: ignore[arg-type]
-    )
-    subject_identifier = key_identifier = subject_identifier_object.public_bytes()
-    cert = (
-        x509.CertificateBuilder()
-        .subject_name(subject)
-        .issuer_name(issuer)
-        .public_key(private_key_object.public_key())  # type: ignore[arg-type]
-        .serial_number(x509.random_serial_number())
-        .not_valid_before(datetime.utcnow())
-        .not_valid_after(datetime.utcnow() + timedelta(days=validity))
-        .add_extension(x509.SubjectKeyIdentifier(digest=subject_identifier), critical=False)
-        .add_extension(
-            x509.AuthorityKeyIdentifier(
-                key_identifier=key_identifier,
-                authority_cert_issuer=None,
-                authority_cert_serial_number=None,
-            ),
-            critical=False,
-        )
-        .add_extension(
-            x509.BasicConstraints(ca=True, path_length=None),
-            critical=True,
-        )
-        .sign(private_key_object, hashes.SHA256())  # type: ignore[arg-type]
-    )
-    return cert.public_bytes(serialization.Encoding.PEM)
+_x509_cache = _X509ObjectCache()
 
 
-def generate_certificate(
-    csr: bytes,
-    ca: bytes,
-    ca_key: bytes,
-    ca_key_password: Optional[bytes] = None,
-    validity: int = 365,
-    alt_names: Optional[List[str]] = None,
-) -> bytes:
-    """Generates a TLS certificate based on a CSR.
+def configure_x509_cache(maxsize: int) -> None:
+    """Sets the maximum number of parsed certificates and CSRs kept in memory.
 
     Args:
-        csr (bytes): CSR
-        ca (bytes): CA Certificate
-        ca_key (bytes): CA private key
-        ca_key_password: CA private key password
-        validity (int): Certificate validity (in days)
-        alt_names (list): List of alt names to put on cert - prefer putting SANs in CSR
+        maxsize (int): Maximum number of cached objects. 0 disables caching.
 
     Returns:
-        bytes: Certificate
+        None
     """
-    csr_object = x509.load_pem_x509_csr(csr)
-    subject = csr_object.subject
-    issuer = x509.load_pem_x509_certificate(ca).issuer
-    private_key = serialization.load_pem_private_key(ca_key, password=ca_key_password)
-
-    certificate_builder = (
-        x509.CertificateBuilder()
-        .subject_name(subject)
-        .issuer_name(issuer)
-        .public_key(csr_object.public_key())
-        .serial_number(x509.random_serial_number())
-        .not_valid_before(datetime.utcnow())
-        .not_valid_after(datetime.utcnow() + timedelta(days=validity))
-    )
+    _x509_cache.resize(maxsize)
 
-    extensions_list = csr_object.extensions
-    san_ext: Optional[x509.Extension] = None
-    if alt_names:
-        full_sans_dns = alt_names.copy()
-        try:
-            loaded_san_ext = csr_object.extensions.get_extension_for_class(
-                x509.SubjectAlternativeName
-            )
-            full_sans_dns.extend(loaded_san_ext.value.get_values_for_type(x509.DNSName))
-        except ExtensionNotFound:
-            pass
-        finally:
-            san_ext = Extension(
-                ExtensionOID.SUBJECT_ALTERNATIVE_NAME,
-                False,
-                x509.SubjectAlternativeName([x509.DNSName(name) for name in full_sans_dns]),
-            )
-            if not extensions_list:
-                extensions_list = x509.Extensions([san_ext])
 
-    for extension in extensions_list:
-        if extension.value.oid == ExtensionOID.SUBJECT_ALTERNATIVE_NAME and san_ext:
-            extension = san_ext
+def clear_x509_cache() -> None:
+    """Removes all parsed certificates and CSRs, and verified chain links, from the cache.
 
-        certificate_builder = certificate_builder.add_extension(
-            extension.value,
-            critical=extension.critical,
-        )
-    certificate_builder._version = x509.Version.v3
-    cert = certificate_builder.sign(private_key, hashes.SHA256())  # type: ignore[arg-type]
-    return cert.public_bytes(serialization.Encoding.PEM)
+    Meant to be used by long-running processes to release memory.
 
+    Returns:
+        None
+    """
+    _x509_cache.clear()
+    _chain_verifier.clear()
 
-def generate_pfx_package(
-    certificate: bytes,
-    private_key: bytes,
-    package_password: str,
-    private_key_password: Optional[bytes] = None,
-) -> bytes:
-    """Generates a PFX package to contain the TLS certificate and private key.
 
-    Args:
-        certificate (bytes): TLS certificate
-        private_key (bytes): Private key
-        package_password (str): Password to open the PFX package
-        private_key_password (bytes): Private key password
+def get_x509_cache_info() -> Dict[str, int]:
+    """Returns the parsed X.509 object cache statistics.
 
     Returns:
-        bytes:
+        dict: Number of hits, misses, cached objects and maximum cache size.
     """
-    private_key_object = serialization.load_pem_private_key(
-        private_key, password=private_key_password
-    )
-    certificate_object = x509.load_pem_x509_certificate(certificate)
-    name = certificate_object.subject.rfc4514_string()
-    pfx_bytes = pkcs12.serialize_key_and_certificates(
-        name=name.encode(),
-        cert=certificate_object,
-        key=private_key_object,  # type: ignore[arg-type]
-        cas=None,
-        encryption_algorithm=serialization.BestAvailableEncryption(package_password.encode()),
-    )
-    return pfx_bytes
+    return _x509_cache.info()
+
+
+class _Measurement:
+    """Context manager recording the duration of a stage in the instrumentation registry."""
+
+    __slots__ = ("_registry", "_stage", "_start")
+
+    def __init__(self, registry: "_Instrumentation", stage: str):
+        self._registry = registry
+        self._stage = stage
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self._registry.observe(self._stage, time.perf_counter() - self._start)
+
+
+class _Instrumentation:
+    """Registry of counters and timing histograms for the stages of the library's handlers.
+
+    When disabled, `measure` returns a shared no-op context manager and `count` returns
+    immediately.
+    """
+
+    BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+    def __init__(self):
+        self.enabled = False
+        self.log_per_hook = False
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._timings: Dict[str, Dict[str, Any]] = {}
+        self._version = 0
+        self._logged_version = 0
+        self._disabled_measurement = nullcontext()
+
+    def measure(self, stage: str) -> Any:
+        """Returns a context manager recording the duration of a stage.
+
+        Args:
+            stage (str): Stage name
+
+        Returns:
+            A context manager.
+        """
+        if not self.enabled:
+            return self._disabled_measurement
+        return _Measurement(self, stage)
+
+    def observe(self, stage: str, duration: float) -> None:
+        """Records the duration of a stage.
+
+        Args:
+            stage (str): Stage name
+            duration (float): Duration in seconds
+
+        Returns:
+            None
+        """
+        timing = self._timings.get(stage)
+        if timing is None:
+            timing = self._timings[stage] = {
+                "count": 0,
+                "total": 0.0,
+                "max": 0.0,
+                "buckets": [0] * (len(self.BUCKETS) + 1),
+            }
+        timing["count"] += 1
+        timing["total"] += duration
+        timing["max"] = max(timing["max"], duration)
+        timing["buckets"][bisect.bisect_left(self.BUCKETS, duration)] += 1
+        self._version += 1
+
+    def count(self, counter: str, value: int = 1) -> None:
+        """Increments a counter.
+
+        Args:
+            counter (str): Counter name
+            value (int): Increment
+
+        Returns:
+            None
+        """
+        if not self.enabled:
+            return
+        self._counters[counter] += value
+        self._version += 1
+
+    def reset(self) -> None:
+        """Removes all recorded counters and timings."""
+        self._counters.clear()
+        self._timings.clear()
+        self._version = 0
+        self._logged_version = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Returns the recorded counters and timings.
+
+        Returns:
+            dict: Counters and, per stage, the number of measurements, total and maximum
+                duration in seconds and a histogram keyed by bucket upper bound.
+        """
+        bucket_names = [str(bucket) for bucket in self.BUCKETS] + ["+Inf"]
+        return {
+            "enabled": self.enabled,
+            "counters": dict(self._counters),
+            "timings": {
+                stage: {
+                    "count": timing["count"],
+                    "total": timing["total"],
+                    "max": timing["max"],
+                    "buckets": dict(zip(bucket_names, timing["buckets"])),
+                }
+                for stage, timing in self._timings.items()
+            },
+        }
+
+    def log(self) -> None:
+        """Logs the recorded counters and timings as one line if they changed since last time.
+
+        Returns:
+            None
+        """
+        if not self.enabled or not self.log_per_hook or self._version == self._logged_version:
+            return
+        self._logged_version = self._version
+        logger.info(
+            "tls-certificates instrumentation: %s", json.dumps(self.snapshot(), sort_keys=True)
+        )
+
+
+_instrumentation = _Instrumentation()
+
+
+def enable_instrumentation(log_per_hook: bool = False) -> None:
+    """Starts recording counters and timings of the library's handlers.
+
+    Measured stages are JSON decoding, schema validation, X.509 parsing, signing, databag
+    writes and secret calls.
+
+    Args:
+        log_per_hook (bool): Whether to log the recorded values as one line at the end of
+            each hook.
+
+    Returns:
+        None
+    """
+    _instrumentation.enabled = True
+    _instrumentation.log_per_hook = log_per_hook
+
+
+def disable_instrumentation() -> None:
+    """Stops recording counters and timings.
+
+    Returns:
+        None
+    """
+    _instrumentation.enabled = False
+    _instrumentation.log_per_hook = False
+
+
+def reset_instrumentation() -> None:
+    """Removes all recorded counters and timings.
+
+    Returns:
+        None
+    """
+    _instrumentation.reset()
+
+
+def get_instrumentation_snapshot() -> Dict[str, Any]:
+    """Returns the counters and timings recorded since instrumentation was enabled or reset.
+
+    Returns:
+        dict: Counters and per stage timing histograms.
+    """
+    return _instrumentation.snapshot()
+
+
+def _load_certificate(certificate: str) -> x509.Certificate:
+    """Returns the parsed certificate, loading it from the cache when possible.
+
+    Args:
+        certificate (str): PEM encoded certificate
+
+    Returns:
+        x509.Certificate: Certificate object
+
+    Raises:
+        ValueError: If the certificate can't be parsed.
+    """
+    return _x509_cache.get("certificate", certificate, x509.load_pem_x509_certificate)
+
+
+def _load_csr(csr: str) -> x509.CertificateSigningRequest:
+    """Returns the parsed CSR, loading it from the cache when possible.
+
+    Args:
+        csr (str): PEM encoded certificate signing request
+
+    Returns:
+        x509.CertificateSigningRequest: CSR object
+
+    Raises:
+        ValueError: If the CSR can't be parsed.
+    """
+    return _x509_cache.get("csr", csr, x509.load_pem_x509_csr)
+
+
+def _get_csr_fingerprint(certificate_signing_request: str) -> str:
+    """Returns the SHA-256 fingerprint of a PEM encoded CSR.
+
+    Args:
+        certificate_signing_request (str): Certificate Signing Request
+
+    Returns:
+        str: Hex encoded fingerprint
+    """
+    return hashlib.sha256(certificate_signing_request.strip().encode()).hexdigest()
+
+
+class _CertificateChainVerifier:
+    """Verifies certificate chains, checking each issuer signature only once.
+
+    Successfully verified (issuer fingerprint, subject fingerprint) links are kept in a bounded
+    LRU so that certificates sharing intermediates don't verify the same signatures again.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._verified_links: "OrderedDict[Tuple[bytes, bytes], None]" = OrderedDict()
+
+    def _link_is_valid(self, issuer: x509.Certificate, subject: x509.Certificate) -> bool:
+        """Returns whether a certificate is signed by an issuer.
+
+        Args:
+            issuer (x509.Certificate): Issuer certificate
+            subject (x509.Certificate): Issued certificate
+
+        Returns:
+            bool: Whether the signature and the issuer name match
+        """
+        link = (issuer.fingerprint(hashes.SHA256()), subject.fingerprint(hashes.SHA256()))
+        if link in self._verified_links:
+            self._verified_links.move_to_end(link)
+            _instrumentation.count("chain_link_cache_hits")
+            return True
+        try:
+            with _instrumentation.measure("chain_verification"):
+                subject.verify_directly_issued_by(issuer)
+        except (ValueError, TypeError, exceptions.InvalidSignature):
+            return False
+        self._verified_links[link] = None
+        while len(self._verified_links) > self.maxsize:
+            self._verified_links.popitem(last=False)
+        return True
+
+    def verify(self, certificate: str, ca: str, chain: List[str]) -> bool:
+        """Returns whether a certificate chains up to a CA through chain certificates.
+
+        Args:
+            certificate (str): PEM encoded certificate
+            ca (str): PEM encoded CA certificate, used as trust anchor
+            chain (list): PEM encoded certificates of the chain, in any order
+
+        Returns:
+            bool: Whether every signature of the path from the certificate to the CA is valid
+        """
+        try:
+            subject = _load_certificate(certificate)
+            anchor = _load_certificate(ca)
+            issuers = [anchor, *(_load_certificate(pem) for pem in chain)]
+        except ValueError:
+            return False
+        for _ in range(len(issuers)):
+            if subject == anchor:
+                return True
+            issuer = next(
+                (
+                    issuer
+                    for issuer in issuers
+                    if issuer != subject
+                    and issuer.subject == subject.issuer
+                    and self._link_is_valid(issuer, subject)
+                ),
+                None,
+            )
+            if issuer is None:
+                return False
+            subject = issuer
+        return subject == anchor
+
+    def clear(self) -> None:
+        """Removes all verified links."""
+        self._verified_links.clear()
+
+
+_chain_verifier = _CertificateChainVerifier()
+
+
+_NOT_COMPUTED: Any = object()
+
+
+class _Record:
+    """Immutable record with `__slots__`, compared and hashed on its public fields."""
+
+    __slots__: Tuple[str, ...] = ()
+    _fields: Tuple[str, ...] = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, field) for field in self._fields)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, _Record) or type(other) is not type(self):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self) -> int:
+        return hash(self._values())
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{field}={getattr(self, field)!r}" for field in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+
+class ProviderCertificate(_Record):
+    """Certificate published by a provider in the relation data.
+
+    The fingerprint of the CSR and the expiry time of the certificate are only computed when
+    first accessed.
+    """
+
+    __slots__ = (
+        "relation_id",
+        "application_name",
+        "csr",
+        "certificate",
+        "ca",
+        "chain",
+        "revoked",
+        "_fingerprint",
+        "_expiry_time",
+    )
+    _fields: Tuple[str, ...] = (
+        "relation_id",
+        "application_name",
+        "csr",
+        "certificate",
+        "ca",
+        "chain",
+        "revoked",
+    )
+
+    relation_id: int
+    application_name: str
+    csr: str
+    certificate: str
+    ca: str
+    chain: Tuple[str, ...]
+    revoked: bool
+    _fingerprint: Any
+    _expiry_time: Any
+
+    def __init__(
+        self,
+        relation_id: int,
+        application_name: str,
+        csr: str,
+        certificate: str,
+        ca: str,
+        chain: List[str],
+        revoked: bool = False,
+    ):
+        object.__setattr__(self, "relation_id", relation_id)
+        object.__setattr__(self, "application_name", application_name)
+        object.__setattr__(self, "csr", csr)
+        object.__setattr__(self, "certificate", certificate)
+        object.__setattr__(self, "ca", ca)
+        object.__setattr__(self, "chain", tuple(chain))
+        object.__setattr__(self, "revoked", revoked)
+        object.__setattr__(self, "_fingerprint", _NOT_COMPUTED)
+        object.__setattr__(self, "_expiry_time", _NOT_COMPUTED)
+
+    @classmethod
+    def from_relation_data(
+        cls, relation_id: int, application_name: str, certificate: Dict[str, Any]
+    ) -> ProviderCertificate:
+        """Creates a record from an entry of the provider "certificates" relation data.
+
+        Args:
+            relation_id (int): Juju relation ID
+            application_name (str): Name of the requirer application
+            certificate (dict): Entry of the "certificates" list
+
+        Returns:
+            ProviderCertificate: Record
+        """
+        return cls(
+            relation_id=relation_id,
+            application_name=application_name,
+            csr=certificate["certificate_signing_request"],
+            certificate=certificate["certificate"],
+            ca=certificate["ca"],
+            chain=certificate["chain"],
+            revoked=certificate.get("revoked", False),
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        """SHA-256 fingerprint of the CSR."""
+        if self._fingerprint is _NOT_COMPUTED:
+            object.__setattr__(self, "_fingerprint", _get_csr_fingerprint(self.csr))
+        return self._fingerprint
+
+    @property
+    def expiry_time(self) -> Optional[datetime]:
+        """Expiry time of the certificate, None if the certificate can't be loaded."""
+        if self._expiry_time is _NOT_COMPUTED:
+            object.__setattr__(
+                self, "_expiry_time", _get_certificate_expiry_time(self.certificate)
+            )
+        return self._expiry_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the record as a dictionary keyed like the relation data.
+
+        Returns:
+            dict: relation_id, application_name, certificate_signing_request, certificate, ca,
+                chain and revoked
+        """
+        return {
+            "relation_id": self.relation_id,
+            "application_name": self.application_name,
+            "certificate_signing_request": self.csr,
+            "certificate": self.certificate,
+            "ca": self.ca,
+            "chain": list(self.chain),
+            "revoked": self.revoked,
+        }
+
+
+class RequirerCSR(_Record):
+    """CSR published by a requirer unit in the relation data.
+
+    The fingerprint of the CSR is only computed when first accessed.
+    """
+
+    __slots__ = ("relation_id", "application_name", "unit_name", "csr", "_fingerprint")
+    _fields: Tuple[str, ...] = ("relation_id", "application_name", "unit_name", "csr")
+
+    relation_id: int
+    application_name: str
+    unit_name: str
+    csr: str
+    _fingerprint: Any
+
+    def __init__(self, relation_id: int, application_name: str, unit_name: str, csr: str):
+        object.__setattr__(self, "relation_id", relation_id)
+        object.__setattr__(self, "application_name", application_name)
+        object.__setattr__(self, "unit_name", unit_name)
+        object.__setattr__(self, "csr", csr)
+        object.__setattr__(self, "_fingerprint", _NOT_COMPUTED)
+
+    @property
+    def fingerprint(self) -> str:
+        """SHA-256 fingerprint of the CSR."""
+        if self._fingerprint is _NOT_COMPUTED:
+            object.__setattr__(self, "_fingerprint", _get_csr_fingerprint(self.csr))
+        return self._fingerprint
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the record as a dictionary keyed like the relation data.
+
+        Returns:
+            dict: relation_id, application_name, unit_name and certificate_signing_request
+        """
+        return {
+            "relation_id": self.relation_id,
+            "application_name": self.application_name,
+            "unit_name": self.unit_name,
+            "certificate_signing_request": self.csr,
+        }
+
+
+class InventoryCertificate(ProviderCertificate):
+    """Issued certificate of a `CertificateInventory`, with its requirer unit and SANs."""
+
+    __slots__ = ("unit_name", "sans")
+    _fields = ProviderCertificate._fields + ("unit_name", "sans")
+
+    unit_name: Optional[str]
+    sans: Tuple[str, ...]
+
+    def __init__(
+        self,
+        provider_certificate: ProviderCertificate,
+        unit_name: Optional[str],
+        sans: List[str],
+        expiry_time: Optional[datetime],
+    ):
+        super().__init__(
+            relation_id=provider_certificate.relation_id,
+            application_name=provider_certificate.application_name,
+            csr=provider_certificate.csr,
+            certificate=provider_certificate.certificate,
+            ca=provider_certificate.ca,
+            chain=list(provider_certificate.chain),
+            revoked=provider_certificate.revoked,
+        )
+        object.__setattr__(self, "unit_name", unit_name)
+        object.__setattr__(self, "sans", tuple(sans))
+        object.__setattr__(self, "_expiry_time", expiry_time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Returns the record as a dictionary keyed like the relation data.
+
+        Returns:
+            dict: Provider certificate fields, unit_name and sans
+        """
+        certificate = super().to_dict()
+        certificate["unit_name"] = self.unit_name
+        certificate["sans"] = list(self.sans)
+        return certificate
+
+
+class CertificateInventory:
+    """Issued certificates indexed by application, unit, SAN and expiry time.
+
+    Built by `TLSCertificatesProvidesV2.get_certificate_inventory`.
+    """
+
+    def __init__(self, certificates: List[InventoryCertificate]):
+        self._certificates = certificates
+        self._by_application: Dict[str, List[InventoryCertificate]] = defaultdict(list)
+        self._by_unit: Dict[str, List[InventoryCertificate]] = defaultdict(list)
+        self._by_san: Dict[str, List[InventoryCertificate]] = defaultdict(list)
+        expiring: List[Tuple[datetime, InventoryCertificate]] = []
+        for certificate in certificates:
+            self._by_application[certificate.application_name].append(certificate)
+            if certificate.unit_name:
+                self._by_unit[certificate.unit_name].append(certificate)
+            for san in certificate.sans:
+                self._by_san[san].append(certificate)
+            expiry_time = certificate.expiry_time
+            if expiry_time:
+                expiring.append((expiry_time, certificate))
+        expiring.sort(key=lambda expiring_certificate: expiring_certificate[0])
+        self._expiry_times = [expiry_time for expiry_time, _ in expiring]
+        self._by_expiry_time = [certificate for _, certificate in expiring]
+
+    def __len__(self) -> int:
+        """Returns the number of certificates."""
+        return len(self._certificates)
+
+    def __iter__(self) -> Iterator[InventoryCertificate]:
+        """Iterates over the certificates."""
+        return iter(self._certificates)
+
+    def get_certificates_by_application(self, application_name: str) -> List[InventoryCertificate]:
+        """Returns the certificates issued to an application.
+
+        Args:
+            application_name (str): Requirer application name
+
+        Returns:
+            list: Certificates
+        """
+        return list(self._by_application.get(application_name, []))
+
+    def get_certificates_by_unit(self, unit_name: str) -> List[InventoryCertificate]:
+        """Returns the certificates issued for the CSRs of a unit.
+
+        Args:
+            unit_name (str): Requirer unit name
+
+        Returns:
+            list: Certificates
+        """
+        return list(self._by_unit.get(unit_name, []))
+
+    def get_certificates_by_san(self, san: str) -> List[InventoryCertificate]:
+        """Returns the certificates covering a SAN, including wildcard DNS names.
+
+        Args:
+            san (str): DNS name or IP address
+
+        Returns:
+            list: Certificates
+        """
+        certificates = list(self._by_san.get(san, []))
+        if "." in san:
+            for certificate in self._by_san.get(f"*.{san.split('.', 1)[1]}", []):
+                if certificate not in certificates:
+                    certificates.append(certificate)
+        return certificates
+
+    def get_expiring_certificates(
+        self, within: timedelta, application_name: Optional[str] = None
+    ) -> List[InventoryCertificate]:
+        """Returns the certificates expiring within a time window, soonest first.
+
+        Already expired certificates are included. Certificates that can't be loaded are not.
+
+        Args:
+            within (timedelta): Time window from now
+            application_name (str): Only returns the certificates of this application
+
+        Returns:
+            list: Certificates
+        """
+        end = bisect.bisect_right(self._expiry_times, datetime.utcnow() + within)
+        return [
+            certificate
+            for certificate in self._by_expiry_time[:end]
+            if application_name is None or certificate.application_name == application_name
+        ]
+
+
+class TrustBundle:
+    """CA certificates published in several relations, deduplicated by fingerprint.
+
+    Built by `TLSCertificatesProvidesV2.get_trust_bundle` and
+    `TLSCertificatesRequiresV2.get_trust_bundle`. Each relation contributes the `ca`, `chain`
+    and `ca_bundle` certificates of its databag. Certificates that are not CAs are left out;
+    self-signed certificates without basic constraints are considered CAs.
+    """
+
+    def __init__(self) -> None:
+        self._fingerprints: Dict[str, Optional[str]] = {}
+        self._certificates: Dict[str, str] = {}
+        self._references: Dict[str, int] = {}
+        self._relation_fingerprints: Dict[int, Set[str]] = {}
+        self._relation_keys: Dict[int, str] = {}
+        self._pem: Optional[str] = None
+
+    def __len__(self) -> int:
+        """Returns the number of CA certificates."""
+        return len(self._references)
+
+    def __contains__(self, fingerprint: object) -> bool:
+        """Returns whether a CA certificate with this SHA-256 fingerprint is in the bundle."""
+        return fingerprint in self._references
+
+    @property
+    def fingerprints(self) -> List[str]:
+        """SHA-256 fingerprints of the CA certificates, sorted."""
+        return sorted(self._references)
+
+    @property
+    def pem(self) -> str:
+        """CA certificates as a PEM bundle, sorted by fingerprint."""
+        if self._pem is None:
+            self._pem = "".join(
+                self._certificates[fingerprint] for fingerprint in self.fingerprints
+            )
+        return self._pem
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 digest of the PEM bundle."""
+        return hashlib.sha256(self.pem.encode()).hexdigest()
+
+    def _get_fingerprint(self, certificate: str) -> Optional[str]:
+        """Returns the fingerprint of a CA certificate, parsing each PEM only once.
+
+        Args:
+            certificate (str): PEM encoded certificate
+
+        Returns:
+            str: SHA-256 fingerprint, None if the certificate is invalid or not a CA
+        """
+        if certificate in self._fingerprints:
+            return self._fingerprints[certificate]
+        fingerprint = None
+        try:
+            certificate_object = _load_certificate(certificate)
+        except ValueError:
+            self._fingerprints[certificate] = None
+            return None
+        try:
+            is_ca = certificate_object.extensions.get_extension_for_class(
+                x509.BasicConstraints
+            ).value.ca
+        except x509.ExtensionNotFound:
+            is_ca = certificate_object.subject == certificate_object.issuer
+        if is_ca:
+            fingerprint = certificate_object.fingerprint(hashes.SHA256()).hex()
+            self._certificates.setdefault(
+                fingerprint,
+                certificate_object.public_bytes(serialization.Encoding.PEM).decode(),
+            )
+        self._fingerprints[certificate] = fingerprint
+        return fingerprint
+
+    def update(self, relation_id: int, certificates: Iterable[str]) -> bool:
+        """Replaces the CA certificates contributed by a relation.
+
+        Args:
+            relation_id (int): Juju relation ID
+            certificates (list): PEM encoded certificates or certificate bundles
+
+        Returns:
+            bool: Whether the bundle changed
+        """
+        fingerprints = set()
+        for certificate in certificates:
+            for pem in _split_pem_certificates(certificate):
+                fingerprint = self._get_fingerprint(pem)
+                if fingerprint:
+                    fingerprints.add(fingerprint)
+        previous_fingerprints = self._relation_fingerprints.get(relation_id, set())
+        if fingerprints == previous_fingerprints:
+            return False
+        self._relation_fingerprints[relation_id] = fingerprints
+        self._pem = None
+        added = False
+        for fingerprint in fingerprints - previous_fingerprints:
+            self._references[fingerprint] = self._references.get(fingerprint, 0) + 1
+            added = added or self._references[fingerprint] == 1
+        removed = self._release(previous_fingerprints - fingerprints)
+        return added or removed
+
+    def update_from_relation_data(
+        self, relation_id: int, relation_data: Mapping[str, str]
+    ) -> bool:
+        """Replaces the CA certificates of a relation when its databag changed.
+
+        Args:
+            relation_id (int): Juju relation ID
+            relation_data (dict): Raw databag publishing `certificates` and `ca_bundle`
+
+        Returns:
+            bool: Whether the bundle changed
+        """
+        raw_relation_data = {
+            field: relation_data[field]
+            for field in ("certificates", "ca_bundle")
+            if field in relation_data
+        }
+        key = hashlib.sha256(json.dumps(raw_relation_data, sort_keys=True).encode()).hexdigest()
+        if self._relation_keys.get(relation_id) == key:
+            return False
+        self._relation_keys[relation_id] = key
+        return self.update(
+            relation_id, _get_relation_data_cas(_load_relation_data(raw_relation_data))
+        )
+
+    def remove(self, relation_id: int) -> bool:
+        """Removes the CA certificates contributed by a relation.
+
+        Args:
+            relation_id (int): Juju relation ID
+
+        Returns:
+            bool: Whether the bundle changed
+        """
+        self._relation_keys.pop(relation_id, None)
+        return self._release(self._relation_fingerprints.pop(relation_id, set()))
+
+    def retain(self, relation_ids: Iterable[int]) -> bool:
+        """Removes the CA certificates of every relation not listed.
+
+        Args:
+            relation_ids (list): Juju relation IDs to keep
+
+        Returns:
+            bool: Whether the bundle changed
+        """
+        removed_relation_ids = set(self._relation_fingerprints) - set(relation_ids)
+        changed = False
+        for relation_id in removed_relation_ids:
+            changed = self.remove(relation_id) or changed
+        return changed
+
+    def _release(self, fingerprints: Set[str]) -> bool:
+        """Drops a reference to CA certificates, removing the ones no relation uses anymore.
+
+        Args:
+            fingerprints (set): SHA-256 fingerprints
+
+        Returns:
+            bool: Whether a certificate was removed
+        """
+        removed = False
+        for fingerprint in fingerprints:
+            self._references[fingerprint] -= 1
+            if not self._references[fingerprint]:
+                del self._references[fingerprint]
+                self._pem = None
+                removed = True
+        return removed
+
+
+class _HashRing:
+    """Consistent hash ring assigning keys to unit names.
+
+    Adding or removing a unit only moves the keys that were assigned to that unit.
+    """
+
+    def __init__(self, nodes: List[str], virtual_nodes: int = 64):
+        self.nodes = sorted(nodes)
+        ring = sorted(
+            (self._hash(f"{node}-{index}"), node)
+            for node in self.nodes
+            for index in range(virtual_nodes)
+        )
+        self._positions = [position for position, _ in ring]
+        self._nodes = [node for _, node in ring]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], "big")
+
+    def get_node(self, key: str) -> Optional[str]:
+        """Returns the node a key is assigned to, None if the ring is empty."""
+        if not self._positions:
+            return None
+        index = bisect.bisect(self._positions, self._hash(key)) % len(self._positions)
+        return self._nodes[index]
+
+
+def _load_relation_data(raw_relation_data: dict) -> dict:
+    """Loads relation data from the relation data bag.
+
+    Json loads all data.
+
+    Args:
+        raw_relation_data: Relation data from the databag
+
+    Returns:
+        dict: Relation data in dict format.
+    """
+    certificate_data = dict()
+    with _instrumentation.measure("json_decode"):
+        for key in raw_relation_data:
+            try:
+                certificate_data[key] = json.loads(raw_relation_data[key])
+            except (json.decoder.JSONDecodeError, TypeError):
+                certificate_data[key] = raw_relation_data[key]
+    return certificate_data
+
+
+def _split_pem_certificates(certificates: str) -> List[str]:
+    """Splits a PEM bundle into PEM encoded certificates.
+
+    Args:
+        certificates (str): One or more PEM encoded certificates
+
+    Returns:
+        list: PEM encoded certificates
+    """
+    return re.findall(
+        r"-----BEGIN CERTIFICATE-----.+?-----END CERTIFICATE-----", certificates, re.DOTALL
+    )
+
+
+def _get_v0_certificates(relation_data: Mapping[str, str]) -> Dict[str, Dict[str, str]]:
+    """Returns the certificates of a v0 provider unit databag by common name.
+
+    Args:
+        relation_data (dict): Raw v0 provider unit databag
+
+    Returns:
+        dict: Certificates with their key, cert, ca and chain
+    """
+    ca = relation_data.get("ca", "")
+    chain = _split_pem_certificates(relation_data.get("chain", "")) or [ca]
+    certificates = {}
+    for common_name, value in relation_data.items():
+        if common_name in ("ca", "chain", "unit_name"):
+            continue
+        try:
+            certificate = json.loads(value)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(certificate, dict) and certificate.get("key") and certificate.get("cert"):
+            certificates[common_name] = {
+                "key": certificate["key"],
+                "cert": certificate["cert"],
+                "ca": ca,
+                "chain": chain,
+            }
+    return certificates
+
+
+def _get_relation_data_cas(relation_data: dict) -> List[str]:
+    """Returns the CA and chain certificates published in relation data.
+
+    Args:
+        relation_data (dict): Relation data in dict format
+
+    Returns:
+        list: PEM encoded certificates, with duplicates
+    """
+    cas: List[str] = []
+    certificates = relation_data.get("certificates", [])
+    for certificate in certificates if isinstance(certificates, list) else []:
+        if not isinstance(certificate, dict):
+            continue
+        cas.append(certificate.get("ca", ""))
+        chain = certificate.get("chain", [])
+        cas.extend(chain if isinstance(chain, list) else [])
+    ca_bundle = relation_data.get("ca_bundle", [])
+    cas.extend(ca_bundle if isinstance(ca_bundle, list) else [])
+    return [ca for ca in cas if isinstance(ca, str)]
+
+
+def _get_databag_size(databag: Any) -> Dict[str, int]:
+    """Returns the size in bytes of each key of a relation databag.
+
+    Args:
+        databag: Relation databag
+
+    Returns:
+        dict: Size of the key and value, per key.
+    """
+    return {key: len(key.encode()) + len(value.encode()) for key, value in databag.items()}
+
+
+def _get_certificates_size(certificates: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Returns the size in bytes of the provider certificates per entry type.
+
+    The size of the CA and chain certificates already present in a previous entry is
+    accounted as duplicated.
+
+    Args:
+        certificates (list): Provider certificates
+
+    Returns:
+        dict: Size of the "certificate", "certificate_signing_request", "ca" and "chain"
+            entries and of the duplicated CA and chain certificates.
+    """
+    sizes = {
+        "certificate": 0,
+        "certificate_signing_request": 0,
+        "ca": 0,
+        "chain": 0,
+        "duplicated_ca_and_chain": 0,
+    }
+    seen_ca_certificates = set()
+    for certificate in certificates:
+        sizes["certificate"] += len(certificate.get("certificate", "").encode())
+        sizes["certificate_signing_request"] += len(
+            certificate.get("certificate_signing_request", "").encode()
+        )
+        for key, ca_certificates in (
+            ("ca", [certificate.get("ca", "")]),
+            ("chain", certificate.get("chain", [])),
+        ):
+            for ca_certificate in ca_certificates:
+                size = len(ca_certificate.encode())
+                sizes[key] += size
+                if ca_certificate in seen_ca_certificates:
+                    sizes["duplicated_ca_and_chain"] += size
+                seen_ca_certificates.add(ca_certificate)
+    return sizes
+
+
+def generate_ca(
+    private_key: bytes,
+    subject: str,
+    private_key_password: Optional[bytes] = None,
+    validity: int = 365,
+    country: str = "US",
+) -> bytes:
+    """Generates a CA Certificate.
+
+    Args:
+        private_key (bytes): Private key
+        subject (str): Certificate subject
+        private_key_password (bytes): Private key password
+        validity (int): Certificate validity time (in days)
+        country (str): Certificate Issuing country
+
+    Returns:
+        bytes: CA Certificate.
+    """
+    private_key_object = serialization.load_pem_private_key(
+        private_key, password=private_key_password
+    )
+    subject = issuer = x509.Name(
+        [
+            x509.NameAttribute(x509.NameOID.COUNTRY_NAME, country),
+            x509.NameAttribute(x509.NameOID.COMMON_NAME, subject),
+        ]
+    )
+    subject_identifier_object = x509.SubjectKeyIdentifier.from_public_key(
+        private_key_object.public_key()  # type: ignore[arg-type]
+    )
+    subject_identifier = key_identifier = subject_identifier_object.public_bytes()
+    cert_builder = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(issuer)
+        .public_key(private_key_object.public_key())  # type: ignore[arg-type]
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(datetime.utcnow())
+        .not_valid_after(datetime.utcnow() + timedelta(days=validity))
+        .add_extension(x509.SubjectKeyIdentifier(digest=subject_identifier), critical=False)
+        .add_extension(
+            x509.AuthorityKeyIdentifier(
+                key_identifier=key_identifier,
+                authority_cert_issuer=None,
+                authority_cert_serial_number=None,
+            ),
+            critical=False,
+        )
+        .add_extension(
+            x509.BasicConstraints(ca=True, path_length=None),
+            critical=True,
+        )
+    )
+    with _instrumentation.measure("signing"):
+        cert = cert_builder.sign(private_key_object, hashes.SHA256())  # type: ignore[arg-type]
+    return cert.public_bytes(serialization.Encoding.PEM)
+
+
+def _get_authority_key_identifier(ca_certificate: x509.Certificate) -> x509.AuthorityKeyIdentifier:
+    """Returns the Authority Key Identifier of certificates signed by the given CA.
+
+    Args:
+        ca_certificate (x509.Certificate): CA certificate
+
+    Returns:
+        x509.AuthorityKeyIdentifier: Authority Key Identifier
+    """
+    try:
+        subject_key_identifier = ca_certificate.extensions.get_extension_for_class(
+            x509.SubjectKeyIdentifier
+        ).value
+        return x509.AuthorityKeyIdentifier.from_issuer_subject_key_identifier(
+            subject_key_identifier
+        )
+    except x509.ExtensionNotFound:
+        return x509.AuthorityKeyIdentifier.from_issuer_public_key(
+            ca_certificate.public_key()  # type: ignore[arg-type]
+        )
+
+
+def generate_intermediate_ca(
+    private_key: bytes,
+    subject: str,
+    ca: bytes,
+    ca_key: bytes,
+    private_key_password: Optional[bytes] = None,
+    ca_key_password: Optional[bytes] = None,
+    validity: int = 365,
+    country: str = "US",
+    path_length: Optional[int] = 0,
+) -> bytes:
+    """Generates an intermediate CA Certificate signed by another CA.
+
+    Args:
+        private_key (bytes): Private key of the intermediate CA
+        subject (str): Certificate subject
+        ca (bytes): Signing CA Certificate
+        ca_key (bytes): Signing CA private key
+        private_key_password (bytes): Private key password
+        ca_key_password (bytes): Signing CA private key password
+        validity (int): Certificate validity time (in days)
+        country (str): Certificate Issuing country
+        path_length (int): Maximum number of CAs that can follow this one in a chain
+
+    Returns:
+        bytes: Intermediate CA Certificate.
+    """
+    private_key_object = serialization.load_pem_private_key(
+        private_key, password=private_key_password
+    )
+    ca_key_object = serialization.load_pem_private_key(ca_key, password=ca_key_password)
+    ca_object = _load_certificate(ca.decode())
+    subject_name = x509.Name(
+        [
+            x509.NameAttribute(x509.NameOID.COUNTRY_NAME, country),
+            x509.NameAttribute(x509.NameOID.COMMON_NAME, subject),
+        ]
+    )
+    cert_builder = (
+        x509.CertificateBuilder()
+        .subject_name(subject_name)
+        .issuer_name(ca_object.subject)
+        .public_key(private_key_object.public_key())  # type: ignore[arg-type]
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(datetime.utcnow())
+        .not_valid_after(datetime.utcnow() + timedelta(days=validity))
+        .add_extension(
+            x509.SubjectKeyIdentifier.from_public_key(
+                private_key_object.public_key()  # type: ignore[arg-type]
+            ),
+            critical=False,
+        )
+        .add_extension(_get_authority_key_identifier(ca_object), critical=False)
+        .add_extension(
+            x509.BasicConstraints(ca=True, path_length=path_length),
+            critical=True,
+        )
+        .add_extension(
+            x509.KeyUsage(
+                digital_signature=True,
+                content_commitment=False,
+                key_encipherment=False,
+                data_encipherment=False,
+                key_agreement=False,
+                key_cert_sign=True,
+                crl_sign=True,
+                encipher_only=False,
+                decipher_only=False,
+            ),
+            critical=True,
+        )
+    )
+    with _instrumentation.measure("signing"):
+        cert = cert_builder.sign(ca_key_object, hashes.SHA256())  # type: ignore[arg-type]
+    return cert.public_bytes(serialization.Encoding.PEM)
+
+
+class CertificateProfile:
+    """Issuance profile fixing the extensions and validity of generated certificates.
+
+    The profile's extensions are built the first time it is used and then reused for every
+    CSR it is applied to. The Authority Key Identifier derived from each CA is cached on the
+    profile as well.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        validity: int = 365,
+        key_usage: Optional[List[str]] = None,
+        extended_key_usage: Optional[List[str]] = None,
+        ca: bool = False,
+        path_length: Optional[int] = None,
+        copy_subject_alternative_names: bool = True,
+    ):
+        """Creates a certificate profile.
+
+        Args:
+            name (str): Profile name
+            validity (int): Validity of the issued certificates (in days)
+            key_usage (list): Names of the KeyUsage flags to set (ex. "digital_signature")
+            extended_key_usage (list): Dotted strings of the ExtendedKeyUsage OIDs to set
+            ca (bool): Whether issued certificates can sign other certificates
+            path_length (int): Maximum path length of issued CA certificates
+            copy_subject_alternative_names (bool): Whether the CSR's SANs are copied
+        """
+        self.name = name
+        self.validity = validity
+        self.key_usage = key_usage or []
+        self.extended_key_usage = extended_key_usage or []
+        self.ca = ca
+        self.path_length = path_length
+        self.copy_subject_alternative_names = copy_subject_alternative_names
+        self._extensions: Optional[List[Tuple[x509.ExtensionType, bool]]] = None
+        self._authority_key_identifiers: Dict[str, x509.AuthorityKeyIdentifier] = {}
+
+    def __repr__(self) -> str:
+        """Returns the profile representation."""
+        return f"CertificateProfile(name={self.name!r})"
+
+    @property
+    def extensions(self) -> List[Tuple[x509.ExtensionType, bool]]:
+        """Returns the (extension, critical) pairs fixed by the profile."""
+        if self._extensions is None:
+            extensions: List[Tuple[x509.ExtensionType, bool]] = [
+                (x509.BasicConstraints(ca=self.ca, path_length=self.path_length), True)
+            ]
+            if self.key_usage:
+                key_usage_flags = {
+                    flag: False
+                    for flag in (
+                        "digital_signature",
+                        "content_commitment",
+                        "key_encipherment",
+                        "data_encipherment",
+                        "key_agreement",
+                        "key_cert_sign",
+                        "crl_sign",
+                        "encipher_only",
+                        "decipher_only",
+                    )
+                }
+                for flag in self.key_usage:
+                    if flag not in key_usage_flags:
+                        raise ValueError(f"Unknown key usage: {flag}")
+                    key_usage_flags[flag] = True
+                extensions.append((x509.KeyUsage(**key_usage_flags), True))
+            if self.extended_key_usage:
+                extensions.append(
+                    (
+                        x509.ExtendedKeyUsage(
+                            [x509.ObjectIdentifier(oid) for oid in self.extended_key_usage]
+                        ),
+                        False,
+                    )
+                )
+            self._extensions = extensions
+        return self._extensions
+
+    def get_authority_key_identifier(
+        self, ca_certificate: x509.Certificate
+    ) -> x509.AuthorityKeyIdentifier:
+        """Returns the Authority Key Identifier for certificates signed by the given CA.
+
+        Args:
+            ca_certificate (x509.Certificate): CA certificate
+
+        Returns:
+            x509.AuthorityKeyIdentifier: Authority Key Identifier
+        """
+        fingerprint = ca_certificate.fingerprint(hashes.SHA256()).hex()
+        authority_key_identifier = self._authority_key_identifiers.get(fingerprint)
+        if authority_key_identifier is None:
+            authority_key_identifier = _get_authority_key_identifier(ca_certificate)
+            self._authority_key_identifiers[fingerprint] = authority_key_identifier
+        return authority_key_identifier
+
+    def get_certificate_extensions(
+        self,
+        csr_object: x509.CertificateSigningRequest,
+        ca_certificate: x509.Certificate,
+        subject_alternative_name: Optional[x509.SubjectAlternativeName] = None,
+    ) -> List[Tuple[x509.ExtensionType, bool]]:
+        """Returns the (extension, critical) pairs of a certificate issued for a CSR.
+
+        Args:
+            csr_object (x509.CertificateSigningRequest): CSR
+            ca_certificate (x509.Certificate): CA certificate used to sign the certificate
+            subject_alternative_name (x509.SubjectAlternativeName): SANs to set on the
+                certificate. Only used when the profile copies SANs.
+
+        Returns:
+            list: List of (extension, critical) pairs.
+        """
+        extensions = list(self.extensions)
+        extensions.append(
+            (
+                x509.SubjectKeyIdentifier.from_public_key(csr_object.public_key()),
+                False,
+            )
+        )
+        extensions.append((self.get_authority_key_identifier(ca_certificate), False))
+        if self.copy_subject_alternative_names and subject_alternative_name:
+            extensions.append((subject_alternative_name, False))
+        return extensions
+
+
+SERVER_CERTIFICATE_PROFILE = CertificateProfile(
+    name="server",
+    key_usage=["digital_signature", "key_encipherment"],
+    extended_key_usage=["1.3.6.1.5.5.7.3.1"],
+)
+
+CLIENT_CERTIFICATE_PROFILE = CertificateProfile(
+    name="client",
+    key_usage=["digital_signature", "key_encipherment"],
+    extended_key_usage=["1.3.6.1.5.5.7.3.2"],
+)
+
+SERVER_CLIENT_CERTIFICATE_PROFILE = CertificateProfile(
+    name="server-client",
+    key_usage=["digital_signature", "key_encipherment"],
+    extended_key_usage=["1.3.6.1.5.5.7.3.1", "1.3.6.1.5.5.7.3.2"],
+)
+
+
+def generate_certificate(
+    csr: bytes,
+    ca: bytes,
+    ca_key: bytes,
+    ca_key_password: Optional[bytes] = None,
+    validity: int = 365,
+    alt_names: Optional[List[str]] = None,
+    profile: Optional[CertificateProfile] = None,
+) -> bytes:
+    """Generates a TLS certificate based on a CSR.
+
+    Args:
+        csr (bytes): CSR
+        ca (bytes): CA Certificate
+        ca_key (bytes): CA private key
+        ca_key_password: CA private key password
+        validity (int): Certificate validity (in days). Ignored when a profile is used.
+        alt_names (list): List of alt names to put on cert - prefer putting SANs in CSR
+        profile (CertificateProfile): Issuance profile. When set, the certificate gets the
+            profile's extensions and validity instead of the CSR's extensions.
+
+    Returns:
+        bytes: Certificate
+    """
+    csr_object = x509.load_pem_x509_csr(csr)
+    subject = csr_object.subject
+    ca_object = _load_certificate(ca.decode())
+    issuer = ca_object.subject
+    private_key = serialization.load_pem_private_key(ca_key, password=ca_key_password)
+    if profile:
+        validity = profile.validity
+
+    certificate_builder = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(issuer)
+        .public_key(csr_object.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(datetime.utcnow())
+        .not_valid_after(datetime.utcnow() + timedelta(days=validity))
+    )
+
+    extensions_list = csr_object.extensions
+    san_ext: Optional[x509.Extension] = None
+    if alt_names:
+        full_sans_dns = alt_names.copy()
+        try:
+            loaded_san_ext = csr_object.extensions.get_extension_for_class(
+                x509.SubjectAlternativeName
+            )
+            full_sans_dns.extend(loaded_san_ext.value.get_values_for_type(x509.DNSName))
+        except x509.ExtensionNotFound:
+            pass
+        finally:
+            san_ext = x509.Extension(
+                x509.ExtensionOID.SUBJECT_ALTERNATIVE_NAME,
+                False,
+                x509.SubjectAlternativeName([x509.DNSName(name) for name in full_sans_dns]),
+            )
+            if not extensions_list:
+                extensions_list = x509.Extensions([san_ext])
+
+    if profile:
+        subject_alternative_name = san_ext.value if san_ext else None
+        if not subject_alternative_name:
+            with suppress(x509.ExtensionNotFound):
+                subject_alternative_name = csr_object.extensions.get_extension_for_class(
+                    x509.SubjectAlternativeName
+                ).value
+        for extension_value, critical in profile.get_certificate_extensions(
+            csr_object=csr_object,
+            ca_certificate=ca_object,
+            subject_alternative_name=subject_alternative_name,
+        ):
+            certificate_builder = certificate_builder.add_extension(
+                extension_value, critical=critical
+            )
+    else:
+        for extension in extensions_list:
+            if extension.value.oid == x509.ExtensionOID.SUBJECT_ALTERNATIVE_NAME and san_ext:
+                extension = san_ext
+
+            certificate_builder = certificate_builder.add_extension(
+                extension.value,
+                critical=extension.critical,
+            )
+    certificate_builder._version = x509.Version.v3
+    with _instrumentation.measure("signing"):
+        cert = certificate_builder.sign(private_key, hashes.SHA256())  # type: ignore[arg-type]
+    return cert.public_bytes(serialization.Encoding.PEM)
+
+
+def generate_pfx_package(
+    certificate: bytes,
+    private_key: bytes,
+    package_password: str,
+    private_key_password: Optional[bytes] = None,
+) -> bytes:
+    """Generates a PFX package to contain the TLS certificate and private key.
+
+    Args:
+        certificate (bytes): TLS certificate
+        private_key (bytes): Private key
+        package_password (str): Password to open the PFX package
+        private_key_password (bytes): Private key password
+
+    Returns:
+        bytes:
+    """
+    private_key_object = serialization.load_pem_private_key(
+        private_key, password=private_key_password
+    )
+    certificate_object = x509.load_pem_x509_certificate(certificate)
+    name = certificate_object.subject.rfc4514_string()
+    pfx_bytes = pkcs12.serialize_key_and_certificates(
+        name=name.encode(),
+        cert=certificate_object,
+        key=private_key_object,  # type: ignore[arg-type]
+        cas=None,
+        encryption_algorithm=serialization.BestAvailableEncryption(package_password.encode()),
+    )
+    return pfx_bytes
+
+
+def generate_crl(
+    ca: bytes,
+    ca_key: bytes,
+    revoked_certificates: List[Tuple[int, datetime]],
+    crl_number: int,
+    ca_key_password: Optional[bytes] = None,
+    validity: int = 7,
+    base_crl_number: Optional[int] = None,
+) -> bytes:
+    """Generates a Certificate Revocation List.
+
+    Args:
+        ca (bytes): CA Certificate
+        ca_key (bytes): CA private key
+        revoked_certificates (list): List of (serial number, revocation date) pairs
+        crl_number (int): Monotonically increasing CRL number
+        ca_key_password (bytes): CA private key password
+        validity (int): Time until the next CRL update (in days)
+        base_crl_number (int): CRL number of the complete CRL this delta CRL is based on.
+            When set, a delta CRL is generated.
+
+    Returns:
+        bytes: CRL
+    """
+    ca_object = _load_certificate(ca.decode())
+    private_key = serialization.load_pem_private_key(ca_key, password=ca_key_password)
+    crl_builder = (
+        x509.CertificateRevocationListBuilder()
+        .issuer_name(ca_object.subject)
+        .last_update(datetime.utcnow())
+        .next_update(datetime.utcnow() + timedelta(days=validity))
+        .add_extension(x509.CRLNumber(crl_number), critical=False)
+        .add_extension(_get_authority_key_identifier(ca_object), critical=False)
+    )
+    if base_crl_number is not None:
+        crl_builder = crl_builder.add_extension(
+            x509.DeltaCRLIndicator(base_crl_number), critical=True
+        )
+    for serial_number, revocation_date in revoked_certificates:
+        crl_builder = crl_builder.add_revoked_certificate(
+            x509.RevokedCertificateBuilder()
+            .serial_number(serial_number)
+            .revocation_date(revocation_date)
+            .build()
+        )
+    with _instrumentation.measure("signing"):
+        crl = crl_builder.sign(private_key, hashes.SHA256())  # type: ignore[arg-type]
+    return crl.public_bytes(serialization.Encoding.PEM)
 
 
 def generate_private_key(
@@ -865,15 +2510,135 @@ def generate_csr(
         for extension in additional_critical_extensions:
             csr = csr.add_extension(extension, critical=True)
 
-    signed_certificate = csr.sign(signing_key, hashes.SHA256())  # type: ignore[arg-type]
+    with _instrumentation.measure("signing"):
+        signed_certificate = csr.sign(signing_key, hashes.SHA256())  # type: ignore[arg-type]
     return signed_certificate.public_bytes(serialization.Encoding.PEM)
 
 
+def _get_file_digest(path: str) -> Optional[str]:
+    """Returns the SHA-256 digest of a file.
+
+    Args:
+        path (str): File path
+
+    Returns:
+        str: Hex digest, None if the file does not exist
+    """
+    try:
+        with open(path, "rb") as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def _write_file_atomically(path: str, content: str, mode: int) -> None:
+    """Writes a file through a temporary file renamed over the destination.
+
+    Args:
+        path (str): File path
+        content (str): File content
+        mode (int): File permissions
+
+    Returns:
+        None
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}."
+    )
+    try:
+        with os.fdopen(file_descriptor, "wb") as file:
+            file.write(content.encode())
+            file.flush()
+            os.fsync(file.fileno())
+        os.chmod(temporary_path, mode)
+        os.replace(temporary_path, path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.remove(temporary_path)
+        raise
+
+
+def write_certificate_files(
+    certificate: Optional[str] = None,
+    certificate_path: Optional[str] = None,
+    private_key: Optional[str] = None,
+    private_key_path: Optional[str] = None,
+    ca: Optional[str] = None,
+    ca_path: Optional[str] = None,
+    chain: Optional[List[str]] = None,
+    chain_path: Optional[str] = None,
+    mode: int = 0o600,
+) -> List[str]:
+    """Writes a certificate, its private key, CA and chain to the filesystem.
+
+    Each file is written only when its content changed, through an atomic rename so that the
+    workload never reads a partially written file. Files without content or path are skipped.
+
+    Args:
+        certificate (str): Certificate
+        certificate_path (str): Path of the certificate file
+        private_key (str): Private key
+        private_key_path (str): Path of the private key file
+        ca (str): CA Certificate
+        ca_path (str): Path of the CA certificate file
+        chain (list): Certificate chain, written as a bundle
+        chain_path (str): Path of the chain file
+        mode (int): Permissions of written files
+
+    Returns:
+        list: Paths of the files that were written, empty when nothing changed
+    """
+    files = [
+        (certificate_path, certificate),
+        (private_key_path, private_key),
+        (ca_path, ca),
+        (chain_path, "\n".join(chain) if chain else None),
+    ]
+    changed_paths = []
+    for path, content in files:
+        if not path or not content:
+            continue
+        if _get_file_digest(path) == hashlib.sha256(content.encode()).hexdigest():
+            continue
+        _write_file_atomically(path, content, mode)
+        changed_paths.append(path)
+    return changed_paths
+
+
+def _generate_csr_from_certificate(private_key: str, certificate: str) -> str:
+    """Generates a CSR matching an existing certificate, signed with its private key.
+
+    Used to migrate v0 certificates, which were published without CSR, to the v2 layout.
+
+    Args:
+        private_key (str): PEM encoded private key of the certificate
+        certificate (str): PEM encoded certificate
+
+    Returns:
+        str: CSR with the subject and SANs of the certificate
+    """
+    signing_key = serialization.load_pem_private_key(private_key.encode(), password=None)
+    certificate_object = _load_certificate(certificate)
+    csr = x509.CertificateSigningRequestBuilder(subject_name=certificate_object.subject)
+    with suppress(x509.ExtensionNotFound):
+        sans = certificate_object.extensions.get_extension_for_class(
+            x509.SubjectAlternativeName
+        ).value
+        csr = csr.add_extension(sans, critical=False)
+    with _instrumentation.measure("signing"):
+        signed_csr = csr.sign(signing_key, hashes.SHA256())  # type: ignore[arg-type]
+    return signed_csr.public_bytes(serialization.Encoding.PEM).decode().strip()
+
+
 class CertificatesProviderCharmEvents(CharmEvents):
     """List of events that the TLS Certificates provider charm can leverage."""
 
     certificate_creation_request = EventSource(CertificateCreationRequestEvent)
+    certificate_creation_requests = EventSource(CertificateCreationRequestsEvent)
     certificate_revocation_request = EventSource(CertificateRevocationRequestEvent)
+    relation_data_size_warning = EventSource(RelationDataSizeWarningEvent)
 
 
 class CertificatesRequirerCharmEvents(CharmEvents):
@@ -883,20 +2648,443 @@ class CertificatesRequirerCharmEvents(CharmEvents):
     certificate_expiring = EventSource(CertificateExpiringEvent)
     certificate_invalidated = EventSource(CertificateInvalidatedEvent)
     all_certificates_invalidated = EventSource(AllCertificatesInvalidatedEvent)
+    relation_data_size_warning = EventSource(RelationDataSizeWarningEvent)
+
+
+_PROVIDER_STATE_DEFAULTS: Dict[str, Any] = {
+    "revoked_certificates": {},
+    "delta_crl_serial_numbers": [],
+    "delta_crl_size": 0,
+    "crl_number": 0,
+    "base_crl_number": 0,
+    "crl": "",
+    "delta_crl": "",
+    "crl_issuer": "",
+    "crl_refresh_time": "",
+    "rotation_ca": "",
+    "rotation_previous_cas": [],
+    "rotation_pending": {},
+    "rotation_in_flight": [],
+    "rotation_total": 0,
+    "rotation_batch_size": 0,
+}
 
 
 class TLSCertificatesProvidesV2(Object):
     """TLS certificates provider class to be instantiated by TLS certificates providers."""
 
     on = CertificatesProviderCharmEvents()
+    _stored: Any = StoredState()
+
+    def __init__(
+        self,
+        charm: CharmBase,
+        relationship_name: str,
+        peer_relation_name: Optional[str] = None,
+        batch_certificate_requests: bool = False,
+        max_csrs_per_unit: Optional[int] = None,
+        max_csrs_per_application: Optional[int] = None,
+        issuance_rate: Optional[float] = None,
+        issuance_burst: Optional[int] = None,
+        relation_data_size_threshold: Optional[int] = None,
+        certificate_inventory_cache: bool = False,
+        state_relation_name: Optional[str] = None,
+    ):
+        """Observes relation changed events.
 
-    def __init__(self, charm: CharmBase, relationship_name: str):
+        Args:
+            charm: Charm object
+            relationship_name: Juju relation name
+            peer_relation_name: Name of the charm's peer relation. When set, CSRs are spread
+                across all units of the provider using consistent hashing of the CSR
+                fingerprint: each unit signs the CSRs assigned to it (typically with its own
+                intermediate CA) and the leader publishes the certificates.
+            batch_certificate_requests: When True, a single `certificate_creation_requests`
+                event carrying all the requests of a hook is emitted instead of one
+                `certificate_creation_request` event per CSR.
+            max_csrs_per_unit: Maximum number of outstanding CSRs (CSRs without a certificate)
+                per requirer unit. Excess CSRs are throttled instead of being requested.
+            max_csrs_per_application: Maximum number of outstanding CSRs per requirer
+                application.
+            issuance_rate: Maximum number of certificate creation requests per minute,
+                enforced with a token bucket. Throttled requests are retried on update status.
+            issuance_burst: Capacity of the token bucket, defaults to the issuance rate.
+            relation_data_size_threshold: Size in bytes of the provider application databag
+                of a relation above which a `relation_data_size_warning` event is emitted.
+            certificate_inventory_cache: When True, the SANs and expiry time of the issued
+                certificates are stored across hooks so that `get_certificate_inventory` only
+                parses new certificates.
+            state_relation_name: Name of the peer relation whose application databag holds
+                the revoked certificates, the CRL number and the CA rotation progress, so
+                that they are kept when the leader changes. Defaults to `peer_relation_name`.
+        """
         super().__init__(charm, relationship_name)
         self.framework.observe(
             charm.on[relationship_name].relation_changed, self._on_relation_changed
         )
         self.charm = charm
         self.relationship_name = relationship_name
+        self.peer_relation_name = peer_relation_name
+        self.state_relation_name = state_relation_name or peer_relation_name
+        self.batch_certificate_requests = batch_certificate_requests
+        self.max_csrs_per_unit = max_csrs_per_unit
+        self.max_csrs_per_application = max_csrs_per_application
+        self.issuance_rate = issuance_rate
+        self.issuance_burst = issuance_burst
+        self.relation_data_size_threshold = relation_data_size_threshold
+        self.certificate_inventory_cache = certificate_inventory_cache
+        self._hash_ring: Optional[_HashRing] = None
+        self._certificate_inventory: Optional[CertificateInventory] = None
+        self._certificate_inventory_key = ""
+        self._trust_bundle = TrustBundle()
+        self._stored.set_default(
+            provider_state="",
+            pending_certificate_requests={},
+            throttled_certificate_requests={},
+            issuance_tokens=-1.0,
+            issuance_tokens_updated=0.0,
+            oversized_relations=[],
+            certificate_metadata={},
+            answered_csrs_digest="",
+        )
+        self.framework.observe(charm.on.update_status, self._on_update_status)
+        self.framework.observe(self.framework.on.pre_commit, self._on_pre_commit)
+        self.framework.observe(self.framework.on.commit, self._on_commit)
+        if peer_relation_name:
+            self.framework.observe(
+                charm.on[peer_relation_name].relation_changed, self._on_peer_relation_changed
+            )
+            self.framework.observe(
+                charm.on[peer_relation_name].relation_joined,
+                self._on_peer_relation_membership_changed,
+            )
+            self.framework.observe(
+                charm.on[peer_relation_name].relation_departed,
+                self._on_peer_relation_membership_changed,
+            )
+
+    @property
+    def _unit_issued_certificates_key(self) -> str:
+        """Returns the peer relation data key holding the certificates issued by a unit."""
+        return f"{self.relationship_name}_issued_certificates"
+
+    @property
+    def _answered_csrs_key(self) -> str:
+        """Returns the peer relation data key holding the fingerprints of the answered CSRs."""
+        return f"{self.relationship_name}_answered_csrs"
+
+    def _get_answered_csr_fingerprints(self) -> Set[str]:
+        """Returns the fingerprints of the CSRs published with a certificate by the leader.
+
+        Returns:
+            set: CSR fingerprints
+        """
+        if not self.peer_relation_name:
+            return set()
+        peer_relation = self.model.get_relation(self.peer_relation_name)
+        if not peer_relation:
+            return set()
+        return set(
+            _load_relation_data(peer_relation.data[self.model.app]).get(
+                self._answered_csrs_key, []
+            )
+        )
+
+    def _publish_answered_csr_fingerprints(self) -> None:
+        """Records the fingerprints of the CSRs answered in any provider relation.
+
+        Only the leader can read the provider application data, the fingerprints are stored
+        in the peer relation application data for the other units. The provider databags are
+        only parsed when one of them changed since the last call.
+
+        Returns:
+            None
+        """
+        if not self.peer_relation_name or not self.model.unit.is_leader():
+            return
+        peer_relation = self.model.get_relation(self.peer_relation_name)
+        if not peer_relation:
+            return
+        relations = self.model.relations[self.relationship_name]
+        raw_certificates = {
+            relation.id: relation.data[self.charm.app].get("certificates", "")
+            for relation in relations
+        }
+        digest = hashlib.sha256(json.dumps(raw_certificates, sort_keys=True).encode()).hexdigest()
+        if digest == self._stored.answered_csrs_digest:
+            return
+        fingerprints = {
+            _get_csr_fingerprint(certificate["certificate_signing_request"])
+            for relation in relations
+            for certificate in _load_relation_data(relation.data[self.charm.app]).get(
+                "certificates", []
+            )
+        }
+        with _instrumentation.measure("databag_write"):
+            peer_relation.data[self.model.app][self._answered_csrs_key] = json.dumps(
+                sorted(fingerprints)
+            )
+        self._stored.answered_csrs_digest = digest
+
+    def _get_signing_units(self) -> List[str]:
+        """Returns the names of the units sharing the signing load."""
+        units = {self.model.unit.name}
+        if self.peer_relation_name:
+            peer_relation = self.model.get_relation(self.peer_relation_name)
+            if peer_relation:
+                units.update(unit.name for unit in peer_relation.units)
+        return sorted(units)
+
+    def get_signing_unit(self, certificate_signing_request: str) -> Optional[str]:
+        """Returns the name of the unit responsible for signing a CSR.
+
+        Without a peer relation, only the leader signs and None is returned for the other units.
+
+        Args:
+            certificate_signing_request (str): Certificate Signing Request
+
+        Returns:
+            str: Unit name
+        """
+        if not self.peer_relation_name:
+            return self.model.unit.name if self.model.unit.is_leader() else None
+        signing_units = self._get_signing_units()
+        if not self._hash_ring or self._hash_ring.nodes != signing_units:
+            self._hash_ring = _HashRing(signing_units)
+        return self._hash_ring.get_node(_get_csr_fingerprint(certificate_signing_request))
+
+    def csr_is_assigned_to_unit(self, certificate_signing_request: str) -> bool:
+        """Returns whether this unit is responsible for signing a CSR.
+
+        Args:
+            certificate_signing_request (str): Certificate Signing Request
+
+        Returns:
+            bool: True/False
+        """
+        return self.get_signing_unit(certificate_signing_request) == self.model.unit.name
+
+    def _get_unit_issued_certificates(self, unit: Optional[Unit] = None) -> List[Dict[str, Any]]:
+        """Returns the certificates signed by a unit and stored in the peer relation.
+
+        Args:
+            unit (Unit): Unit, defaults to this unit
+
+        Returns:
+            list: Certificates issued by the unit.
+        """
+        if not self.peer_relation_name:
+            return []
+        peer_relation = self.model.get_relation(self.peer_relation_name)
+        if not peer_relation:
+            return []
+        unit_relation_data = _load_relation_data(peer_relation.data[unit or self.model.unit])
+        return unit_relation_data.get(self._unit_issued_certificates_key, [])
+
+    def _set_unit_issued_certificates(self, certificates: List[Dict[str, Any]]) -> None:
+        """Stores the certificates signed by this unit in the peer relation.
+
+        Args:
+            certificates (list): Certificates issued by this unit.
+
+        Returns:
+            None
+        """
+        peer_relation = self.model.get_relation(self.peer_relation_name)  # type: ignore[arg-type]
+        if not peer_relation:
+            raise RuntimeError(f"Relation {self.peer_relation_name} does not exist")
+        with _instrumentation.measure("databag_write"):
+            peer_relation.data[self.model.unit][self._unit_issued_certificates_key] = json.dumps(
+                certificates
+            )
+
+    def _store_unit_issued_certificate(
+        self,
+        relation_id: int,
+        certificate: str,
+        certificate_signing_request: str,
+        ca: str,
+        chain: List[str],
+    ) -> None:
+        """Stores a certificate signed by this unit for the leader to publish.
+
+        Args:
+            relation_id (int): Relation id
+            certificate (str): Certificate
+            certificate_signing_request (str): Certificate Signing Request
+            ca (str): CA Certificate
+            chain (list): CA Chain
+
+        Returns:
+            None
+        """
+        certificates = [
+            issued_certificate
+            for issued_certificate in self._get_unit_issued_certificates()
+            if issued_certificate["certificate_signing_request"] != certificate_signing_request
+        ]
+        certificates.append(
+            {
+                "relation_id": relation_id,
+                "certificate": certificate,
+                "certificate_signing_request": certificate_signing_request,
+                "ca": ca,
+                "chain": chain,
+            }
+        )
+        self._set_unit_issued_certificates(certificates)
+
+    def _publish_unit_issued_certificates(self) -> None:
+        """Publishes the certificates signed by the other units in the provider relation data.
+
+        Certificates are only published if their CSR is still requested and if no certificate
+        was published for it yet.
+
+        Returns:
+            None
+        """
+        if not self.peer_relation_name or not self.model.unit.is_leader():
+            return
+        peer_relation = self.model.get_relation(self.peer_relation_name)
+        if not peer_relation:
+            return
+        for unit in peer_relation.units:
+            for issued_certificate in self._get_unit_issued_certificates(unit):
+                relation = self.model.get_relation(
+                    relation_name=self.relationship_name,
+                    relation_id=issued_certificate["relation_id"],
+                )
+                if not relation:
+                    continue
+                csr = issued_certificate["certificate_signing_request"]
+                if csr not in self._get_relation_requirer_csrs(relation):
+                    continue
+                provider_relation_data = _load_relation_data(relation.data[self.charm.app])
+                if any(
+                    certificate["certificate_signing_request"] == csr
+                    for certificate in provider_relation_data.get("certificates", [])
+                ):
+                    continue
+                self._add_certificate(
+                    relation_id=relation.id,
+                    certificate=issued_certificate["certificate"],
+                    certificate_signing_request=csr,
+                    ca=issued_certificate["ca"],
+                    chain=issued_certificate["chain"],
+                )
+
+    @staticmethod
+    def _get_relation_requirer_csrs(relation: Relation) -> List[str]:
+        """Returns the CSRs of all the units of a relation.
+
+        Args:
+            relation (Relation): Juju relation
+
+        Returns:
+            list: CSRs
+        """
+        csrs: List[str] = []
+        for unit in relation.units:
+            csrs.extend(TLSCertificatesProvidesV2._get_unit_requirer_csrs(relation, unit))
+        return csrs
+
+    @staticmethod
+    def _get_unit_requirer_csrs(relation: Relation, unit: Unit) -> List[str]:
+        """Returns the CSRs of a unit of a relation.
+
+        Args:
+            relation (Relation): Juju relation
+            unit (Unit): Requirer unit
+
+        Returns:
+            list: CSRs
+        """
+        requirer_relation_data = _load_relation_data(relation.data[unit])
+        requirer_csrs = requirer_relation_data.get("certificate_signing_requests", [])
+        return [csr["certificate_signing_request"] for csr in requirer_csrs]
+
+    def _on_peer_relation_changed(self, event: RelationChangedEvent) -> None:
+        """Handler triggered on peer relation changed event.
+
+        Publishes the certificates signed by the other units of the provider.
+
+        Args:
+            event: Juju event
+
+        Returns:
+            None
+        """
+        self._publish_unit_issued_certificates()
+
+    def _get_peer_issued_csrs(self) -> Set[str]:
+        """Returns the CSRs for which a unit of the provider stored a certificate.
+
+        Returns:
+            set: CSRs
+        """
+        if not self.peer_relation_name:
+            return set()
+        peer_relation = self.model.get_relation(self.peer_relation_name)
+        if not peer_relation:
+            return set()
+        return {
+            certificate["certificate_signing_request"]
+            for unit in {self.model.unit, *peer_relation.units}
+            for certificate in self._get_unit_issued_certificates(unit)
+        }
+
+    def _on_peer_relation_membership_changed(self, event: RelationEvent) -> None:
+        """Handler triggered when a unit joins or leaves the peer relation.
+
+        The CSRs are spread again across the current units: certificate creation requests are
+        emitted for the unanswered CSRs now assigned to this unit, such as the ones of a
+        departed unit. CSRs for which a unit already stored a certificate, or that the leader
+        recorded as answered, are skipped so that they aren't signed twice.
+
+        Args:
+            event: Juju event
+
+        Returns:
+            None
+        """
+        self._hash_ring = None
+        is_leader = self.model.unit.is_leader()
+        if is_leader:
+            self._publish_unit_issued_certificates()
+        issued_csrs = self._get_peer_issued_csrs()
+        answered_fingerprints = set() if is_leader else self._get_answered_csr_fingerprints()
+        requests: List[Tuple[int, str]] = []
+        for relation in self.model.relations[self.relationship_name]:
+            provider_csrs = []
+            if is_leader:
+                provider_relation_data = _load_relation_data(relation.data[self.charm.app])
+                provider_csrs = [
+                    certificate["certificate_signing_request"]
+                    for certificate in provider_relation_data.get("certificates", [])
+                ]
+            for unit in relation.units:
+                requirer_unit_csrs = [
+                    csr
+                    for csr in self._get_unit_requirer_csrs(relation, unit)
+                    if csr not in issued_csrs
+                ]
+                if is_leader:
+                    requests.extend(
+                        self._get_unit_certificate_requests(
+                            relation=relation,
+                            unit=unit,
+                            requirer_unit_csrs=requirer_unit_csrs,
+                            provider_csrs=provider_csrs,
+                        )
+                    )
+                else:
+                    requests.extend(
+                        (relation.id, csr)
+                        for csr in requirer_unit_csrs
+                        if _get_csr_fingerprint(csr) not in answered_fingerprints
+                        and self.csr_is_assigned_to_unit(csr)
+                    )
+        self._emit_certificate_creation_requests(requests)
 
     def _add_certificate(
         self,
@@ -939,7 +3127,8 @@ class TLSCertificatesProvidesV2(Object):
             logger.info("Certificate already in relation data - Doing nothing")
             return
         certificates.append(new_certificate)
-        relation.data[self.model.app]["certificates"] = json.dumps(certificates)
+        with _instrumentation.measure("databag_write"):
+            relation.data[self.model.app]["certificates"] = json.dumps(certificates)
 
     def _remove_certificate(
         self,
@@ -976,7 +3165,8 @@ class TLSCertificatesProvidesV2(Object):
                 and certificate_dict["certificate_signing_request"] == certificate_signing_request
             ):
                 certificates.remove(certificate_dict)
-        relation.data[self.model.app]["certificates"] = json.dumps(certificates)
+        with _instrumentation.measure("databag_write"):
+            relation.data[self.model.app]["certificates"] = json.dumps(certificates)
 
     @staticmethod
     def _relation_data_is_valid(certificates_data: dict) -> bool:
@@ -989,22 +3179,653 @@ class TLSCertificatesProvidesV2(Object):
             bool: True/False depending on whether the relation data follows the json schema.
         """
         try:
-            validate(instance=certificates_data, schema=REQUIRER_JSON_SCHEMA)
+            with _instrumentation.measure("schema_validation"):
+                jsonschema.validate(instance=certificates_data, schema=REQUIRER_JSON_SCHEMA)
             return True
-        except exceptions.ValidationError:
+        except jsonschema.exceptions.ValidationError:
             return False
 
     def revoke_all_certificates(self) -> None:
         """Revokes all certificates of this provider.
 
-        This method is meant to be used when the Root CA has changed.
+        This method is meant to be used when the Root CA has changed. All requirers will
+        regenerate their keys and CSRs at once, use `start_ca_rotation` to re-issue certificates
+        progressively instead.
         """
+        state = self._load_provider_state()
         for relation in self.model.relations[self.relationship_name]:
             provider_relation_data = _load_relation_data(relation.data[self.charm.app])
             provider_certificates = copy.deepcopy(provider_relation_data.get("certificates", []))
             for certificate in provider_certificates:
                 certificate["revoked"] = True
-            relation.data[self.model.app]["certificates"] = json.dumps(provider_certificates)
+                self._record_revoked_certificate(state, certificate["certificate"])
+            with _instrumentation.measure("databag_write"):
+                relation.data[self.model.app]["certificates"] = json.dumps(provider_certificates)
+        self._save_provider_state(state)
+
+    @property
+    def _provider_state_key(self) -> str:
+        """Returns the peer relation data key holding the state shared by the provider units."""
+        return f"{self.relationship_name}_provider_state"
+
+    def _load_provider_state(self) -> Dict[str, Any]:
+        """Returns the state shared by the units of the provider.
+
+        The state is kept in the application databag of the state relation so that a new
+        leader carries on with the revoked certificates, the CRL number and the CA rotation of
+        the previous one. Without state relation, it is kept in the unit's stored state.
+
+        Returns:
+            dict: State, see `_PROVIDER_STATE_DEFAULTS` for its keys.
+        """
+        raw_state = ""
+        if self.state_relation_name:
+            state_relation = self.model.get_relation(self.state_relation_name)
+            if state_relation:
+                raw_state = state_relation.data[self.charm.app].get(self._provider_state_key, "")
+        state = copy.deepcopy(_PROVIDER_STATE_DEFAULTS)
+        state.update(json.loads(raw_state or self._stored.provider_state or "{}"))
+        return state
+
+    def _save_provider_state(self, state: Dict[str, Any]) -> None:
+        """Stores the state shared by the units of the provider if it changed.
+
+        Args:
+            state (dict): State returned by `_load_provider_state`
+
+        Returns:
+            None
+        """
+        if not self.model.unit.is_leader():
+            return
+        raw_state = json.dumps(state, sort_keys=True)
+        state_relation = (
+            self.model.get_relation(self.state_relation_name) if self.state_relation_name else None
+        )
+        if not state_relation:
+            self._stored.provider_state = raw_state
+            return
+        if state_relation.data[self.charm.app].get(self._provider_state_key) != raw_state:
+            with _instrumentation.measure("databag_write"):
+                state_relation.data[self.charm.app][self._provider_state_key] = raw_state
+
+    @staticmethod
+    def _record_revoked_certificate(state: Dict[str, Any], certificate: str) -> None:
+        """Adds the serial number of a revoked certificate to the revoked certificates registry.
+
+        Args:
+            state (dict): Provider state
+            certificate (str): Revoked certificate
+
+        Returns:
+            None
+        """
+        try:
+            certificate_object = _load_certificate(certificate)
+        except ValueError:
+            logger.debug("Could not load revoked certificate - Not adding it to the CRL")
+            return
+        serial_number = str(certificate_object.serial_number)
+        if serial_number in state["revoked_certificates"]:
+            return
+        state["revoked_certificates"][serial_number] = {
+            "revocation_date": datetime.utcnow().isoformat(),
+            "expiry": certificate_object.not_valid_after.isoformat(),
+        }
+        state["delta_crl_serial_numbers"].append(serial_number)
+
+    @staticmethod
+    def _prune_expired_revoked_certificates(state: Dict[str, Any]) -> None:
+        """Removes expired certificates from the revoked certificates registry.
+
+        Expired certificates don't need to be listed in CRLs anymore.
+
+        Args:
+            state (dict): Provider state
+
+        Returns:
+            None
+        """
+        now = datetime.utcnow()
+        state["revoked_certificates"] = {
+            serial_number: revocation
+            for serial_number, revocation in state["revoked_certificates"].items()
+            if datetime.fromisoformat(revocation["expiry"]) > now
+        }
+
+    def get_revoked_serial_numbers(self) -> List[int]:
+        """Returns the serial numbers of the revoked certificates that are not yet expired.
+
+        Returns:
+            list: Serial numbers
+        """
+        state = self._load_provider_state()
+        self._prune_expired_revoked_certificates(state)
+        return [int(serial_number) for serial_number in state["revoked_certificates"]]
+
+    @staticmethod
+    def _get_revoked_certificates(
+        state: Dict[str, Any], serial_numbers: List[str]
+    ) -> List[Tuple[int, datetime]]:
+        """Returns the (serial number, revocation date) pairs of revoked certificates.
+
+        Args:
+            state (dict): Provider state
+            serial_numbers (list): Serial numbers of revoked certificates
+
+        Returns:
+            list: List of (serial number, revocation date) pairs
+        """
+        return [
+            (
+                int(serial_number),
+                datetime.fromisoformat(
+                    state["revoked_certificates"][serial_number]["revocation_date"]
+                ),
+            )
+            for serial_number in serial_numbers
+        ]
+
+    def publish_crl(
+        self,
+        ca: str,
+        ca_key: str,
+        ca_key_password: Optional[bytes] = None,
+        validity: int = 7,
+        max_delta_crl_size: int = 100,
+    ) -> None:
+        """Publishes the Certificate Revocation Lists in the relation data of all requirers.
+
+        A complete CRL is signed when none exists yet, when the CA changed, when the complete
+        CRL is past half of its validity, or when more than `max_delta_crl_size` certificates
+        were revoked since the complete CRL. Otherwise, only a delta CRL listing the
+        certificates revoked since the complete CRL is signed, and only if certificates were
+        revoked since it was last signed.
+
+        Args:
+            ca (str): CA Certificate
+            ca_key (str): CA private key
+            ca_key_password (bytes): CA private key password
+            validity (int): Time until the next CRL update (in days)
+            max_delta_crl_size (int): Maximum number of certificates listed in a delta CRL
+
+        Returns:
+            None
+        """
+        if not self.model.unit.is_leader():
+            return
+        state = self._load_provider_state()
+        self._prune_expired_revoked_certificates(state)
+        delta_serial_numbers = [
+            serial_number
+            for serial_number in state["delta_crl_serial_numbers"]
+            if serial_number in state["revoked_certificates"]
+        ]
+        complete_crl_is_needed = (
+            not state["crl"]
+            or state["crl_issuer"] != ca
+            or datetime.utcnow() >= datetime.fromisoformat(state["crl_refresh_time"])
+            or len(delta_serial_numbers) > max_delta_crl_size
+        )
+        if complete_crl_is_needed:
+            state["crl_number"] += 1
+            state["base_crl_number"] = state["crl_number"]
+            state["crl"] = generate_crl(
+                ca=ca.encode(),
+                ca_key=ca_key.encode(),
+                ca_key_password=ca_key_password,
+                revoked_certificates=self._get_revoked_certificates(
+                    state, list(state["revoked_certificates"])
+                ),
+                crl_number=state["crl_number"],
+                validity=validity,
+            ).decode()
+            state["crl_issuer"] = ca
+            state["crl_refresh_time"] = (
+                datetime.utcnow() + timedelta(days=validity) / 2
+            ).isoformat()
+            state["delta_crl"] = ""
+            state["delta_crl_size"] = 0
+            state["delta_crl_serial_numbers"] = []
+        elif len(delta_serial_numbers) != state["delta_crl_size"]:
+            state["crl_number"] += 1
+            state["delta_crl"] = generate_crl(
+                ca=ca.encode(),
+                ca_key=ca_key.encode(),
+                ca_key_password=ca_key_password,
+                revoked_certificates=self._get_revoked_certificates(state, delta_serial_numbers),
+                crl_number=state["crl_number"],
+                validity=validity,
+                base_crl_number=state["base_crl_number"],
+            ).decode()
+            state["delta_crl_size"] = len(delta_serial_numbers)
+        self._save_provider_state(state)
+        self._set_relations_crl(state)
+
+    def _set_relations_crl(self, state: Dict[str, Any]) -> None:
+        """Writes the current CRLs in the relation data of requirers that don't have them yet.
+
+        Args:
+            state (dict): Provider state
+
+        Returns:
+            None
+        """
+        for relation in self.model.relations[self.relationship_name]:
+            relation_data = relation.data[self.model.app]
+            if relation_data.get("crl") != state["crl"]:
+                relation_data["crl"] = state["crl"]
+            if state["delta_crl"]:
+                if relation_data.get("delta_crl") != state["delta_crl"]:
+                    relation_data["delta_crl"] = state["delta_crl"]
+            elif "delta_crl" in relation_data:
+                del relation_data["delta_crl"]
+
+    def start_ca_rotation(self, ca: str, batch_size: int = 10) -> None:
+        """Starts re-issuing all certificates with a new CA.
+
+        The new CA is published next to the current ones in the "ca_bundle" key of the relation
+        data so that requirers trust both during the rotation. A `certificate_creation_request`
+        event is then emitted for at most `batch_size` existing CSRs per hook; the charm signs
+        them with the new CA as usual. Each old certificate is added to the revoked
+        certificates once its replacement is set with `set_relation_certificate`. When all
+        certificates are re-issued, the previous CAs are removed from the CA bundle.
+
+        Only the leader unit can start a rotation.
+
+        Args:
+            ca (str): New CA Certificate
+            batch_size (int): Maximum number of certificates re-issued per hook
+
+        Returns:
+            None
+        """
+        if not self.model.unit.is_leader():
+            logger.warning("Only the leader unit can start a CA rotation")
+            return
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        ca = ca.strip()
+        state = self._load_provider_state()
+        previous_cas = list(state["rotation_previous_cas"])
+        pending: Dict[str, int] = {}
+        for relation in self.model.relations[self.relationship_name]:
+            provider_relation_data = _load_relation_data(relation.data[self.charm.app])
+            for certificate in provider_relation_data.get("certificates", []):
+                if certificate.get("revoked", False) or certificate["ca"] == ca:
+                    continue
+                if certificate["ca"] not in previous_cas:
+                    previous_cas.append(certificate["ca"])
+                fingerprint = _get_csr_fingerprint(certificate["certificate_signing_request"])
+                pending[fingerprint] = relation.id
+        state["rotation_ca"] = ca
+        state["rotation_previous_cas"] = previous_cas
+        state["rotation_pending"] = pending
+        state["rotation_in_flight"] = []
+        state["rotation_total"] = len(pending)
+        state["rotation_batch_size"] = batch_size
+        logger.info("Starting CA rotation - %d certificates to re-issue", len(pending))
+        self._set_relations_ca_bundle(state)
+        batch = self._get_ca_rotation_batch(state)
+        self._save_provider_state(state)
+        self._emit_certificate_creation_requests(batch)
+
+    def get_ca_rotation_status(self) -> Dict[str, Any]:
+        """Returns the progress of the CA rotation.
+
+        Returns:
+            dict: Rotation progress with the following keys: in_progress, total, reissued,
+                in_flight and pending.
+        """
+        state = self._load_provider_state()
+        in_progress = bool(state["rotation_ca"])
+        total = state["rotation_total"] if in_progress else 0
+        pending = len(state["rotation_pending"]) if in_progress else 0
+        in_flight = len(state["rotation_in_flight"]) if in_progress else 0
+        return {
+            "in_progress": in_progress,
+            "total": total,
+            "reissued": total - pending,
+            "in_flight": in_flight,
+            "pending": pending - in_flight,
+        }
+
+    def _advance_ca_rotation(self) -> None:
+        """Emits certificate creation requests for the next batch of certificates to re-issue.
+
+        Returns:
+            None
+        """
+        state = self._load_provider_state()
+        batch = self._get_ca_rotation_batch(state)
+        self._save_provider_state(state)
+        self._emit_certificate_creation_requests(batch)
+
+    def _get_ca_rotation_batch(self, state: Dict[str, Any]) -> List[Tuple[int, str]]:
+        """Returns the next batch of certificates to re-issue and marks them as in flight.
+
+        Certificates whose CSR is no longer requested are dropped from the rotation; they
+        are revoked through the regular flow. The rotation state only holds CSR fingerprints,
+        the CSRs are read from the requirer relation data.
+
+        Args:
+            state (dict): Provider state
+
+        Returns:
+            list: (relation id, CSR) pairs
+        """
+        if not state["rotation_ca"] or not self.model.unit.is_leader():
+            return []
+        requested_csrs: Dict[int, Dict[str, str]] = {}
+        for relation in self.model.relations[self.relationship_name]:
+            requested_csrs[relation.id] = {
+                _get_csr_fingerprint(csr): csr.strip()
+                for csr in self._get_relation_requirer_csrs(relation)
+            }
+        pending = {
+            fingerprint: relation_id
+            for fingerprint, relation_id in state["rotation_pending"].items()
+            if fingerprint in requested_csrs.get(relation_id, {})
+        }
+        if len(pending) != len(state["rotation_pending"]):
+            state["rotation_pending"] = pending
+            state["rotation_in_flight"] = [
+                fingerprint
+                for fingerprint in state["rotation_in_flight"]
+                if fingerprint in pending
+            ]
+        if not pending:
+            self._complete_ca_rotation(state)
+            return []
+        in_flight = set(state["rotation_in_flight"])
+        batch: List[Tuple[int, str]] = []
+        for fingerprint, relation_id in pending.items():
+            if len(in_flight) >= state["rotation_batch_size"]:
+                break
+            if fingerprint in in_flight:
+                continue
+            in_flight.add(fingerprint)
+            state["rotation_in_flight"].append(fingerprint)
+            batch.append((relation_id, requested_csrs[relation_id][fingerprint]))
+        return batch
+
+    def _emit_certificate_creation_requests(self, requests: List[Tuple[int, str]]) -> None:
+        """Emits the certificate creation requests of a hook.
+
+        Args:
+            requests (list): (relation id, CSR) pairs
+
+        Returns:
+            None
+        """
+        if not requests:
+            return
+        _instrumentation.count("certificate_creation_requests", len(requests))
+        if self.batch_certificate_requests:
+            self.on.certificate_creation_requests.emit(
+                certificate_creation_requests=[
+                    {"relation_id": relation_id, "certificate_signing_request": csr}
+                    for relation_id, csr in requests
+                ]
+            )
+            return
+        for relation_id, csr in requests:
+            self.on.certificate_creation_request.emit(
+                certificate_signing_request=csr, relation_id=relation_id
+            )
+
+    def _record_ca_rotation_delivery(
+        self,
+        state: Dict[str, Any],
+        certificate_signing_request: str,
+        ca: str,
+        previous_certificate: Optional[str],
+    ) -> None:
+        """Marks a certificate as re-issued if it was set with the new CA.
+
+        The certificate it replaces is added to the revoked certificates.
+
+        Args:
+            state (dict): Provider state
+            certificate_signing_request (str): Certificate Signing Request
+            ca (str): CA Certificate of the new certificate
+            previous_certificate (str): Certificate published for the CSR before the new one
+
+        Returns:
+            None
+        """
+        if not state["rotation_ca"] or ca != state["rotation_ca"]:
+            return
+        fingerprint = _get_csr_fingerprint(certificate_signing_request)
+        if state["rotation_pending"].pop(fingerprint, None) is None:
+            return
+        if previous_certificate:
+            self._record_revoked_certificate(state, previous_certificate)
+        if fingerprint in state["rotation_in_flight"]:
+            state["rotation_in_flight"].remove(fingerprint)
+        if not state["rotation_pending"]:
+            self._complete_ca_rotation(state)
+
+    def _complete_ca_rotation(self, state: Dict[str, Any]) -> None:
+        """Ends the CA rotation and removes the previous CAs from the CA bundle.
+
+        Args:
+            state (dict): Provider state
+
+        Returns:
+            None
+        """
+        logger.info("CA rotation completed")
+        state["rotation_ca"] = ""
+        state["rotation_previous_cas"] = []
+        state["rotation_pending"] = {}
+        state["rotation_in_flight"] = []
+        state["rotation_total"] = 0
+        self._set_relations_ca_bundle(state)
+
+    def _set_relations_ca_bundle(self, state: Dict[str, Any]) -> None:
+        """Publishes the CAs trusted during a CA rotation in all provider relations.
+
+        Args:
+            state (dict): Provider state
+
+        Returns:
+            None
+        """
+        ca_bundle = (
+            json.dumps([*state["rotation_previous_cas"], state["rotation_ca"]])
+            if state["rotation_ca"]
+            else ""
+        )
+        for relation in self.model.relations[self.relationship_name]:
+            relation_data = relation.data[self.charm.app]
+            if ca_bundle:
+                if relation_data.get("ca_bundle") != ca_bundle:
+                    relation_data["ca_bundle"] = ca_bundle
+            elif "ca_bundle" in relation_data:
+                del relation_data["ca_bundle"]
+
+    def _on_update_status(self, event: UpdateStatusEvent) -> None:
+        """Handler triggered on update status event.
+
+        Re-issues the next batch of certificates when a CA rotation is in progress and retries
+        the throttled certificate requests.
+
+        Args:
+            event: Juju event
+
+        Returns:
+            None
+        """
+        self._advance_ca_rotation()
+        self._retry_throttled_certificate_requests()
+
+    def _on_commit(self, event: EventBase) -> None:
+        """Handler triggered when the framework commits at the end of a hook.
+
+        Logs the instrumentation counters and timings when enabled.
+
+        Args:
+            event: Framework commit event
+
+        Returns:
+            None
+        """
+        _instrumentation.log()
+
+    def get_relation_data_sizes(self) -> Dict[int, Dict[str, Any]]:
+        """Returns the size of the relation data of each provider relation.
+
+        The provider application databag is only readable by the leader unit, its size is
+        reported as 0 on other units.
+
+        Returns:
+            dict: Per relation id, the total size in bytes of the provider application
+                databag, the size per key ("keys"), the size per certificate entry type
+                ("certificates", including the duplicated CA and chain certificates) and the
+                size of each requirer unit databag ("requirer_units").
+        """
+        sizes: Dict[int, Dict[str, Any]] = {}
+        for relation in self.model.relations[self.relationship_name]:
+            keys: Dict[str, int] = {}
+            certificates: List[Dict[str, Any]] = []
+            if self.model.unit.is_leader():
+                provider_databag = relation.data[self.charm.app]
+                keys = _get_databag_size(provider_databag)
+                certificates = _load_relation_data(provider_databag).get("certificates", [])
+            sizes[relation.id] = {
+                "total": sum(keys.values()),
+                "keys": keys,
+                "certificates": _get_certificates_size(certificates),
+                "requirer_units": {
+                    unit.name: sum(_get_databag_size(relation.data[unit]).values())
+                    for unit in relation.units
+                },
+            }
+        return sizes
+
+    def check_relation_data_sizes(self) -> None:
+        """Emits a `relation_data_size_warning` event when a databag grows above the threshold.
+
+        The event is emitted once per relation whose provider databag crossed the configured
+        threshold since the last check. Only the provider application databags are read, the
+        requirer databags are left to `get_relation_data_sizes`.
+
+        Called automatically at the end of each hook.
+
+        Returns:
+            None
+        """
+        if self.relation_data_size_threshold is None or not self.model.unit.is_leader():
+            return
+        oversized_relations = []
+        for relation in self.model.relations[self.relationship_name]:
+            size = sum(_get_databag_size(relation.data[self.charm.app]).values())
+            if size <= self.relation_data_size_threshold:
+                continue
+            oversized_relations.append(relation.id)
+            if relation.id not in self._stored.oversized_relations:
+                logger.warning("Relation data of relation %d is %d bytes", relation.id, size)
+                self.on.relation_data_size_warning.emit(
+                    relation_id=relation.id,
+                    size=size,
+                    threshold=self.relation_data_size_threshold,
+                )
+        self._stored.oversized_relations = oversized_relations
+
+    def _on_pre_commit(self, event: EventBase) -> None:
+        """Handler triggered before the framework commits at the end of a hook.
+
+        Args:
+            event: Framework pre-commit event
+
+        Returns:
+            None
+        """
+        self._publish_answered_csr_fingerprints()
+        self.check_relation_data_sizes()
+
+    def queue_certificate_creation_request(
+        self, certificate_signing_request: str, relation_id: int
+    ) -> bool:
+        """Adds a certificate creation request to the pending requests queue.
+
+        The queue is persisted in the unit's StoredState and keyed by CSR fingerprint, so
+        that a CSR is only queued once. Charms that can't sign a CSR yet (e.g. because the
+        CA is not available) should queue it instead of deferring the event, and process
+        the queue with `process_certificate_creation_requests`.
+
+        Args:
+            certificate_signing_request (str): Certificate Signing Request
+            relation_id (int): Juju relation ID
+
+        Returns:
+            bool: False if the CSR was already queued, True otherwise.
+        """
+        fingerprint = _get_csr_fingerprint(certificate_signing_request)
+        if fingerprint in self._stored.pending_certificate_requests:
+            return False
+        self._stored.pending_certificate_requests[fingerprint] = {
+            "certificate_signing_request": certificate_signing_request,
+            "relation_id": relation_id,
+        }
+        return True
+
+    def get_pending_certificate_creation_requests(self) -> List[Dict[str, Union[int, str]]]:
+        """Returns the queued certificate creation requests, oldest first.
+
+        Returns:
+            list: Requests with the "certificate_signing_request" and "relation_id" keys.
+        """
+        return [dict(request) for request in self._stored.pending_certificate_requests.values()]
+
+    def process_certificate_creation_requests(
+        self,
+        handler: Callable[[str, int], None],
+        max_requests: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+    ) -> int:
+        """Calls a handler for the queued certificate creation requests, oldest first.
+
+        A request is removed from the queue once the handler returns. Requests for CSRs
+        that are no longer in the relation data are dropped without calling the handler.
+        Processing stops once `max_requests` requests were handled or `max_seconds`
+        elapsed, the remaining requests stay queued for a later hook.
+
+        Args:
+            handler (Callable): Called with the CSR and the relation ID of each request.
+            max_requests (int): Maximum number of requests to handle, unlimited by default.
+            max_seconds (float): Time budget in seconds, unlimited by default.
+
+        Returns:
+            int: Number of requests handled.
+        """
+        start_time = time.monotonic()
+        requested_csrs: Dict[int, List[str]] = {}
+        handled = 0
+        for fingerprint in list(self._stored.pending_certificate_requests):
+            if max_requests is not None and handled >= max_requests:
+                break
+            if max_seconds is not None and time.monotonic() - start_time >= max_seconds:
+                break
+            request = self._stored.pending_certificate_requests[fingerprint]
+            relation_id = request["relation_id"]
+            if relation_id not in requested_csrs:
+                relation = self.model.get_relation(
+                    relation_name=self.relationship_name, relation_id=relation_id
+                )
+                requested_csrs[relation_id] = (
+                    [csr.strip() for csr in self._get_relation_requirer_csrs(relation)]
+                    if relation
+                    else []
+                )
+            if request["certificate_signing_request"].strip() in requested_csrs[relation_id]:
+                handler(request["certificate_signing_request"], relation_id)
+                handled += 1
+            else:
+                logger.info("CSR is no longer requested - Removing it from the queue")
+            del self._stored.pending_certificate_requests[fingerprint]
+        return handled
 
     def set_relation_certificate(
         self,
@@ -1016,6 +3837,9 @@ class TLSCertificatesProvidesV2(Object):
     ) -> None:
         """Adds certificates to relation data.
 
+        When the provider spreads signing across its units, certificates set by non-leader
+        units are stored in the peer relation and published by the leader.
+
         Args:
             certificate (str): Certificate
             certificate_signing_request (str): Certificate signing request
@@ -1027,12 +3851,35 @@ class TLSCertificatesProvidesV2(Object):
             None
         """
         if not self.model.unit.is_leader():
+            if self.peer_relation_name:
+                self._store_unit_issued_certificate(
+                    relation_id=relation_id,
+                    certificate=certificate.strip(),
+                    certificate_signing_request=certificate_signing_request.strip(),
+                    ca=ca.strip(),
+                    chain=[cert.strip() for cert in chain],
+                )
             return
         certificates_relation = self.model.get_relation(
             relation_name=self.relationship_name, relation_id=relation_id
         )
         if not certificates_relation:
             raise RuntimeError(f"Relation {self.relationship_name} does not exist")
+        state = self._load_provider_state()
+        previous_certificate = None
+        if state["rotation_ca"]:
+            provider_relation_data = _load_relation_data(
+                certificates_relation.data[self.charm.app]
+            )
+            previous_certificate = next(
+                (
+                    provider_certificate["certificate"]
+                    for provider_certificate in provider_relation_data.get("certificates", [])
+                    if provider_certificate["certificate_signing_request"]
+                    == certificate_signing_request.strip()
+                ),
+                None,
+            )
         self._remove_certificate(
             certificate_signing_request=certificate_signing_request.strip(),
             relation_id=relation_id,
@@ -1044,10 +3891,92 @@ class TLSCertificatesProvidesV2(Object):
             ca=ca.strip(),
             chain=[cert.strip() for cert in chain],
         )
+        if state["rotation_ca"]:
+            self._record_ca_rotation_delivery(
+                state,
+                certificate_signing_request=certificate_signing_request.strip(),
+                ca=ca.strip(),
+                previous_certificate=previous_certificate,
+            )
+            self._save_provider_state(state)
+
+    def set_relation_certificates(self, certificates: List[Dict[str, Any]]) -> None:
+        """Adds multiple certificates to relation data with a single write per relation.
+
+        Args:
+            certificates (list): Certificates to add, each with the "relation_id",
+                "certificate", "certificate_signing_request", "ca" and "chain" keys.
+
+        Returns:
+            None
+        """
+        new_certificates = [
+            {
+                "relation_id": certificate["relation_id"],
+                "certificate": certificate["certificate"].strip(),
+                "certificate_signing_request": certificate["certificate_signing_request"].strip(),
+                "ca": certificate["ca"].strip(),
+                "chain": [cert.strip() for cert in certificate["chain"]],
+            }
+            for certificate in certificates
+        ]
+        if not self.model.unit.is_leader():
+            if self.peer_relation_name:
+                new_csrs = [
+                    certificate["certificate_signing_request"] for certificate in new_certificates
+                ]
+                self._set_unit_issued_certificates(
+                    [
+                        issued_certificate
+                        for issued_certificate in self._get_unit_issued_certificates()
+                        if issued_certificate["certificate_signing_request"] not in new_csrs
+                    ]
+                    + new_certificates
+                )
+            return
+        state = self._load_provider_state()
+        certificates_per_relation: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        for certificate in new_certificates:
+            certificates_per_relation[certificate.pop("relation_id")].append(certificate)
+        for relation_id, relation_certificates in certificates_per_relation.items():
+            relation = self.model.get_relation(
+                relation_name=self.relationship_name, relation_id=relation_id
+            )
+            if not relation:
+                raise RuntimeError(f"Relation {self.relationship_name} does not exist")
+            new_csrs = [
+                certificate["certificate_signing_request"] for certificate in relation_certificates
+            ]
+            provider_relation_data = _load_relation_data(relation.data[self.charm.app])
+            provider_certificates = []
+            previous_certificates: Dict[str, str] = {}
+            for certificate in provider_relation_data.get("certificates", []):
+                if certificate["certificate_signing_request"] in new_csrs:
+                    previous_certificates[
+                        certificate["certificate_signing_request"]
+                    ] = certificate["certificate"]
+                else:
+                    provider_certificates.append(certificate)
+            with _instrumentation.measure("databag_write"):
+                relation.data[self.model.app]["certificates"] = json.dumps(
+                    provider_certificates + relation_certificates
+                )
+            for certificate in relation_certificates:
+                self._record_ca_rotation_delivery(
+                    state,
+                    certificate_signing_request=certificate["certificate_signing_request"],
+                    ca=certificate["ca"],
+                    previous_certificate=previous_certificates.get(
+                        certificate["certificate_signing_request"]
+                    ),
+                )
+        self._save_provider_state(state)
 
     def remove_certificate(self, certificate: str) -> None:
         """Removes a given certificate from relation data.
 
+        The certificate's serial number is added to the Certificate Revocation List.
+
         Args:
             certificate (str): TLS Certificate
 
@@ -1059,6 +3988,26 @@ class TLSCertificatesProvidesV2(Object):
             raise RuntimeError(f"Relation {self.relationship_name} does not exist")
         for certificate_relation in certificates_relation:
             self._remove_certificate(certificate=certificate, relation_id=certificate_relation.id)
+        state = self._load_provider_state()
+        self._record_revoked_certificate(state, certificate)
+        self._save_provider_state(state)
+
+    def _get_relations(self, relation_id: Optional[int] = None) -> List[Relation]:
+        """Returns the relation with the given id, or all relations if relation_id is None.
+
+        Args:
+            relation_id (int): Juju relation ID
+
+        Returns:
+            list: Relations
+        """
+        if relation_id is None:
+            return self.model.relations.get(self.relationship_name, [])
+        return [
+            relation
+            for relation in self.model.relations[self.relationship_name]
+            if relation.id == relation_id
+        ]
 
     def get_issued_certificates(
         self, relation_id: Optional[int] = None
@@ -1072,24 +4021,120 @@ class TLSCertificatesProvidesV2(Object):
             dict: Certificates per application name.
         """
         certificates: Dict[str, Dict[str, str]] = defaultdict(dict)
-        relations = (
-            [
-                relation
-                for relation in self.model.relations[self.relationship_name]
-                if relation.id == relation_id
-            ]
-            if relation_id is not None
-            else self.model.relations.get(self.relationship_name, [])
+        for certificate in self.iter_issued_certificates(relation_id=relation_id):
+            certificates[certificate.application_name][certificate.csr] = certificate.certificate
+        return certificates
+
+    def get_certificate_inventory(self) -> CertificateInventory:
+        """Returns the issued certificates indexed by application, unit, SAN and expiry time.
+
+        The inventory is built once per hook and only rebuilt when the relation data changes.
+
+        Returns:
+            CertificateInventory: Issued certificates
+        """
+        inventory_key = self._get_certificate_inventory_key()
+        if (
+            self._certificate_inventory is not None
+            and inventory_key == self._certificate_inventory_key
+        ):
+            return self._certificate_inventory
+        unit_names = {
+            requirer_csr.csr: requirer_csr.unit_name for requirer_csr in self.iter_requirer_csrs()
+        }
+        cached_metadata: Dict[str, Dict[str, Any]] = (
+            {
+                fingerprint: {
+                    "sans": list(metadata["sans"]),
+                    "expiry_time": metadata["expiry_time"],
+                }
+                for fingerprint, metadata in self._stored.certificate_metadata.items()
+            }
+            if self.certificate_inventory_cache
+            else {}
         )
+        certificates_metadata: Dict[str, Dict[str, Any]] = {}
+        certificates: List[InventoryCertificate] = []
+        for certificate in self.iter_issued_certificates():
+            fingerprint = hashlib.sha256(certificate.certificate.encode()).hexdigest()
+            if fingerprint not in certificates_metadata:
+                certificates_metadata[fingerprint] = cached_metadata.get(
+                    fingerprint
+                ) or _get_certificate_metadata(certificate.certificate)
+            metadata = certificates_metadata[fingerprint]
+            certificates.append(
+                InventoryCertificate(
+                    certificate,
+                    unit_name=unit_names.get(certificate.csr),
+                    sans=metadata["sans"],
+                    expiry_time=datetime.fromisoformat(metadata["expiry_time"])
+                    if metadata["expiry_time"]
+                    else None,
+                )
+            )
+        if self.certificate_inventory_cache and certificates_metadata != cached_metadata:
+            self._stored.certificate_metadata = certificates_metadata
+        self._certificate_inventory = CertificateInventory(certificates)
+        self._certificate_inventory_key = inventory_key
+        return self._certificate_inventory
+
+    def get_trust_bundle(self) -> TrustBundle:
+        """Returns the CA certificates published in all relations, without duplicates.
+
+        The bundle is updated incrementally: only the relations whose certificates changed
+        since the previous call are read again.
+
+        Returns:
+            TrustBundle: CA certificates
+        """
+        relations = self._get_relations()
         for relation in relations:
+            self._trust_bundle.update_from_relation_data(
+                relation.id, relation.data[self.charm.app]
+            )
+        self._trust_bundle.retain(relation.id for relation in relations)
+        return self._trust_bundle
+
+    def _get_certificate_inventory_key(self) -> str:
+        """Returns a digest of the raw relation data the certificate inventory is built from.
+
+        Returns:
+            str: Hex encoded digest
+        """
+        digest = hashlib.sha256()
+        for relation in self._get_relations():
+            digest.update(str(relation.id).encode())
+            digest.update(relation.data[self.charm.app].get("certificates", "").encode())
+            for unit in relation.units:
+                digest.update(unit.name.encode())
+                digest.update(relation.data[unit].get("certificate_signing_requests", "").encode())
+        return digest.hexdigest()
+
+    def iter_issued_certificates(
+        self, relation_id: Optional[int] = None
+    ) -> Iterator[ProviderCertificate]:
+        """Yields the issued certificates one at a time.
+
+        The provider relation data is decoded one relation at a time. Revoked certificates are
+        skipped.
+
+        Args:
+            relation_id (int): Juju relation ID, all relations if not specified
+
+        Yields:
+            ProviderCertificate: Issued certificate
+        """
+        for relation in self._get_relations(relation_id):
+            application_name = relation.app.name if relation.app else ""
             provider_relation_data = _load_relation_data(relation.data[self.charm.app])
-            provider_certificates = provider_relation_data.get("certificates", [])
-            for certificate in provider_certificates:
-                if not certificate.get("revoked", False):
-                    certificates[relation.app.name].update(  # type: ignore[union-attr]
-                        {certificate["certificate_signing_request"]: certificate["certificate"]}
-                    )
-        return certificates
+            for certificate in provider_relation_data.get("certificates", []):
+                if certificate.get("revoked", False):
+                    continue
+                yield ProviderCertificate.from_relation_data(
+                    relation_id=relation.id,
+                    application_name=application_name,
+                    certificate=certificate,
+                )
 
     def _on_relation_changed(self, event: RelationChangedEvent) -> None:
         """Handler triggered on relation changed event.
@@ -1108,33 +4153,252 @@ class TLSCertificatesProvidesV2(Object):
         """
         assert event.unit is not None
         requirer_relation_data = _load_relation_data(event.relation.data[event.unit])
-        provider_relation_data = _load_relation_data(event.relation.data[self.charm.app])
         if not self._relation_data_is_valid(requirer_relation_data):
             logger.debug("Relation data did not pass JSON Schema validation")
             return
-        provider_certificates = provider_relation_data.get("certificates", [])
         requirer_csrs = requirer_relation_data.get("certificate_signing_requests", [])
-        provider_csrs = [
-            certificate_creation_request["certificate_signing_request"]
-            for certificate_creation_request in provider_certificates
-        ]
         requirer_unit_csrs = [
             certificate_creation_request["certificate_signing_request"]
             for certificate_creation_request in requirer_csrs
         ]
-        for certificate_signing_request in requirer_unit_csrs:
-            if certificate_signing_request not in provider_csrs:
-                self.on.certificate_creation_request.emit(
-                    certificate_signing_request=certificate_signing_request,
-                    relation_id=event.relation.id,
-                )
+        if self.peer_relation_name and not self.model.unit.is_leader():
+            self._emit_certificate_creation_requests_for_unit(
+                relation=event.relation, requirer_unit_csrs=requirer_unit_csrs
+            )
+            return
+        self._publish_unit_issued_certificates()
+        provider_relation_data = _load_relation_data(event.relation.data[self.charm.app])
+        provider_certificates = provider_relation_data.get("certificates", [])
+        provider_csrs = [
+            certificate_creation_request["certificate_signing_request"]
+            for certificate_creation_request in provider_certificates
+        ]
+        requests = self._get_unit_certificate_requests(
+            relation=event.relation,
+            unit=event.unit,
+            requirer_unit_csrs=requirer_unit_csrs,
+            provider_csrs=provider_csrs,
+        )
         self._revoke_certificates_for_which_no_csr_exists(relation_id=event.relation.id)
+        state = self._load_provider_state()
+        if state["rotation_ca"]:
+            self._set_relations_ca_bundle(state)
+            requests.extend(self._get_ca_rotation_batch(state))
+            self._save_provider_state(state)
+        self._emit_certificate_creation_requests(requests)
+
+    def _get_unit_certificate_requests(
+        self,
+        relation: Relation,
+        unit: Unit,
+        requirer_unit_csrs: List[str],
+        provider_csrs: List[str],
+        throttled_csrs: Optional[List[str]] = None,
+    ) -> List[Tuple[int, str]]:
+        """Returns the certificate creation requests to emit for the CSRs of a requirer unit.
+
+        CSRs exceeding the per unit or per application caps, or the issuance rate, are
+        recorded as throttled instead.
+
+        Args:
+            relation (Relation): Juju relation
+            unit (Unit): Requirer unit
+            requirer_unit_csrs (list): CSRs of the requirer unit
+            provider_csrs (list): CSRs for which a certificate was issued
+            throttled_csrs (list): When set, only these CSRs are considered for requests
+
+        Returns:
+            list: (relation id, CSR) pairs
+        """
+        self._clear_throttled_certificate_requests(relation.id, unit.name)
+        outstanding_csrs = [csr for csr in requirer_unit_csrs if csr not in provider_csrs]
+        application_allowed_csrs: Optional[List[str]] = None
+        if self.max_csrs_per_application is not None:
+            application_outstanding_csrs: List[str] = []
+            for relation_unit in sorted(
+                relation.units, key=lambda relation_unit: relation_unit.name
+            ):
+                application_outstanding_csrs.extend(
+                    csr
+                    for csr in self._get_unit_requirer_csrs(relation, relation_unit)
+                    if csr not in provider_csrs
+                )
+            application_allowed_csrs = application_outstanding_csrs[
+                : self.max_csrs_per_application
+            ]
+        requests: List[Tuple[int, str]] = []
+        throttled = 0
+        for index, certificate_signing_request in enumerate(outstanding_csrs):
+            if throttled_csrs is not None and certificate_signing_request not in throttled_csrs:
+                continue
+            reason = None
+            if self.max_csrs_per_unit is not None and index >= self.max_csrs_per_unit:
+                reason = "unit_limit"
+            elif (
+                application_allowed_csrs is not None
+                and certificate_signing_request not in application_allowed_csrs
+            ):
+                reason = "application_limit"
+            elif self.peer_relation_name and not self.csr_is_assigned_to_unit(
+                certificate_signing_request
+            ):
+                continue
+            elif not self._consume_issuance_token():
+                reason = "rate_limit"
+            if reason:
+                self._stored.throttled_certificate_requests[
+                    _get_csr_fingerprint(certificate_signing_request)
+                ] = {
+                    "relation_id": relation.id,
+                    "unit_name": unit.name,
+                    "certificate_signing_request": certificate_signing_request,
+                    "reason": reason,
+                }
+                throttled += 1
+                continue
+            requests.append((relation.id, certificate_signing_request))
+        if throttled:
+            logger.warning(
+                "%d certificate requests of unit %s are throttled", throttled, unit.name
+            )
+        return requests
+
+    def _consume_issuance_token(self) -> bool:
+        """Takes a token from the issuance token bucket.
+
+        Returns:
+            bool: False if the issuance rate is exceeded, True otherwise.
+        """
+        if self.issuance_rate is None:
+            return True
+        capacity = float(self.issuance_burst or max(1, int(self.issuance_rate)))
+        now = time.time()
+        tokens = self._stored.issuance_tokens
+        if tokens < 0:
+            tokens = capacity
+        else:
+            elapsed = max(0.0, now - self._stored.issuance_tokens_updated)
+            tokens = min(capacity, tokens + elapsed * self.issuance_rate / 60)
+        self._stored.issuance_tokens_updated = now
+        if tokens < 1:
+            self._stored.issuance_tokens = tokens
+            return False
+        self._stored.issuance_tokens = tokens - 1
+        return True
+
+    def _clear_throttled_certificate_requests(self, relation_id: int, unit_name: str) -> None:
+        """Removes the throttled certificate requests of a requirer unit.
+
+        Args:
+            relation_id (int): Relation id
+            unit_name (str): Requirer unit name
+
+        Returns:
+            None
+        """
+        for fingerprint, request in list(self._stored.throttled_certificate_requests.items()):
+            if request["relation_id"] == relation_id and request["unit_name"] == unit_name:
+                del self._stored.throttled_certificate_requests[fingerprint]
+
+    def get_throttled_certificate_requests(self) -> List[Dict[str, Union[int, str]]]:
+        """Returns the certificate requests that were throttled.
+
+        Returns:
+            list: Requests with the "relation_id", "unit_name", "certificate_signing_request"
+                and "reason" keys. The reason is one of "unit_limit", "application_limit"
+                and "rate_limit".
+        """
+        return [dict(request) for request in self._stored.throttled_certificate_requests.values()]
+
+    def _retry_throttled_certificate_requests(self) -> None:
+        """Emits certificate creation requests for the throttled CSRs that are now allowed.
+
+        Returns:
+            None
+        """
+        if not self.model.unit.is_leader() or not self._stored.throttled_certificate_requests:
+            return
+        throttled_csrs: Dict[Tuple[int, str], List[str]] = defaultdict(list)
+        for request in self._stored.throttled_certificate_requests.values():
+            throttled_csrs[(request["relation_id"], request["unit_name"])].append(
+                request["certificate_signing_request"]
+            )
+        requests: List[Tuple[int, str]] = []
+        for relation_id, unit_name in sorted(throttled_csrs):
+            relation = self.model.get_relation(
+                relation_name=self.relationship_name, relation_id=relation_id
+            )
+            unit = (
+                next((unit for unit in relation.units if unit.name == unit_name), None)
+                if relation
+                else None
+            )
+            if not relation or not unit:
+                self._clear_throttled_certificate_requests(relation_id, unit_name)
+                continue
+            provider_relation_data = _load_relation_data(relation.data[self.charm.app])
+            requests.extend(
+                self._get_unit_certificate_requests(
+                    relation=relation,
+                    unit=unit,
+                    requirer_unit_csrs=self._get_unit_requirer_csrs(relation, unit),
+                    provider_csrs=[
+                        certificate["certificate_signing_request"]
+                        for certificate in provider_relation_data.get("certificates", [])
+                    ],
+                    throttled_csrs=throttled_csrs[(relation_id, unit_name)],
+                )
+            )
+        self._emit_certificate_creation_requests(requests)
+
+    def _emit_certificate_creation_requests_for_unit(
+        self, relation: Relation, requirer_unit_csrs: List[str]
+    ) -> None:
+        """Emits certificate creation requests for the CSRs assigned to this non-leader unit.
+
+        Non-leader units can't read the provider application data, so CSRs for which this unit
+        already stored a certificate, or that the leader recorded as answered, are skipped
+        instead. Certificates of CSRs that are no longer requested are removed from the peer
+        relation data.
+
+        Args:
+            relation (Relation): Juju relation
+            requirer_unit_csrs (list): CSRs of the requirer unit that triggered the event
+
+        Returns:
+            None
+        """
+        unit_issued_certificates = self._get_unit_issued_certificates()
+        issued_csrs = {
+            certificate["certificate_signing_request"] for certificate in unit_issued_certificates
+        }
+        answered_fingerprints = self._get_answered_csr_fingerprints()
+        self._emit_certificate_creation_requests(
+            [
+                (relation.id, certificate_signing_request)
+                for certificate_signing_request in requirer_unit_csrs
+                if certificate_signing_request not in issued_csrs
+                and _get_csr_fingerprint(certificate_signing_request) not in answered_fingerprints
+                and self.csr_is_assigned_to_unit(certificate_signing_request)
+            ]
+        )
+        relation_csrs = self._get_relation_requirer_csrs(relation)
+        still_requested_certificates = [
+            certificate
+            for certificate in unit_issued_certificates
+            if certificate["relation_id"] != relation.id
+            or certificate["certificate_signing_request"] in relation_csrs
+        ]
+        if len(still_requested_certificates) != len(unit_issued_certificates):
+            self._set_unit_issued_certificates(still_requested_certificates)
 
     def _revoke_certificates_for_which_no_csr_exists(self, relation_id: int) -> None:
         """Revokes certificates for which no unit has a CSR.
 
         Goes through all generated certificates and compare against the list of CSRs for all units
         of a given relationship.
+        Certificates migrated from v0 are kept while this unit still publishes them with the v0
+        layout, since their derived CSRs are only adopted by requirers that moved to v2.
 
         Args:
             relation_id (int): Relation id
@@ -1148,14 +4412,19 @@ class TLSCertificatesProvidesV2(Object):
         if not certificates_relation:
             raise RuntimeError(f"Relation {self.relationship_name} does not exist")
         provider_relation_data = _load_relation_data(certificates_relation.data[self.charm.app])
-        list_of_csrs: List[str] = []
-        for unit in certificates_relation.units:
-            requirer_relation_data = _load_relation_data(certificates_relation.data[unit])
-            requirer_csrs = requirer_relation_data.get("certificate_signing_requests", [])
-            list_of_csrs.extend(csr["certificate_signing_request"] for csr in requirer_csrs)
+        list_of_csrs = self._get_relation_requirer_csrs(certificates_relation)
+        v0_certificates = {
+            certificate["cert"]
+            for certificate in _get_v0_certificates(
+                certificates_relation.data[self.model.unit]
+            ).values()
+        }
         provider_certificates = provider_relation_data.get("certificates", [])
         for certificate in provider_certificates:
-            if certificate["certificate_signing_request"] not in list_of_csrs:
+            if (
+                certificate["certificate_signing_request"] not in list_of_csrs
+                and certificate["certificate"] not in v0_certificates
+            ):
                 self.on.certificate_revocation_request.emit(
                     certificate=certificate["certificate"],
                     certificate_signing_request=certificate["certificate_signing_request"],
@@ -1175,17 +4444,19 @@ class TLSCertificatesProvidesV2(Object):
             list: List of dictionaries that contain the unit's csrs
             that don't have a certificate issued.
         """
-        all_unit_csr_mappings = copy.deepcopy(self.get_requirer_csrs())
-        for unit_csr_mapping in all_unit_csr_mappings:
-            for csr in unit_csr_mapping["unit_csrs"]:  # type: ignore[union-attr]
-                if self.certificate_issued_for_csr(
-                    app_name=unit_csr_mapping["application_name"],  # type: ignore[arg-type]
-                    csr=csr["certificate_signing_request"],  # type: ignore[index]
-                ):
-                    unit_csr_mapping["unit_csrs"].remove(csr)  # type: ignore[union-attr, arg-type]
-            if len(unit_csr_mapping["unit_csrs"]) == 0:  # type: ignore[arg-type]
-                all_unit_csr_mappings.remove(unit_csr_mapping)
-        return all_unit_csr_mappings
+        unit_csr_mappings: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        for pending_csr in self.iter_pending_csrs():
+            unit_csr_mapping = unit_csr_mappings.setdefault(
+                (pending_csr.relation_id, pending_csr.unit_name),
+                {
+                    "relation_id": pending_csr.relation_id,
+                    "application_name": pending_csr.application_name,
+                    "unit_name": pending_csr.unit_name,
+                    "unit_csrs": [],
+                },
+            )
+            unit_csr_mapping["unit_csrs"].append({"certificate_signing_request": pending_csr.csr})
+        return list(unit_csr_mappings.values())
 
     def get_requirer_csrs(
         self, relation_id: Optional[int] = None
@@ -1201,18 +4472,7 @@ class TLSCertificatesProvidesV2(Object):
             relation_id, application_name and unit_name.
         """
         unit_csr_mappings: List[Dict[str, Union[int, str, List[Dict[str, str]]]]] = []
-
-        relations = (
-            [
-                relation
-                for relation in self.model.relations[self.relationship_name]
-                if relation.id == relation_id
-            ]
-            if relation_id is not None
-            else self.model.relations.get(self.relationship_name, [])
-        )
-
-        for relation in relations:
+        for relation in self._get_relations(relation_id):
             for unit in relation.units:
                 requirer_relation_data = _load_relation_data(relation.data[unit])
                 unit_csrs_list = requirer_relation_data.get("certificate_signing_requests", [])
@@ -1226,6 +4486,50 @@ class TLSCertificatesProvidesV2(Object):
                 )
         return unit_csr_mappings
 
+    def iter_requirer_csrs(self, relation_id: Optional[int] = None) -> Iterator[RequirerCSR]:
+        """Yields the requirers' CSRs one at a time.
+
+        The requirer relation data is decoded one unit at a time.
+
+        Args:
+            relation_id (int): Juju relation ID, all relations if not specified
+
+        Yields:
+            RequirerCSR: Requirer CSR
+        """
+        for relation in self._get_relations(relation_id):
+            application_name = relation.app.name if relation.app else ""
+            for unit in relation.units:
+                for csr in self._get_unit_requirer_csrs(relation, unit):
+                    yield RequirerCSR(
+                        relation_id=relation.id,
+                        application_name=application_name,
+                        unit_name=unit.name,
+                        csr=csr,
+                    )
+
+    def iter_pending_csrs(self, relation_id: Optional[int] = None) -> Iterator[RequirerCSR]:
+        """Yields the requirers' CSRs for which no certificate was issued, one at a time.
+
+        Only the certificates of the relation being iterated are kept in memory.
+
+        Args:
+            relation_id (int): Juju relation ID, all relations if not specified
+
+        Yields:
+            RequirerCSR: Requirer CSR without a certificate
+        """
+        for relation in self._get_relations(relation_id):
+            issued_certificates = {
+                certificate.csr: certificate.certificate
+                for certificate in self.iter_issued_certificates(relation_id=relation.id)
+            }
+            for requirer_csr in self.iter_requirer_csrs(relation_id=relation.id):
+                certificate = issued_certificates.get(requirer_csr.csr)
+                if certificate and csr_matches_certificate(requirer_csr.csr, certificate):
+                    continue
+                yield requirer_csr
+
     def certificate_issued_for_csr(self, app_name: str, csr: str) -> bool:
         """Checks whether a certificate has been issued for a given CSR.
 
@@ -1236,10 +4540,9 @@ class TLSCertificatesProvidesV2(Object):
         Returns:
             bool: True/False depending on whether a certificate has been issued for the given CSR.
         """
-        issued_certificates_per_csr = self.get_issued_certificates()[app_name]
-        for request, cert in issued_certificates_per_csr.items():
-            if request == csr:
-                return csr_matches_certificate(csr, cert)
+        for certificate in self.iter_issued_certificates():
+            if certificate.application_name == app_name and certificate.csr == csr:
+                return csr_matches_certificate(csr, certificate.certificate)
         return False
 
 
@@ -1247,12 +4550,18 @@ class TLSCertificatesRequiresV2(Object):
     """TLS certificates requirer class to be instantiated by TLS certificates requirers."""
 
     on = CertificatesRequirerCharmEvents()
+    _stored: Any = StoredState()
 
     def __init__(
         self,
         charm: CharmBase,
         relationship_name: str,
         expiry_notification_time: int = 168,
+        renewal_fraction: Optional[float] = None,
+        renewal_jitter: float = 0.0,
+        relation_data_size_threshold: Optional[int] = None,
+        pending_csr_timeout: Optional[int] = None,
+        verify_certificate_chain: bool = False,
     ):
         """Generates/use private key and observes relation changed event.
 
@@ -1261,38 +4570,90 @@ class TLSCertificatesRequiresV2(Object):
             relationship_name: Juju relation name
             expiry_notification_time (int): Time difference between now and expiry (in hours).
                 Used to trigger the CertificateExpiring event. Default: 7 days.
+            renewal_fraction (float): Fraction of the certificate lifetime after which the
+                CertificateExpiring event is triggered (e.g. 2/3). Takes precedence over
+                expiry_notification_time when set.
+            renewal_jitter (float): Maximum fraction of the certificate lifetime by which the
+                CertificateExpiring event is brought forward. The actual offset is derived from
+                the CSR fingerprint so that certificates issued together are renewed at
+                different times. Default: 0 (no jitter).
+            relation_data_size_threshold (int): Size in bytes of this unit's databag above
+                which a `relation_data_size_warning` event is emitted.
+            pending_csr_timeout (int): Time in seconds after which a CSR that has no
+                certificate is requested from another provider, when the endpoint is related
+                to several providers. Checked on update status. Default: no fail over.
+            verify_certificate_chain (bool): Whether to verify that certificates chain up to
+                the CA published by the provider. Certificates that don't are invalidated with
+                the "invalid_chain" reason instead of being made available.
         """
+        if renewal_fraction is not None and not 0 < renewal_fraction < 1:
+            raise ValueError("renewal_fraction must be between 0 and 1")
+        if not 0 <= renewal_jitter < 1:
+            raise ValueError("renewal_jitter must be between 0 and 1")
         super().__init__(charm, relationship_name)
         self.relationship_name = relationship_name
         self.charm = charm
         self.expiry_notification_time = expiry_notification_time
+        self.renewal_fraction = renewal_fraction
+        self.renewal_jitter = renewal_jitter
+        self.relation_data_size_threshold = relation_data_size_threshold
+        self.pending_csr_timeout = pending_csr_timeout
+        self.verify_certificate_chain = verify_certificate_chain
+        self._trust_bundle = TrustBundle()
+        self._stored.set_default(oversized_relations=[], pending_csrs={})
         self.framework.observe(
             charm.on[relationship_name].relation_changed, self._on_relation_changed
         )
         self.framework.observe(
             charm.on[relationship_name].relation_broken, self._on_relation_broken
         )
+        self.framework.observe(self.framework.on.pre_commit, self._on_pre_commit)
+        self.framework.observe(self.framework.on.commit, self._on_commit)
         if JujuVersion.from_environ().has_secrets:
             self.framework.observe(charm.on.secret_expired, self._on_secret_expired)
         else:
             self.framework.observe(charm.on.update_status, self._on_update_status)
+        if pending_csr_timeout is not None:
+            self.framework.observe(charm.on.update_status, self._on_update_status_fail_over)
 
-    @property
-    def _requirer_csrs(self) -> List[Dict[str, str]]:
-        """Returns list of requirer's CSRs from relation data."""
-        relation = self.model.get_relation(self.relationship_name)
-        if not relation:
-            raise RuntimeError(f"Relation {self.relationship_name} does not exist")
+    def _get_relation(self, relation_id: Optional[int] = None) -> Optional[Relation]:
+        """Returns the relation with the given id, or the first relation if relation_id is None.
+
+        Args:
+            relation_id (int): Juju relation ID
+
+        Returns:
+            Relation: Juju relation, None if it does not exist
+        """
+        for relation in self.model.relations[self.relationship_name]:
+            if relation_id is None or relation.id == relation_id:
+                return relation
+        return None
+
+    def _get_relation_requirer_csrs(self, relation: Relation) -> List[str]:
+        """Returns the CSRs of this unit in a relation.
+
+        Args:
+            relation (Relation): Juju relation
+
+        Returns:
+            list: CSRs
+        """
         requirer_relation_data = _load_relation_data(relation.data[self.model.unit])
-        return requirer_relation_data.get("certificate_signing_requests", [])
+        return [
+            csr["certificate_signing_request"]
+            for csr in requirer_relation_data.get("certificate_signing_requests", [])
+        ]
 
-    @property
-    def _provider_certificates(self) -> List[Dict[str, str]]:
-        """Returns list of certificates from the provider's relation data."""
-        relation = self.model.get_relation(self.relationship_name)
-        if not relation:
-            logger.debug("No relation: %s", self.relationship_name)
-            return []
+    def _get_relation_provider_certificates(self, relation: Relation) -> List[Dict[str, Any]]:
+        """Returns the certificates published by the provider of a relation.
+
+        Args:
+            relation (Relation): Juju relation
+
+        Returns:
+            list: Certificates
+        """
         if not relation.app:
             logger.debug("No remote app in relation: %s", self.relationship_name)
             return []
@@ -1302,68 +4663,291 @@ class TLSCertificatesRequiresV2(Object):
             return []
         return provider_relation_data.get("certificates", [])
 
-    def _add_requirer_csr(self, csr: str) -> None:
-        """Adds CSR to relation data.
+    @property
+    def _provider_certificates(self) -> List[Dict[str, Any]]:
+        """Returns list of certificates from the relation data of all providers."""
+        return [
+            certificate
+            for relation in self.model.relations[self.relationship_name]
+            for certificate in self._get_relation_provider_certificates(relation)
+        ]
+
+    @property
+    def _requested_provider_certificates(self) -> List[Dict[str, Any]]:
+        """Returns the certificates published for this unit's CSRs by the provider of each CSR.
+
+        A certificate is only returned by the provider of the relation in which its CSR was
+        requested.
+        """
+        certificates: List[Dict[str, Any]] = []
+        for relation in self.model.relations[self.relationship_name]:
+            requirer_csrs = set(self._get_relation_requirer_csrs(relation))
+            certificates.extend(
+                certificate
+                for certificate in self._get_relation_provider_certificates(relation)
+                if certificate["certificate_signing_request"] in requirer_csrs
+            )
+        return certificates
+
+    def get_provider_certificates(
+        self, relation_id: Optional[int] = None
+    ) -> List[ProviderCertificate]:
+        """Returns the certificates published by the providers for all requirer units.
+
+        Args:
+            relation_id (int): Juju relation ID, all relations if not specified
+
+        Returns:
+            list: Provider certificates
+        """
+        return [
+            ProviderCertificate.from_relation_data(
+                relation_id=relation.id,
+                application_name=self.model.app.name,
+                certificate=certificate,
+            )
+            for relation in self.model.relations[self.relationship_name]
+            if relation_id is None or relation.id == relation_id
+            for certificate in self._get_relation_provider_certificates(relation)
+        ]
+
+    def get_assigned_certificates(
+        self, relation_id: Optional[int] = None
+    ) -> List[ProviderCertificate]:
+        """Returns the certificates published by the providers for this unit's CSRs.
+
+        Args:
+            relation_id (int): Juju relation ID, all relations if not specified
+
+        Returns:
+            list: Provider certificates
+        """
+        return [
+            ProviderCertificate.from_relation_data(
+                relation_id=relation.id,
+                application_name=self.model.app.name,
+                certificate=certificate,
+            )
+            for relation in self.model.relations[self.relationship_name]
+            if relation_id is None or relation.id == relation_id
+            for requirer_csrs in [set(self._get_relation_requirer_csrs(relation))]
+            for certificate in self._get_relation_provider_certificates(relation)
+            if certificate["certificate_signing_request"] in requirer_csrs
+        ]
+
+    def get_crls(self, relation_id: Optional[int] = None) -> Dict[str, str]:
+        """Returns the Certificate Revocation Lists published by a provider.
+
+        Args:
+            relation_id (int): Juju relation ID of the provider, first relation if not
+                specified
+
+        Returns:
+            dict: Complete CRL under the "crl" key and, when the provider published one,
+                delta CRL under the "delta_crl" key.
+        """
+        relation = self._get_relation(relation_id)
+        if not relation or not relation.app:
+            return {}
+        provider_relation_data = _load_relation_data(relation.data[relation.app])
+        if not self._relation_data_is_valid(provider_relation_data):
+            logger.warning("Provider relation data did not pass JSON Schema validation")
+            return {}
+        return {
+            key: provider_relation_data[key]
+            for key in ("crl", "delta_crl")
+            if provider_relation_data.get(key)
+        }
+
+    def get_trust_bundle(self) -> TrustBundle:
+        """Returns the CA certificates published by all providers, without duplicates.
+
+        The bundle is updated incrementally: only the relations whose certificates changed
+        since the previous call are read again.
+
+        Returns:
+            TrustBundle: CA certificates
+        """
+        relations = self.model.relations[self.relationship_name]
+        for relation in relations:
+            if relation.app:
+                self._trust_bundle.update_from_relation_data(
+                    relation.id, relation.data[relation.app]
+                )
+        self._trust_bundle.retain(relation.id for relation in relations)
+        return self._trust_bundle
+
+    def get_ca_bundle(self, relation_id: Optional[int] = None) -> List[str]:
+        """Returns the CAs to trust while providers rotate their CA.
+
+        Args:
+            relation_id (int): Juju relation ID of the provider, all relations if not specified
+
+        Returns:
+            list: Previous and new CA certificates, empty when no rotation is in progress.
+        """
+        ca_bundle: List[str] = []
+        for relation in self.model.relations[self.relationship_name]:
+            if relation_id is not None and relation.id != relation_id or not relation.app:
+                continue
+            provider_relation_data = _load_relation_data(relation.data[relation.app])
+            if not self._relation_data_is_valid(provider_relation_data):
+                logger.warning("Provider relation data did not pass JSON Schema validation")
+                continue
+            for ca in provider_relation_data.get("ca_bundle", []):
+                if ca not in ca_bundle:
+                    ca_bundle.append(ca)
+        return ca_bundle
+
+    def _get_requirer_csrs_by_relation(self) -> Dict[int, List[str]]:
+        """Returns the CSRs of this unit in each relation.
+
+        Returns:
+            dict: CSRs by relation ID
+        """
+        return {
+            relation.id: self._get_relation_requirer_csrs(relation)
+            for relation in self.model.relations[self.relationship_name]
+        }
+
+    def _get_csr_relation(self, csr: str) -> Optional[Relation]:
+        """Returns the relation in which this unit requested a CSR.
+
+        Args:
+            csr (str): Certificate Signing Request
+
+        Returns:
+            Relation: Juju relation, None if the CSR was not requested
+        """
+        for relation in self.model.relations[self.relationship_name]:
+            if csr in self._get_relation_requirer_csrs(relation):
+                return relation
+        return None
+
+    def _set_relation_requirer_csrs(self, relation: Relation, csrs: List[str]) -> None:
+        """Writes this unit's CSRs in a relation.
+
+        Args:
+            relation (Relation): Juju relation
+            csrs (list): Certificate Signing Requests
+
+        Returns:
+            None
+        """
+        with _instrumentation.measure("databag_write"):
+            relation.data[self.model.unit]["certificate_signing_requests"] = json.dumps(
+                [{"certificate_signing_request": csr} for csr in csrs]
+            )
+
+    def _update_requirer_csrs(
+        self,
+        csrs_to_add: List[str],
+        csrs_to_remove: List[str],
+        relation_id: Optional[int] = None,
+        excluded_relation_id: Optional[int] = None,
+    ) -> None:
+        """Adds and removes CSRs from relation data with one write per changed relation.
+
+        CSRs already requested from any provider are not added again. Each added CSR goes to
+        the relation with the given id, or to the relation with the fewest CSRs of this unit.
 
         Args:
-            csr (str): Certificate Signing Request
+            csrs_to_add (list): Certificate Signing Requests to add
+            csrs_to_remove (list): Certificate Signing Requests to remove
+            relation_id (int): Juju relation ID in which CSRs are added
+            excluded_relation_id (int): Juju relation ID to ignore, such as a broken relation
 
         Returns:
             None
+
+        Raises:
+            RuntimeError: If the relation does not exist
         """
-        relation = self.model.get_relation(self.relationship_name)
-        if not relation:
+        relations = [
+            relation
+            for relation in self.model.relations[self.relationship_name]
+            if relation.id != excluded_relation_id
+        ]
+        candidate_relations = [
+            relation for relation in relations if relation_id in (None, relation.id)
+        ]
+        if not candidate_relations:
             raise RuntimeError(
                 f"Relation {self.relationship_name} does not exist - "
                 f"The certificate request can't be completed"
             )
-        new_csr_dict = {"certificate_signing_request": csr}
-        if new_csr_dict in self._requirer_csrs:
-            logger.info("CSR already in relation data - Doing nothing")
-            return
-        requirer_csrs = copy.deepcopy(self._requirer_csrs)
-        requirer_csrs.append(new_csr_dict)
-        relation.data[self.model.unit]["certificate_signing_requests"] = json.dumps(requirer_csrs)
+        removed_csrs = set(csrs_to_remove)
+        current_csrs = {
+            relation.id: self._get_relation_requirer_csrs(relation) for relation in relations
+        }
+        updated_csrs = {
+            relation_id: [csr for csr in csrs if csr not in removed_csrs]
+            for relation_id, csrs in current_csrs.items()
+        }
+        requested_csrs = {csr for csrs in updated_csrs.values() for csr in csrs}
+        now = time.time()
+        for csr in csrs_to_add:
+            if csr in requested_csrs:
+                logger.info("CSR already in relation data - Doing nothing")
+                continue
+            relation = min(
+                candidate_relations,
+                key=lambda relation: (len(updated_csrs[relation.id]), relation.id),
+            )
+            updated_csrs[relation.id].append(csr)
+            requested_csrs.add(csr)
+            if self.pending_csr_timeout is not None:
+                self._stored.pending_csrs[_get_csr_fingerprint(csr)] = {
+                    "relation_id": relation.id,
+                    "requested_at": now,
+                }
+        if self.pending_csr_timeout is not None:
+            for csr in removed_csrs - requested_csrs:
+                self._stored.pending_csrs.pop(_get_csr_fingerprint(csr), None)
+        for relation in relations:
+            if updated_csrs[relation.id] != current_csrs[relation.id]:
+                self._set_relation_requirer_csrs(relation, updated_csrs[relation.id])
 
-    def _remove_requirer_csr(self, csr: str) -> None:
-        """Removes CSR from relation data.
+    def request_certificate_creation(
+        self, certificate_signing_request: bytes, relation_id: Optional[int] = None
+    ) -> None:
+        """Request TLS certificate to provider charm.
+
+        When the endpoint is related to several providers, the CSR is sent to the provider of
+        the given relation, or by default to the provider with the fewest CSRs of this unit.
+        Nothing is done if the CSR was already requested from any provider.
 
         Args:
-            csr (str): Certificate signing request
+            certificate_signing_request (bytes): Certificate Signing Request
+            relation_id (int): Juju relation ID of the provider
 
         Returns:
             None
         """
-        relation = self.model.get_relation(self.relationship_name)
-        if not relation:
-            raise RuntimeError(
-                f"Relation {self.relationship_name} does not exist - "
-                f"The certificate request can't be completed"
-            )
-        requirer_csrs = copy.deepcopy(self._requirer_csrs)
-        csr_dict = {"certificate_signing_request": csr}
-        if csr_dict not in requirer_csrs:
-            logger.info("CSR not in relation data - Doing nothing")
-            return
-        requirer_csrs.remove(csr_dict)
-        relation.data[self.model.unit]["certificate_signing_requests"] = json.dumps(requirer_csrs)
+        self.request_certificates_creation(
+            certificate_signing_requests=[certificate_signing_request], relation_id=relation_id
+        )
 
-    def request_certificate_creation(self, certificate_signing_request: bytes) -> None:
-        """Request TLS certificate to provider charm.
+    def request_certificates_creation(
+        self, certificate_signing_requests: List[bytes], relation_id: Optional[int] = None
+    ) -> None:
+        """Request TLS certificates to provider charm.
+
+        All CSRs are written to relation data at once, which is cheaper than calling
+        `request_certificate_creation` for each CSR.
 
         Args:
-            certificate_signing_request (bytes): Certificate Signing Request
+            certificate_signing_requests (list): Certificate Signing Requests
+            relation_id (int): Juju relation ID of the provider
 
         Returns:
             None
         """
-        relation = self.model.get_relation(self.relationship_name)
-        if not relation:
-            raise RuntimeError(
-                f"Relation {self.relationship_name} does not exist - "
-                f"The certificate request can't be completed"
-            )
-        self._add_requirer_csr(certificate_signing_request.decode().strip())
+        self._update_requirer_csrs(
+            csrs_to_add=[csr.decode().strip() for csr in certificate_signing_requests],
+            csrs_to_remove=[],
+            relation_id=relation_id,
+        )
         logger.info("Certificate request sent to provider")
 
     def request_certificate_revocation(self, certificate_signing_request: bytes) -> None:
@@ -1379,34 +4963,124 @@ class TLSCertificatesRequiresV2(Object):
         Returns:
             None
         """
-        self._remove_requirer_csr(certificate_signing_request.decode().strip())
+        self.request_certificates_revocation(
+            certificate_signing_requests=[certificate_signing_request]
+        )
+
+    def request_certificates_revocation(self, certificate_signing_requests: List[bytes]) -> None:
+        """Removes CSRs from relation data.
+
+        All CSRs are removed from relation data at once, which is cheaper than calling
+        `request_certificate_revocation` for each CSR.
+
+        Args:
+            certificate_signing_requests (list): Certificate Signing Requests
+
+        Returns:
+            None
+        """
+        self._update_requirer_csrs(
+            csrs_to_add=[],
+            csrs_to_remove=[csr.decode().strip() for csr in certificate_signing_requests],
+        )
         logger.info("Certificate revocation sent to provider")
 
     def request_certificate_renewal(
-        self, old_certificate_signing_request: bytes, new_certificate_signing_request: bytes
+        self,
+        old_certificate_signing_request: bytes,
+        new_certificate_signing_request: bytes,
+        relation_id: Optional[int] = None,
     ) -> None:
         """Renews certificate.
 
-        Removes old CSR from relation data and adds new one.
+        Replaces the old CSR by the new one in relation data in a single write. The new CSR is
+        sent to the provider of the old one unless a relation is given.
 
         Args:
             old_certificate_signing_request: Old CSR
             new_certificate_signing_request: New CSR
+            relation_id (int): Juju relation ID of the provider
 
         Returns:
             None
         """
-        try:
-            self.request_certificate_revocation(
-                certificate_signing_request=old_certificate_signing_request
-            )
-        except RuntimeError:
-            logger.warning("Certificate revocation failed.")
-        self.request_certificate_creation(
-            certificate_signing_request=new_certificate_signing_request
+        old_csr = old_certificate_signing_request.decode().strip()
+        if relation_id is None:
+            old_csr_relation = self._get_csr_relation(old_csr)
+            relation_id = old_csr_relation.id if old_csr_relation else None
+        self._update_requirer_csrs(
+            csrs_to_add=[new_certificate_signing_request.decode().strip()],
+            csrs_to_remove=[old_csr],
+            relation_id=relation_id,
         )
         logger.info("Certificate renewal request completed.")
 
+    def fail_over_pending_certificate_requests(self) -> None:
+        """Requests from another provider the CSRs pending for longer than `pending_csr_timeout`.
+
+        A CSR is pending until its provider publishes a certificate for it. It is then moved to
+        the least loaded of the other relations of the endpoint.
+
+        Returns:
+            None
+        """
+        if self.pending_csr_timeout is None:
+            return
+        relations = self.model.relations[self.relationship_name]
+        if len(relations) < 2:
+            return
+        now = time.time()
+        pending_csrs: Dict[str, Dict[str, Any]] = {
+            fingerprint: dict(pending_csr)
+            for fingerprint, pending_csr in self._stored.pending_csrs.items()
+        }
+        still_pending_csrs: Dict[str, Dict[str, Any]] = {}
+        current_csrs = self._get_requirer_csrs_by_relation()
+        updated_csrs = {relation_id: list(csrs) for relation_id, csrs in current_csrs.items()}
+        for relation in relations:
+            provider_csrs = {
+                certificate["certificate_signing_request"]
+                for certificate in self._get_relation_provider_certificates(relation)
+            }
+            for csr in current_csrs[relation.id]:
+                fingerprint = _get_csr_fingerprint(csr)
+                if csr in provider_csrs or fingerprint in still_pending_csrs:
+                    continue
+                pending_csr = pending_csrs.get(fingerprint)
+                if not pending_csr or pending_csr["relation_id"] != relation.id:
+                    pending_csr = {"relation_id": relation.id, "requested_at": now}
+                elif now - pending_csr["requested_at"] >= self.pending_csr_timeout:
+                    target_relation = min(
+                        [other for other in relations if other.id != relation.id],
+                        key=lambda other: (len(updated_csrs[other.id]), other.id),
+                    )
+                    logger.warning(
+                        "CSR pending for more than %d seconds in relation %d, "
+                        "requesting it in relation %d",
+                        self.pending_csr_timeout,
+                        relation.id,
+                        target_relation.id,
+                    )
+                    updated_csrs[relation.id].remove(csr)
+                    updated_csrs[target_relation.id].append(csr)
+                    pending_csr = {"relation_id": target_relation.id, "requested_at": now}
+                still_pending_csrs[fingerprint] = pending_csr
+        for relation in relations:
+            if updated_csrs[relation.id] != current_csrs[relation.id]:
+                self._set_relation_requirer_csrs(relation, updated_csrs[relation.id])
+        self._stored.pending_csrs = still_pending_csrs
+
+    def _on_update_status_fail_over(self, event: UpdateStatusEvent) -> None:
+        """Handler triggered on update status event when fail over is enabled.
+
+        Args:
+            event (UpdateStatusEvent): Juju event
+
+        Returns:
+            None
+        """
+        self.fail_over_pending_certificate_requests()
+
     @staticmethod
     def _relation_data_is_valid(certificates_data: dict) -> bool:
         """Checks whether relation data is valid based on json schema.
@@ -1418,18 +5092,20 @@ class TLSCertificatesRequiresV2(Object):
             bool: Whether relation data is valid.
         """
         try:
-            validate(instance=certificates_data, schema=PROVIDER_JSON_SCHEMA)
+            with _instrumentation.measure("schema_validation"):
+                jsonschema.validate(instance=certificates_data, schema=PROVIDER_JSON_SCHEMA)
             return True
-        except exceptions.ValidationError:
+        except jsonschema.exceptions.ValidationError:
             return False
 
     def _on_relation_changed(self, event: RelationChangedEvent) -> None:
         """Handler triggered on relation changed events.
 
-        Goes through all providers certificates that match a requested CSR.
+        Goes through all certificates of the relation's provider that match a requested CSR.
 
-        If the provider certificate is revoked, emit a CertificateInvalidateEvent,
-        otherwise emit a CertificateAvailableEvent.
+        If the provider certificate is revoked, or its chain can't be verified when chain
+        verification is enabled, emit a CertificateInvalidateEvent, otherwise emit a
+        CertificateAvailableEvent.
 
         When Juju secrets are available, remove the secret for revoked certificate,
         or add a secret with the correct expiry time for new certificates.
@@ -1441,15 +5117,12 @@ class TLSCertificatesRequiresV2(Object):
         Returns:
             None
         """
-        requirer_csrs = [
-            certificate_creation_request["certificate_signing_request"]
-            for certificate_creation_request in self._requirer_csrs
-        ]
-        for certificate in self._provider_certificates:
+        requirer_csrs = self._get_relation_requirer_csrs(event.relation)
+        for certificate in self._get_relation_provider_certificates(event.relation):
             if certificate["certificate_signing_request"] in requirer_csrs:
                 if certificate.get("revoked", False):
                     if JujuVersion.from_environ().has_secrets:
-                        with suppress(SecretNotFoundError):
+                        with suppress(SecretNotFoundError), _instrumentation.measure("secret"):
                             secret = self.model.get_secret(
                                 label=f"{LIBID}-{certificate['certificate_signing_request']}"
                             )
@@ -1461,26 +5134,38 @@ class TLSCertificatesRequiresV2(Object):
                         ca=certificate["ca"],
                         chain=certificate["chain"],
                     )
+                elif self.verify_certificate_chain and not _chain_verifier.verify(
+                    certificate["certificate"], certificate["ca"], certificate["chain"]
+                ):
+                    logger.warning(
+                        "Certificate chain could not be verified for relation %d",
+                        event.relation.id,
+                    )
+                    self.on.certificate_invalidated.emit(
+                        reason="invalid_chain",
+                        certificate=certificate["certificate"],
+                        certificate_signing_request=certificate["certificate_signing_request"],
+                        ca=certificate["ca"],
+                        chain=certificate["chain"],
+                    )
                 else:
                     if JujuVersion.from_environ().has_secrets:
-                        try:
-                            secret = self.model.get_secret(
-                                label=f"{LIBID}-{certificate['certificate_signing_request']}"
-                            )
-                            secret.set_content({"certificate": certificate["certificate"]})
-                            secret.set_info(
-                                expire=self._get_next_secret_expiry_time(
-                                    certificate["certificate"]
-                                ),
-                            )
-                        except SecretNotFoundError:
-                            secret = self.charm.unit.add_secret(
-                                {"certificate": certificate["certificate"]},
-                                label=f"{LIBID}-{certificate['certificate_signing_request']}",
-                                expire=self._get_next_secret_expiry_time(
-                                    certificate["certificate"]
-                                ),
-                            )
+                        secret_label = f"{LIBID}-{certificate['certificate_signing_request']}"
+                        secret_expiry_time = self._get_next_secret_expiry_time(
+                            certificate["certificate"],
+                            certificate["certificate_signing_request"],
+                        )
+                        with _instrumentation.measure("secret"):
+                            try:
+                                secret = self.model.get_secret(label=secret_label)
+                                secret.set_content({"certificate": certificate["certificate"]})
+                                secret.set_info(expire=secret_expiry_time)
+                            except SecretNotFoundError:
+                                secret = self.charm.unit.add_secret(
+                                    {"certificate": certificate["certificate"]},
+                                    label=secret_label,
+                                    expire=secret_expiry_time,
+                                )
                     self.on.certificate_available.emit(
                         certificate_signing_request=certificate["certificate_signing_request"],
                         certificate=certificate["certificate"],
@@ -1488,15 +5173,52 @@ class TLSCertificatesRequiresV2(Object):
                         chain=certificate["chain"],
                     )
 
-    def _get_next_secret_expiry_time(self, certificate: str) -> Optional[datetime]:
-        """Return the expiry time or expiry notification time.
+    def get_renewal_time(
+        self, certificate: str, certificate_signing_request: Optional[str] = None
+    ) -> Optional[datetime]:
+        """Returns the time at which a certificate should be renewed.
+
+        The renewal time is either `renewal_fraction` of the certificate lifetime or
+        `expiry_notification_time` hours before expiry, brought forward by a jitter
+        deterministically derived from the CSR (or the certificate when no CSR is given).
+
+        Args:
+            certificate (str): x509 certificate
+            certificate_signing_request (str): Certificate Signing Request of the certificate
+
+        Returns:
+            Optional[datetime]: None if the certificate validity can't be read,
+                renewal time otherwise.
+        """
+        expiry_time = _get_certificate_expiry_time(certificate)
+        if not expiry_time:
+            return None
+        renewal_time = expiry_time - timedelta(hours=self.expiry_notification_time)
+        if self.renewal_fraction is None and not self.renewal_jitter:
+            return renewal_time
+        not_valid_before = _get_certificate_start_time(certificate)
+        if not not_valid_before:
+            return renewal_time
+        lifetime = expiry_time - not_valid_before
+        if self.renewal_fraction is not None:
+            renewal_time = not_valid_before + lifetime * self.renewal_fraction
+        if self.renewal_jitter:
+            fingerprint = _get_csr_fingerprint(certificate_signing_request or certificate)
+            jitter = int(fingerprint[:8], 16) / 0xFFFFFFFF
+            renewal_time -= lifetime * self.renewal_jitter * jitter
+        return max(renewal_time, not_valid_before)
+
+    def _get_next_secret_expiry_time(
+        self, certificate: str, certificate_signing_request: Optional[str] = None
+    ) -> Optional[datetime]:
+        """Return the expiry time or renewal time.
 
         Extracts the expiry time from the provided certificate, calculates the
-        expiry notification time and return the closest of the two, that is in
-        the future.
+        renewal time and return the closest of the two, that is in the future.
 
         Args:
             certificate: x509 certificate
+            certificate_signing_request: Certificate Signing Request of the certificate
 
         Returns:
             Optional[datetime]: None if the certificate expiry time cannot be read,
@@ -1505,8 +5227,82 @@ class TLSCertificatesRequiresV2(Object):
         expiry_time = _get_certificate_expiry_time(certificate)
         if not expiry_time:
             return None
-        expiry_notification_time = expiry_time - timedelta(hours=self.expiry_notification_time)
-        return _get_closest_future_time(expiry_notification_time, expiry_time)
+        renewal_time = self.get_renewal_time(certificate, certificate_signing_request)
+        if not renewal_time:
+            return None
+        return _get_closest_future_time(renewal_time, expiry_time)
+
+    def _on_commit(self, event: EventBase) -> None:
+        """Handler triggered when the framework commits at the end of a hook.
+
+        Logs the instrumentation counters and timings when enabled.
+
+        Args:
+            event: Framework commit event
+
+        Returns:
+            None
+        """
+        _instrumentation.log()
+
+    def get_relation_data_sizes(self) -> Dict[int, Dict[str, Any]]:
+        """Returns the size of the relation data of each relation.
+
+        Returns:
+            dict: Per relation id, the total size in bytes of this unit's databag, the size per
+                key ("keys") and the size of the provider application databag ("provider").
+        """
+        sizes: Dict[int, Dict[str, Any]] = {}
+        for relation in self.model.relations[self.relationship_name]:
+            keys = _get_databag_size(relation.data[self.model.unit])
+            sizes[relation.id] = {
+                "total": sum(keys.values()),
+                "keys": keys,
+                "provider": sum(_get_databag_size(relation.data[relation.app]).values())
+                if relation.app
+                else 0,
+            }
+        return sizes
+
+    def check_relation_data_sizes(self) -> None:
+        """Emits a `relation_data_size_warning` event when a databag grows above the threshold.
+
+        The event is emitted once per relation whose unit databag crossed the configured
+        threshold since the last check.
+
+        Called automatically at the end of each hook.
+
+        Returns:
+            None
+        """
+        if self.relation_data_size_threshold is None:
+            return
+        oversized_relations = []
+        for relation_id, sizes in self.get_relation_data_sizes().items():
+            if sizes["total"] <= self.relation_data_size_threshold:
+                continue
+            oversized_relations.append(relation_id)
+            if relation_id not in self._stored.oversized_relations:
+                logger.warning(
+                    "Relation data of relation %d is %d bytes", relation_id, sizes["total"]
+                )
+                self.on.relation_data_size_warning.emit(
+                    relation_id=relation_id,
+                    size=sizes["total"],
+                    threshold=self.relation_data_size_threshold,
+                )
+        self._stored.oversized_relations = oversized_relations
+
+    def _on_pre_commit(self, event: EventBase) -> None:
+        """Handler triggered before the framework commits at the end of a hook.
+
+        Args:
+            event: Framework pre-commit event
+
+        Returns:
+            None
+        """
+        self.check_relation_data_sizes()
 
     def _on_relation_broken(self, event: RelationBrokenEvent) -> None:
         """Handler triggered on relation broken event.
@@ -1514,13 +5310,49 @@ class TLSCertificatesRequiresV2(Object):
         Emitting `all_certificates_invalidated` from `relation-broken` rather
         than `relation-departed` since certs are stored in app data.
 
+        When other providers remain, only the certificates of the broken relation are
+        invalidated, with the "relation_broken" reason, and its CSRs are requested from the
+        remaining providers.
+
         Args:
             event: Juju event
 
         Returns:
             None
         """
-        self.on.all_certificates_invalidated.emit()
+        broken_csrs = self._get_relation_requirer_csrs(event.relation)
+        if self.pending_csr_timeout is not None:
+            for csr in broken_csrs:
+                pending_csr = self._stored.pending_csrs.get(_get_csr_fingerprint(csr))
+                if pending_csr and pending_csr["relation_id"] == event.relation.id:
+                    del self._stored.pending_csrs[_get_csr_fingerprint(csr)]
+        if not any(
+            relation.id != event.relation.id
+            for relation in self.model.relations[self.relationship_name]
+        ):
+            self.on.all_certificates_invalidated.emit()
+            return
+        for certificate in self._get_relation_provider_certificates(event.relation):
+            if certificate["certificate_signing_request"] not in broken_csrs:
+                continue
+            self.on.certificate_invalidated.emit(
+                reason="relation_broken",
+                certificate=certificate["certificate"],
+                certificate_signing_request=certificate["certificate_signing_request"],
+                ca=certificate["ca"],
+                chain=certificate["chain"],
+            )
+        if broken_csrs:
+            logger.info(
+                "Requesting the %d CSRs of relation %d from the remaining providers",
+                len(broken_csrs),
+                event.relation.id,
+            )
+            self._update_requirer_csrs(
+                csrs_to_add=broken_csrs,
+                csrs_to_remove=[],
+                excluded_relation_id=event.relation.id,
+            )
 
     def _on_secret_expired(self, event: SecretExpiredEvent) -> None:
         """Triggered when a certificate is set to expire.
@@ -1559,9 +5391,7 @@ class TLSCertificatesRequiresV2(Object):
                 certificate=certificate_dict["certificate"],
                 expiry=expiry_time.isoformat(),
             )
-            event.secret.set_info(
-                expire=_get_certificate_expiry_time(certificate_dict["certificate"]),
-            )
+            event.secret.set_info(expire=expiry_time)
         else:
             logger.warning("Certificate is expired")
             self.on.certificate_invalidated.emit(
@@ -1576,7 +5406,7 @@ class TLSCertificatesRequiresV2(Object):
 
     def _find_certificate_in_relation_data(self, csr: str) -> Optional[Dict[str, Any]]:
         """Returns the certificate that match the given CSR."""
-        for certificate_dict in self._provider_certificates:
+        for certificate_dict in self._requested_provider_certificates:
             if certificate_dict["certificate_signing_request"] != csr:
                 continue
             return certificate_dict
@@ -1586,8 +5416,8 @@ class TLSCertificatesRequiresV2(Object):
         """Triggered on update status event.
 
         Goes through each certificate in the "certificates" relation and checks their expiry date.
-        If they are close to expire (<7 days), emits a CertificateExpiringEvent event and if
-        they are expired, emits a CertificateExpiredEvent.
+        If their renewal time is reached (see `get_renewal_time`), emits a
+        CertificateExpiringEvent event and if they are expired, emits a CertificateExpiredEvent.
 
         Args:
             event (UpdateStatusEvent): Juju event
@@ -1595,7 +5425,7 @@ class TLSCertificatesRequiresV2(Object):
         Returns:
             None
         """
-        for certificate_dict in self._provider_certificates:
+        for certificate_dict in self._requested_provider_certificates:
             expiry_time = _get_certificate_expiry_time(certificate_dict["certificate"])
             if not expiry_time:
                 continue
@@ -1611,7 +5441,10 @@ class TLSCertificatesRequiresV2(Object):
                 )
                 self.request_certificate_revocation(certificate_dict["certificate"].encode())
                 continue
-            if time_difference.total_seconds() < (self.expiry_notification_time * 60 * 60):
+            renewal_time = self.get_renewal_time(
+                certificate_dict["certificate"], certificate_dict["certificate_signing_request"]
+            )
+            if renewal_time and datetime.utcnow() >= renewal_time:
                 logger.warning("Certificate almost expired")
                 self.on.certificate_expiring.emit(
                     certificate=certificate_dict["certificate"],
@@ -1619,6 +5452,241 @@ class TLSCertificatesRequiresV2(Object):
                 )
 
 
+class TLSCertificatesMigrationV2(Object):
+    """Converts v0 relation data to the v2 layout, a bounded batch per hook.
+
+    The v0 layout is left in place so that v0 and v2 charms can both read the relation during
+    the transition. Progress is derived from the relation data, so a migration interrupted in
+    any hook resumes where it stopped. v1 relation data already follows the v2 layout.
+    """
+
+    _stored: Any = StoredState()
+
+    def __init__(self, charm: CharmBase, relationship_name: str, batch_size: int = 50):
+        """Observes relation changed and update status events.
+
+        Args:
+            charm: Charm object
+            relationship_name: Juju relation name
+            batch_size (int): Maximum number of certificates migrated per hook
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        super().__init__(charm, relationship_name)
+        self.charm = charm
+        self.relationship_name = relationship_name
+        self.batch_size = batch_size
+        self._stored.set_default(failed_entries=[])
+        self.framework.observe(
+            charm.on[relationship_name].relation_changed, self._on_migration_hook
+        )
+        self.framework.observe(charm.on.update_status, self._on_migration_hook)
+
+    @property
+    def _is_provider(self) -> bool:
+        """Whether the charm provides the relation."""
+        return self.relationship_name in self.charm.meta.provides
+
+    def _get_requested_common_names(self, relation: Relation) -> Set[str]:
+        """Returns the common names requested by this unit with the v0 layout.
+
+        Args:
+            relation (Relation): Juju relation
+
+        Returns:
+            set: Common names
+        """
+        requirer_relation_data = _load_relation_data(relation.data[self.model.unit])
+        return {
+            request["common_name"]
+            for key in ("cert_requests", "client_cert_requests")
+            for request in requirer_relation_data.get(key, [])
+            if isinstance(request, dict) and "common_name" in request
+        }
+
+    def _get_pending_provider_entries(
+        self, relation: Relation
+    ) -> List[Tuple[str, Dict[str, str]]]:
+        """Returns the v0 certificates of this provider unit missing from the v2 layout.
+
+        Args:
+            relation (Relation): Juju relation
+
+        Returns:
+            list: (common name, certificate) pairs
+        """
+        provider_relation_data = _load_relation_data(relation.data[self.model.app])
+        migrated_certificates = {
+            certificate.get("certificate")
+            for certificate in provider_relation_data.get("certificates", [])
+        }
+        return [
+            (common_name, certificate)
+            for common_name, certificate in _get_v0_certificates(
+                relation.data[self.model.unit]
+            ).items()
+            if certificate["cert"] not in migrated_certificates
+            and f"{relation.id}/{common_name}" not in self._stored.failed_entries
+        ]
+
+    def _get_pending_requirer_csrs(self, relation: Relation) -> List[str]:
+        """Returns the CSRs published by a v2 provider for this unit's v0 certificates.
+
+        Args:
+            relation (Relation): Juju relation
+
+        Returns:
+            list: CSRs missing from this unit's v2 layout
+        """
+        if not relation.app:
+            return []
+        requested_common_names = self._get_requested_common_names(relation)
+        v0_certificates = {
+            certificate["cert"]
+            for unit in relation.units
+            for common_name, certificate in _get_v0_certificates(relation.data[unit]).items()
+            if common_name in requested_common_names
+        }
+        requirer_relation_data = _load_relation_data(relation.data[self.model.unit])
+        requirer_csrs = {
+            csr.get("certificate_signing_request")
+            for csr in requirer_relation_data.get("certificate_signing_requests", [])
+        }
+        provider_relation_data = _load_relation_data(relation.data[relation.app])
+        return [
+            certificate["certificate_signing_request"]
+            for certificate in provider_relation_data.get("certificates", [])
+            if certificate.get("certificate") in v0_certificates
+            and certificate.get("certificate_signing_request") not in requirer_csrs
+        ]
+
+    def _migrate_provider_relation(self, relation: Relation, budget: int) -> int:
+        """Adds v0 certificates of this unit to the v2 layout of a relation.
+
+        A CSR is derived from each certificate and its private key, so that neither is
+        regenerated.
+
+        Args:
+            relation (Relation): Juju relation
+            budget (int): Maximum number of certificates to migrate
+
+        Returns:
+            int: Number of migrated certificates
+        """
+        new_certificates = []
+        for common_name, certificate in self._get_pending_provider_entries(relation)[:budget]:
+            try:
+                csr = _generate_csr_from_certificate(certificate["key"], certificate["cert"])
+            except (ValueError, TypeError):
+                logger.warning("Could not migrate certificate for %s", common_name)
+                self._stored.failed_entries.append(f"{relation.id}/{common_name}")
+                continue
+            new_certificates.append(
+                {
+                    "certificate_signing_request": csr,
+                    "certificate": certificate["cert"],
+                    "ca": certificate["ca"],
+                    "chain": certificate["chain"],
+                }
+            )
+        if new_certificates:
+            provider_relation_data = _load_relation_data(relation.data[self.model.app])
+            certificates = provider_relation_data.get("certificates", [])
+            with _instrumentation.measure("databag_write"):
+                relation.data[self.model.app]["certificates"] = json.dumps(
+                    certificates + new_certificates
+                )
+        return len(new_certificates)
+
+    def _migrate_requirer_relation(self, relation: Relation, budget: int) -> int:
+        """Adds the CSRs of this unit's v0 certificates to the v2 layout of a relation.
+
+        Args:
+            relation (Relation): Juju relation
+            budget (int): Maximum number of CSRs to migrate
+
+        Returns:
+            int: Number of migrated CSRs
+        """
+        new_csrs = self._get_pending_requirer_csrs(relation)[:budget]
+        if new_csrs:
+            requirer_relation_data = _load_relation_data(relation.data[self.model.unit])
+            requirer_csrs = requirer_relation_data.get("certificate_signing_requests", [])
+            with _instrumentation.measure("databag_write"):
+                relation.data[self.model.unit]["certificate_signing_requests"] = json.dumps(
+                    requirer_csrs + [{"certificate_signing_request": csr} for csr in new_csrs]
+                )
+        return len(new_csrs)
+
+    def migrate(self) -> int:
+        """Migrates at most `batch_size` certificates to the v2 layout.
+
+        On the provider side, only the leader migrates, as the v2 layout lives in the
+        application databag, and only the certificates published by the leader unit are
+        migrated.
+
+        Returns:
+            int: Number of migrated certificates
+        """
+        if self._is_provider and not self.model.unit.is_leader():
+            return 0
+        migrated = 0
+        for relation in self.model.relations[self.relationship_name]:
+            budget = self.batch_size - migrated
+            if budget <= 0:
+                break
+            if self._is_provider:
+                migrated += self._migrate_provider_relation(relation, budget)
+            else:
+                migrated += self._migrate_requirer_relation(relation, budget)
+        if migrated:
+            logger.info("Migrated %d certificates to the v2 layout", migrated)
+        return migrated
+
+    def get_migration_status(self) -> Dict[int, Dict[str, int]]:
+        """Returns the number of certificates left to migrate in each relation.
+
+        Returns:
+            dict: "pending" and "failed" certificate counts by relation ID
+        """
+        if self._is_provider and not self.model.unit.is_leader():
+            return {}
+        status = {}
+        for relation in self.model.relations[self.relationship_name]:
+            if self._is_provider:
+                pending = len(self._get_pending_provider_entries(relation))
+            else:
+                pending = len(self._get_pending_requirer_csrs(relation))
+            failed = sum(
+                failed_entry.startswith(f"{relation.id}/")
+                for failed_entry in self._stored.failed_entries
+            )
+            status[relation.id] = {"pending": pending, "failed": failed}
+        return status
+
+    def migration_is_complete(self) -> bool:
+        """Returns whether no certificate is left to migrate.
+
+        Returns:
+            bool: Whether the migration is complete
+        """
+        return all(
+            relation_status["pending"] == 0
+            for relation_status in self.get_migration_status().values()
+        )
+
+    def _on_migration_hook(self, event: EventBase) -> None:
+        """Handler triggered on relation changed and update status events.
+
+        Args:
+            event (EventBase): Juju event
+
+        Returns:
+            None
+        """
+        self.migrate()
+
+
 def csr_matches_certificate(csr: str, cert: str) -> bool:
     """Check if a CSR matches a certificate.
 
@@ -1631,8 +5699,8 @@ def csr_matches_certificate(csr: str, cert: str) -> bool:
         bool: True/False depending on whether the CSR matches the certificate.
     """
     try:
-        csr_object = x509.load_pem_x509_csr(csr.encode("utf-8"))
-        cert_object = x509.load_pem_x509_certificate(cert.encode("utf-8"))
+        csr_object = _load_csr(csr)
+        cert_object = _load_certificate(cert)
 
         if csr_object.public_key().public_bytes(
             encoding=serialization.Encoding.PEM,
@@ -1667,6 +5735,31 @@ def _get_closest_future_time(
     )
 
 
+def _get_certificate_metadata(certificate: str) -> Dict[str, Any]:
+    """Extracts the SANs and expiry time of a certificate.
+
+    Args:
+        certificate (str): x509 certificate as a string
+
+    Returns:
+        dict: DNS names and IP addresses under "sans" and ISO formatted expiry time under
+            "expiry_time", empty if the certificate can't be loaded.
+    """
+    try:
+        certificate_object = _load_certificate(certificate)
+    except ValueError:
+        logger.warning("Could not load certificate.")
+        return {"sans": [], "expiry_time": ""}
+    sans: List[str] = []
+    with suppress(x509.ExtensionNotFound):
+        san_extension = certificate_object.extensions.get_extension_for_class(
+            x509.SubjectAlternativeName
+        )
+        sans.extend(san_extension.value.get_values_for_type(x509.DNSName))
+        sans.extend(str(ip) for ip in san_extension.value.get_values_for_type(x509.IPAddress))
+    return {"sans": sans, "expiry_time": certificate_object.not_valid_after.isoformat()}
+
+
 def _get_certificate_expiry_time(certificate: str) -> Optional[datetime]:
     """Extract expiry time from a certificate string.
 
@@ -1677,8 +5770,25 @@ def _get_certificate_expiry_time(certificate: str) -> Optional[datetime]:
         Optional[datetime]: Expiry datetime or None
     """
     try:
-        certificate_object = x509.load_pem_x509_certificate(data=certificate.encode())
+        certificate_object = _load_certificate(certificate)
         return certificate_object.not_valid_after
     except ValueError:
         logger.warning("Could not load certificate.")
         return None
+
+
+def _get_certificate_start_time(certificate: str) -> Optional[datetime]:
+    """Extract the start of the validity period from a certificate string.
+
+    Args:
+        certificate (str): x509 certificate as a string
+
+    Returns:
+        Optional[datetime]: Start datetime or None
+    """
+    try:
+        certificate_object = _load_certificate(certificate)
+        return certificate_object.not_valid_before
+    except ValueError:
+        logger.warning("Could not load certificate.")
+        return None
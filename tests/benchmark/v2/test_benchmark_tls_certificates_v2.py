@@ -0,0 +1,252 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Benchmarks of the v2 crypto helpers and relation handlers.
+
+Run with `tox -e benchmark` to save the results under `.benchmarks/` and show the difference
+with the previous run. `tox -e benchmark-check` fails when the fastest round of a benchmark is
+twice as slow as in the previous run saved on the same host.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import pytest
+from ops import testing
+
+from lib.charms.tls_certificates_interface.v2.tls_certificates import (
+    ProviderCertificate,
+    _load_relation_data,
+    csr_matches_certificate,
+    generate_ca,
+    generate_certificate,
+    generate_csr,
+    generate_private_key,
+)
+from tests.unit.charms.tls_certificates_interface.v2.dummy_provider_charm.src.charm import (
+    DummyTLSCertificatesProviderCharm,
+)
+from tests.unit.charms.tls_certificates_interface.v2.dummy_requirer_charm.src.charm import (
+    DummyTLSCertificatesRequirerCharm,
+)
+
+RELATION_NAME = "certificates"
+UNITS = [1, 100, 1000]
+CSRS_PER_UNIT = [1, 10]
+NUMBER_OF_RECORDS = 10000
+LIB_PATH = Path(__file__).parents[3] / "lib"
+
+
+@pytest.fixture(scope="module")
+def ca_private_key() -> bytes:
+    return generate_private_key()
+
+
+@pytest.fixture(scope="module")
+def ca(ca_private_key: bytes) -> bytes:
+    return generate_ca(private_key=ca_private_key, subject="ca")
+
+
+@pytest.fixture(scope="module")
+def csr() -> bytes:
+    return generate_csr(private_key=generate_private_key(), subject="whatever")
+
+
+@pytest.fixture(scope="module")
+def certificate(ca: bytes, ca_private_key: bytes, csr: bytes) -> bytes:
+    return generate_certificate(csr=csr, ca=ca, ca_key=ca_private_key)
+
+
+def fake_csr(unit_number: int, csr_number: int) -> str:
+    return f"-----BEGIN CERTIFICATE REQUEST-----\nunit {unit_number} csr {csr_number}\n"
+
+
+def allocated_memory(function: Callable) -> int:
+    tracemalloc.start()
+    try:
+        result = function()
+        allocated, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return allocated
+
+
+def test_lib_import(benchmark):
+    code = "import ops; import charms.tls_certificates_interface.v2.tls_certificates"
+    command = [sys.executable, "-c", code]
+    env = {**os.environ, "PYTHONPATH": str(LIB_PATH)}
+    subprocess.run(command, env=env, check=True)  # Writes the bytecode cache
+
+    benchmark(subprocess.run, command, env=env, check=True)
+
+
+def test_generate_private_key(benchmark):
+    benchmark(generate_private_key)
+
+
+def test_generate_csr(benchmark):
+    private_key = generate_private_key()
+
+    benchmark(generate_csr, private_key=private_key, subject="whatever")
+
+
+def test_generate_ca(benchmark, ca_private_key):
+    benchmark(generate_ca, private_key=ca_private_key, subject="ca")
+
+
+def test_generate_certificate(benchmark, ca, ca_private_key, csr):
+    benchmark(generate_certificate, csr=csr, ca=ca, ca_key=ca_private_key)
+
+
+def test_csr_matches_certificate(benchmark, csr, certificate):
+    result = benchmark(csr_matches_certificate, csr=csr.decode(), cert=certificate.decode())
+
+    assert result
+
+
+@pytest.mark.parametrize("number_of_certificates", [1, 100, 1000])
+def test_load_relation_data(benchmark, ca, certificate, csr, number_of_certificates):
+    relation_data = {
+        "certificates": json.dumps(
+            [
+                {
+                    "certificate": certificate.decode(),
+                    "certificate_signing_request": csr.decode(),
+                    "ca": ca.decode(),
+                    "chain": [ca.decode(), certificate.decode()],
+                }
+            ]
+            * number_of_certificates
+        )
+    }
+
+    benchmark(_load_relation_data, relation_data)
+
+
+@pytest.mark.parametrize("csrs_per_unit", CSRS_PER_UNIT)
+@pytest.mark.parametrize("units", UNITS)
+def test_provider_on_relation_changed(benchmark, units, csrs_per_unit):
+    harness = testing.Harness(DummyTLSCertificatesProviderCharm)
+    harness.begin()
+    harness.set_leader(is_leader=True)
+    harness.disable_hooks()
+    relation_id = harness.add_relation(RELATION_NAME, "requirer")
+    for unit_number in range(units):
+        unit_name = f"requirer/{unit_number}"
+        harness.add_relation_unit(relation_id, unit_name)
+        harness.update_relation_data(
+            relation_id,
+            unit_name,
+            {
+                "certificate_signing_requests": json.dumps(
+                    [
+                        {"certificate_signing_request": fake_csr(unit_number, csr_number)}
+                        for csr_number in range(csrs_per_unit)
+                    ]
+                )
+            },
+        )
+    harness.enable_hooks()
+    relation = harness.model.get_relation(RELATION_NAME, relation_id)
+    unit = harness.model.get_unit("requirer/0")
+
+    benchmark(harness.charm.on[RELATION_NAME].relation_changed.emit, relation, relation.app, unit)
+    harness.cleanup()
+
+
+@pytest.mark.parametrize("csrs_per_unit", CSRS_PER_UNIT)
+@pytest.mark.parametrize("units", UNITS)
+def test_requirer_on_relation_changed(benchmark, units, csrs_per_unit):
+    harness = testing.Harness(DummyTLSCertificatesRequirerCharm)
+    harness.begin()
+    harness.disable_hooks()
+    relation_id = harness.add_relation(RELATION_NAME, "provider")
+    harness.add_relation_unit(relation_id, "provider/0")
+    harness.update_relation_data(
+        relation_id,
+        harness.charm.unit.name,
+        {
+            "certificate_signing_requests": json.dumps(
+                [
+                    {"certificate_signing_request": fake_csr(0, csr_number)}
+                    for csr_number in range(csrs_per_unit)
+                ]
+            )
+        },
+    )
+    harness.update_relation_data(
+        relation_id,
+        "provider",
+        {
+            "certificates": json.dumps(
+                [
+                    {
+                        "certificate": f"certificate {unit_number} {csr_number}",
+                        "certificate_signing_request": fake_csr(unit_number, csr_number),
+                        "ca": "ca",
+                        "chain": ["ca"],
+                    }
+                    for unit_number in range(units)
+                    for csr_number in range(csrs_per_unit)
+                ]
+            )
+        },
+    )
+    harness.enable_hooks()
+    relation = harness.model.get_relation(RELATION_NAME, relation_id)
+
+    benchmark(
+        harness.charm.on[RELATION_NAME].relation_changed.emit,
+        relation,
+        relation.app,
+        harness.model.get_unit("provider/0"),
+    )
+    harness.cleanup()
+
+
+def test_provider_certificate_records_memory(benchmark):
+    certificates = [
+        {
+            "certificate": f"certificate {number}",
+            "certificate_signing_request": fake_csr(number, 0),
+            "ca": "ca",
+            "chain": ["ca", f"certificate {number}"],
+        }
+        for number in range(NUMBER_OF_RECORDS)
+    ]
+
+    def build_records():
+        return [
+            ProviderCertificate.from_relation_data(
+                relation_id=1, application_name="requirer", certificate=certificate
+            )
+            for certificate in certificates
+        ]
+
+    def build_dicts():
+        return [
+            {
+                "relation_id": 1,
+                "application_name": "requirer",
+                "certificate_signing_request": certificate["certificate_signing_request"],
+                "certificate": certificate["certificate"],
+                "ca": certificate["ca"],
+                "chain": list(certificate["chain"]),
+                "revoked": False,
+            }
+            for certificate in certificates
+        ]
+
+    benchmark(build_records)
+    records_memory = allocated_memory(build_records)
+    dicts_memory = allocated_memory(build_dicts)
+    benchmark.extra_info["records_memory"] = records_memory
+    benchmark.extra_info["dicts_memory"] = dicts_memory
+
+    assert records_memory < dicts_memory
@@ -8,8 +8,9 @@ from typing import Optional
 from charms.tls_certificates_interface.v2.tls_certificates import (
     CertificateCreationRequestEvent,
     TLSCertificatesProvidesV2,
+    generate_intermediate_ca,
 )
-from ops.charm import CharmBase, InstallEvent
+from ops.charm import CharmBase, EventBase, InstallEvent
 from ops.main import main
 from ops.model import ActiveStatus, BlockedStatus, WaitingStatus
 from self_signed_certificates import (
@@ -19,7 +20,9 @@ from self_signed_certificates import (
 )
 
 CERTIFICATE_VALIDITY = 0.005
+MAX_SIGNATURES_PER_HOOK = 50
 CA_COMMON_NAME = "pizza"
+INTERMEDIATE_CA_COMMON_NAME = "pizza intermediate"
 
 logger = logging.getLogger(__name__)
 
@@ -27,8 +30,14 @@ logger = logging.getLogger(__name__)
 class DummyTLSCertificatesProviderCharm(CharmBase):
     def __init__(self, *args):
         super().__init__(*args)
-        self.certificates = TLSCertificatesProvidesV2(self, "certificates")
+        self.certificates = TLSCertificatesProvidesV2(
+            self, "certificates", peer_relation_name="replicas"
+        )
         self.framework.observe(self.on.install, self._on_install)
+        self.framework.observe(self.on.update_status, self._process_certificate_requests)
+        self.framework.observe(
+            self.on.replicas_relation_changed, self._process_certificate_requests
+        )
         self.framework.observe(
             self.certificates.on.certificate_creation_request,
             self._on_certificate_creation_request,
@@ -42,6 +51,14 @@ class DummyTLSCertificatesProviderCharm(CharmBase):
     def _self_signed_ca_private_key(self) -> Optional[str]:
         return self._get_value_from_relation_data("self_signed_ca_private_key")
 
+    @property
+    def _intermediate_ca_certificate(self) -> Optional[str]:
+        return self._get_value_from_unit_relation_data("intermediate_ca_certificate")
+
+    @property
+    def _intermediate_ca_private_key(self) -> Optional[str]:
+        return self._get_value_from_unit_relation_data("intermediate_ca_private_key")
+
     @property
     def _self_signed_root_certificates_are_stored(self) -> bool:
         """Returns whether self-signed certificates are stored in relation data.
@@ -86,6 +103,38 @@ class DummyTLSCertificatesProviderCharm(CharmBase):
             raise RuntimeError("No peer relation")
         peer_relation.data[self.app].update({key: value.strip()})
 
+    def _store_item_in_unit_peer_relation_data(self, key: str, value: str) -> None:
+        """Stores key/value in this unit's peer relation data.
+
+        Args:
+            key (str): Relation data key
+            value (str): Relation data value
+
+        Returns:
+            None
+        """
+        peer_relation = self.model.get_relation("replicas")
+        if not peer_relation:
+            raise RuntimeError("No peer relation")
+        peer_relation.data[self.unit].update({key: value.strip()})
+
+    def _get_value_from_unit_relation_data(self, key: str) -> Optional[str]:
+        """Returns value from this unit's peer relation data.
+
+        Args:
+            key (str): Relation data key
+
+        Returns:
+            str: Relation data value
+        """
+        replicas = self.model.get_relation("replicas")
+        if not replicas:
+            return None
+        relation_data = replicas.data[self.unit].get(key, None)
+        if relation_data:
+            return relation_data.strip()
+        return None
+
     def _relation_created(self, relation_name: str) -> bool:
         """Returns whether given relation was created.
 
@@ -126,13 +175,13 @@ class DummyTLSCertificatesProviderCharm(CharmBase):
         Returns:
             str: Certificate
         """
-        if not self._self_signed_ca_private_key:
-            raise ValueError("CA Private key not stored")
-        if not self._self_signed_ca_certificate:
-            raise ValueError("CA Certificate not stored")
+        if not self._intermediate_ca_private_key:
+            raise ValueError("Intermediate CA Private key not stored")
+        if not self._intermediate_ca_certificate:
+            raise ValueError("Intermediate CA Certificate not stored")
         certificate = generate_certificate(
-            ca=self._self_signed_ca_certificate.encode(),
-            ca_key=self._self_signed_ca_private_key.encode(),
+            ca=self._intermediate_ca_certificate.encode(),
+            ca_key=self._intermediate_ca_private_key.encode(),
             csr=certificate_signing_request.encode(),
             validity=CERTIFICATE_VALIDITY,
         )
@@ -151,6 +200,31 @@ class DummyTLSCertificatesProviderCharm(CharmBase):
         self._store_self_signed_ca_private_key(private_key.decode())
         logger.info("Root certificates generated and stored.")
 
+    def _generate_intermediate_certificates(self) -> None:
+        """Generates this unit's intermediate CA, signed by the root certificate.
+
+        Returns:
+            None
+        """
+        if not self._self_signed_ca_private_key:
+            raise ValueError("CA Private key not stored")
+        if not self._self_signed_ca_certificate:
+            raise ValueError("CA Certificate not stored")
+        private_key = generate_private_key()
+        intermediate_ca_certificate = generate_intermediate_ca(
+            private_key=private_key,
+            subject=f"{INTERMEDIATE_CA_COMMON_NAME} {self.unit.name}",
+            ca=self._self_signed_ca_certificate.encode(),
+            ca_key=self._self_signed_ca_private_key.encode(),
+        )
+        self._store_item_in_unit_peer_relation_data(
+            key="intermediate_ca_certificate", value=intermediate_ca_certificate.decode()
+        )
+        self._store_item_in_unit_peer_relation_data(
+            key="intermediate_ca_private_key", value=private_key.decode()
+        )
+        logger.info("Intermediate certificates generated and stored.")
+
     def _on_install(self, event: InstallEvent) -> None:
         """Triggered on InstallEvent.
 
@@ -170,27 +244,62 @@ class DummyTLSCertificatesProviderCharm(CharmBase):
 
     def _on_certificate_creation_request(self, event: CertificateCreationRequestEvent) -> None:
         logger.info("Received Certificate Creation Request")
-        if not self.unit.is_leader():
+        self.certificates.queue_certificate_creation_request(
+            certificate_signing_request=event.certificate_signing_request,
+            relation_id=event.relation_id,
+        )
+        self._process_certificate_requests(event)
+
+    def _process_certificate_requests(self, event: EventBase) -> None:
+        """Signs the queued certificate creation requests.
+
+        Requests stay queued until the root certificates are available.
+
+        Args:
+            event (EventBase): Juju event.
+
+        Returns:
+            None
+        """
+        if not self.certificates.get_pending_certificate_creation_requests():
             return
         replicas_relation = self.model.get_relation("replicas")
         if not replicas_relation:
             self.unit.status = WaitingStatus("Waiting for peer relation to be created")
-            event.defer()
             return
         if not self._self_signed_root_certificates_are_stored:
             self.unit.status = WaitingStatus("Root Certificates are not yet set")
-            event.defer()
             return
-        certificate = self._generate_self_signed_certificates(event.certificate_signing_request)
-        ca_chain = [self._self_signed_ca_certificate, certificate]
+        if not self._intermediate_ca_certificate:
+            self._generate_intermediate_certificates()
+        self.certificates.process_certificate_creation_requests(
+            handler=self._issue_certificate, max_requests=MAX_SIGNATURES_PER_HOOK
+        )
+        self.unit.status = ActiveStatus()
+
+    def _issue_certificate(self, certificate_signing_request: str, relation_id: int) -> None:
+        """Signs a CSR and sets the certificate in the relation data.
+
+        Args:
+            certificate_signing_request (str): Certificate signing request
+            relation_id (int): Relation ID
+
+        Returns:
+            None
+        """
+        certificate = self._generate_self_signed_certificates(certificate_signing_request)
+        ca_chain = [
+            self._self_signed_ca_certificate,
+            self._intermediate_ca_certificate,
+            certificate,
+        ]
         self.certificates.set_relation_certificate(
-            certificate_signing_request=event.certificate_signing_request,
+            certificate_signing_request=certificate_signing_request,
             certificate=certificate,
             ca=self._self_signed_ca_certificate,
             chain=ca_chain,
-            relation_id=event.relation_id,
+            relation_id=relation_id,
         )
-        self.unit.status = ActiveStatus()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,457 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+"""Large-fleet scale simulator of the v2 tls-certificates relation.
+
+A provider charm and N requirer units, each with its own ops Harness, are wired together by
+relaying the relation databags between them the way Juju would: every databag change triggers
+one relation-changed hook on the other side, and changes made before a unit runs its hook are
+coalesced into a single hook. The simulator drives scripted scenarios and reports, for each of
+them, the number of hooks, their latency, the events emitted by the library and the databag
+sizes.
+
+Scenarios:
+    relate: The provider is related to the requirer units, each unit requests a certificate.
+    scale-out: Units are added to the requirer application.
+    mass-renewal: All requirer units renew their certificate at once.
+    ca-rotation: The provider re-issues every certificate with a new CA in batches.
+    scale-in: Units are removed from the requirer application.
+
+Run with `tox -e simulation -- --units 100` or
+`python -m tests.simulation.v2.scale_simulator --units 100`.
+"""
+
+import argparse
+import inspect
+import json
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from ops import testing
+from ops.framework import EventBase, EventSource
+
+from lib.charms.tls_certificates_interface.v2.tls_certificates import (
+    CertificateCreationRequestEvent,
+    CertificatesProviderCharmEvents,
+    CertificatesRequirerCharmEvents,
+    generate_ca,
+    generate_certificate,
+    generate_csr,
+    generate_private_key,
+)
+from tests.unit.charms.tls_certificates_interface.v2.dummy_provider_charm.src.charm import (
+    DummyTLSCertificatesProviderCharm,
+)
+from tests.unit.charms.tls_certificates_interface.v2.dummy_requirer_charm.src.charm import (
+    DummyTLSCertificatesRequirerCharm,
+)
+
+RELATION_NAME = "certificates"
+PROVIDER_APP_NAME = "provider"
+REQUIRER_APP_NAME = "requirer"
+SCENARIOS = ["relate", "scale-out", "mass-renewal", "ca-rotation", "scale-in"]
+
+
+def _read_metadata(charm_class: type) -> str:
+    return (Path(inspect.getfile(charm_class)).parents[1] / "metadata.yaml").read_text()
+
+
+def _observe_library_events(charm: Any, events_class: type) -> None:
+    for event_name, event_source in vars(events_class).items():
+        if isinstance(event_source, EventSource):
+            charm.framework.observe(
+                getattr(charm.certificates.on, event_name), charm._on_library_event
+            )
+
+
+class SimulationProviderCharm(DummyTLSCertificatesProviderCharm):
+    """Provider signing every requested certificate with the CA set by the simulator."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.ca = b""
+        self.ca_private_key = b""
+        self.events: Counter = Counter()
+        _observe_library_events(self, CertificatesProviderCharmEvents)
+
+    def _on_library_event(self, event: EventBase) -> None:
+        self.events[event.handle.kind] += 1
+
+    def _on_certificate_creation_request(self, event: CertificateCreationRequestEvent) -> None:
+        certificate = generate_certificate(
+            csr=event.certificate_signing_request.encode(),
+            ca=self.ca,
+            ca_key=self.ca_private_key,
+        ).decode()
+        self.certificates.set_relation_certificate(
+            certificate=certificate,
+            certificate_signing_request=event.certificate_signing_request,
+            ca=self.ca.decode(),
+            chain=[self.ca.decode(), certificate],
+            relation_id=event.relation_id,
+        )
+
+
+class SimulationRequirerCharm(DummyTLSCertificatesRequirerCharm):
+    """Requirer counting the events emitted by the library."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.events: Counter = Counter()
+        _observe_library_events(self, CertificatesRequirerCharmEvents)
+
+    def _on_library_event(self, event: EventBase) -> None:
+        self.events[event.handle.kind] += 1
+
+
+class RequirerUnit:
+    """A simulated requirer unit and the Harness running its charm."""
+
+    def __init__(self, name: str, events: Counter):
+        self.name = name
+        self.harness = testing.Harness(
+            SimulationRequirerCharm, meta=_read_metadata(DummyTLSCertificatesRequirerCharm)
+        )
+        self.harness.begin()
+        self.harness.charm.events = events
+        self.relation_id: Optional[int] = None
+        self.csr = b""
+
+    @property
+    def databag(self) -> Dict[str, str]:
+        """Returns this unit's databag."""
+        assert self.relation_id is not None
+        return dict(self.harness.get_relation_data(self.relation_id, self.harness.charm.unit))
+
+    @property
+    def provider_databag(self) -> Dict[str, str]:
+        """Returns the provider application databag as seen by this unit."""
+        assert self.relation_id is not None
+        return dict(self.harness.get_relation_data(self.relation_id, PROVIDER_APP_NAME))
+
+
+class Simulation:
+    """Relays the relation data between the provider and the requirer units."""
+
+    def __init__(self, ca_rotation_batch_size: int = 10):
+        self.ca_rotation_batch_size = ca_rotation_batch_size
+        self.events: Counter = Counter()
+        self.hooks: Dict[str, List[float]] = {}
+        self.requirer_units: Dict[str, RequirerUnit] = {}
+        self._next_unit_number = 0
+        self._private_key = generate_private_key()
+        self.provider = testing.Harness(
+            SimulationProviderCharm, meta=_read_metadata(DummyTLSCertificatesProviderCharm)
+        )
+        self.provider.set_leader(is_leader=True)
+        self.provider.begin()
+        self.provider.charm.events = self.events
+        self._set_ca("simulation-ca")
+        self.relation_id = self.provider.add_relation(RELATION_NAME, REQUIRER_APP_NAME)
+
+    def _set_ca(self, subject: str) -> None:
+        self.provider.charm.ca_private_key = generate_private_key()
+        self.provider.charm.ca = generate_ca(
+            private_key=self.provider.charm.ca_private_key, subject=subject
+        )
+
+    def _run_hook(self, hook_name: str, function: Callable, *args, **kwargs) -> None:
+        start = time.perf_counter()
+        function(*args, **kwargs)
+        self.hooks.setdefault(hook_name, []).append(time.perf_counter() - start)
+
+    def _generate_csr(self, unit: RequirerUnit) -> bytes:
+        return generate_csr(
+            private_key=self._private_key, subject=f"{unit.name.replace('/', '-')}.simulation"
+        )
+
+    def _request_certificate(self, unit: RequirerUnit) -> None:
+        unit.relation_id = unit.harness.add_relation(RELATION_NAME, PROVIDER_APP_NAME)
+        unit.harness.add_relation_unit(unit.relation_id, f"{PROVIDER_APP_NAME}/0")
+        unit.csr = self._generate_csr(unit)
+        unit.harness.charm.certificates.request_certificate_creation(
+            certificate_signing_request=unit.csr
+        )
+
+    def _renew_certificate(self, unit: RequirerUnit) -> None:
+        new_csr = self._generate_csr(unit)
+        unit.harness.charm.certificates.request_certificate_renewal(
+            old_certificate_signing_request=unit.csr,
+            new_certificate_signing_request=new_csr,
+        )
+        unit.csr = new_csr
+
+    def _relay(
+        self, harness: testing.Harness, relation_id: int, app_or_unit: str, source: dict
+    ) -> None:
+        current = dict(harness.get_relation_data(relation_id, app_or_unit))
+        update = {key: "" for key in current if key not in source}
+        update.update({key: value for key, value in source.items() if current.get(key) != value})
+        harness.update_relation_data(relation_id, app_or_unit, update)
+
+    def settle(self) -> None:
+        """Relays the relation data until every unit has seen the latest data.
+
+        Each round runs one relation-changed hook on the provider for every requirer unit whose
+        databag changed, then one relation-changed hook on every requirer unit that has not
+        seen the latest provider application databag.
+        """
+        while True:
+            changed = False
+            for unit in self.requirer_units.values():
+                databag = unit.databag
+                if databag != dict(self.provider.get_relation_data(self.relation_id, unit.name)):
+                    changed = True
+                    self._run_hook(
+                        "provider: certificates-relation-changed",
+                        self._relay,
+                        self.provider,
+                        self.relation_id,
+                        unit.name,
+                        databag,
+                    )
+            provider_databag = dict(
+                self.provider.get_relation_data(self.relation_id, self.provider.charm.app.name)
+            )
+            for unit in self.requirer_units.values():
+                if unit.provider_databag != provider_databag:
+                    changed = True
+                    assert unit.relation_id is not None
+                    self._run_hook(
+                        "requirer: certificates-relation-changed",
+                        self._relay,
+                        unit.harness,
+                        unit.relation_id,
+                        PROVIDER_APP_NAME,
+                        provider_databag,
+                    )
+            if not changed:
+                return
+
+    def add_units(self, count: int) -> None:
+        """Adds requirer units, each requesting a certificate when joining the relation.
+
+        Args:
+            count (int): Number of units to add
+        """
+        for _ in range(count):
+            unit = RequirerUnit(f"{REQUIRER_APP_NAME}/{self._next_unit_number}", self.events)
+            self._next_unit_number += 1
+            self.requirer_units[unit.name] = unit
+            self._run_hook(
+                "provider: certificates-relation-joined",
+                self.provider.add_relation_unit,
+                self.relation_id,
+                unit.name,
+            )
+            self._run_hook(
+                "requirer: certificates-relation-joined", self._request_certificate, unit
+            )
+        self.settle()
+
+    def remove_units(self, count: int) -> None:
+        """Removes the most recently added requirer units.
+
+        Juju runs a relation-changed hook on the provider after the units departed, it is
+        emitted for the first remaining unit.
+
+        Args:
+            count (int): Number of units to remove
+        """
+        for unit_name in list(self.requirer_units)[-count:]:
+            unit = self.requirer_units.pop(unit_name)
+            self._run_hook(
+                "requirer: certificates-relation-broken",
+                unit.harness.remove_relation,
+                unit.relation_id,
+            )
+            self._run_hook(
+                "provider: certificates-relation-departed",
+                self.provider.remove_relation_unit,
+                self.relation_id,
+                unit_name,
+            )
+            unit.harness.cleanup()
+        if self.requirer_units:
+            relation = self.provider.model.get_relation(RELATION_NAME, self.relation_id)
+            assert relation is not None
+            self._run_hook(
+                "provider: certificates-relation-changed",
+                self.provider.charm.on[RELATION_NAME].relation_changed.emit,
+                relation,
+                relation.app,
+                self.provider.model.get_unit(next(iter(self.requirer_units))),
+            )
+        self.settle()
+
+    def renew_certificates(self) -> None:
+        """Renews the certificate of every requirer unit in the same update-status window."""
+        for unit in self.requirer_units.values():
+            self._run_hook("requirer: update-status", self._renew_certificate, unit)
+        self.settle()
+
+    def rotate_ca(self) -> None:
+        """Re-issues all certificates with a new CA, advancing the rotation on update-status.
+
+        Raises:
+            RuntimeError: If the rotation does not complete
+        """
+        self._set_ca("simulation-ca-rotated")
+        self._run_hook(
+            "provider: config-changed",
+            self.provider.charm.certificates.start_ca_rotation,
+            ca=self.provider.charm.ca.decode(),
+            batch_size=self.ca_rotation_batch_size,
+        )
+        self.settle()
+        max_update_status = len(self.requirer_units) // self.ca_rotation_batch_size + 2
+        for _ in range(max_update_status):
+            if not self.provider.charm.certificates.get_ca_rotation_status()["in_progress"]:
+                return
+            self._run_hook("provider: update-status", self.provider.charm.on.update_status.emit)
+            self.settle()
+        if self.provider.charm.certificates.get_ca_rotation_status()["in_progress"]:
+            raise RuntimeError("CA rotation did not complete")
+
+    def get_databag_sizes(self) -> Dict[str, int]:
+        """Returns the size in bytes of the provider databag and of the largest unit databag."""
+        sizes = self.provider.charm.certificates.get_relation_data_sizes()[self.relation_id]
+        return {
+            "provider_application": sizes["total"],
+            "requirer_unit_max": max(sizes["requirer_units"].values(), default=0),
+        }
+
+    def run_scenario(self, name: str, function: Callable, *args) -> Dict[str, Any]:
+        """Runs a scenario and returns its report.
+
+        Args:
+            name (str): Scenario name
+            function (Callable): Scenario
+            *args: Scenario arguments
+
+        Returns:
+            dict: Duration, hooks (count, mean and max latency per hook), emitted events and
+                databag sizes of the scenario.
+        """
+        self.hooks = {}
+        self.events.clear()
+        start = time.perf_counter()
+        function(*args)
+        return {
+            "scenario": name,
+            "units": len(self.requirer_units),
+            "duration": time.perf_counter() - start,
+            "hooks": {
+                hook_name: {
+                    "count": len(latencies),
+                    "mean": sum(latencies) / len(latencies),
+                    "max": max(latencies),
+                }
+                for hook_name, latencies in sorted(self.hooks.items())
+            },
+            "events": dict(sorted(self.events.items())),
+            "databag_sizes": self.get_databag_sizes(),
+        }
+
+    def cleanup(self) -> None:
+        """Cleans up the provider and requirer harnesses."""
+        for unit in self.requirer_units.values():
+            unit.harness.cleanup()
+        self.provider.cleanup()
+
+
+def simulate(
+    units: int,
+    scale_out: int,
+    scale_in: int,
+    ca_rotation_batch_size: int = 10,
+    scenarios: Optional[List[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Runs the scenarios in order and returns their reports.
+
+    Args:
+        units (int): Number of requirer units related initially
+        scale_out (int): Number of units added by the scale-out scenario
+        scale_in (int): Number of units removed by the scale-in scenario
+        ca_rotation_batch_size (int): Number of certificates re-issued per hook during the
+            CA rotation
+        scenarios (list): Scenarios to run after relating the units, all by default
+
+    Returns:
+        list: Scenario reports
+    """
+    simulation = Simulation(ca_rotation_batch_size=ca_rotation_batch_size)
+    scenario_functions: Dict[str, Callable[[], None]] = {
+        "relate": lambda: simulation.add_units(units),
+        "scale-out": lambda: simulation.add_units(scale_out),
+        "mass-renewal": simulation.renew_certificates,
+        "ca-rotation": simulation.rotate_ca,
+        "scale-in": lambda: simulation.remove_units(scale_in),
+    }
+    selected = scenarios or SCENARIOS
+    try:
+        return [
+            simulation.run_scenario(name, scenario_functions[name])
+            for name in SCENARIOS
+            if name == "relate" or name in selected
+        ]
+    finally:
+        simulation.cleanup()
+
+
+def format_report(reports: List[Dict[str, Any]]) -> str:
+    """Formats scenario reports as text tables."""
+    lines = []
+    for report in reports:
+        lines.append(
+            f"== {report['scenario']} ({report['units']} units, {report['duration']:.2f}s) =="
+        )
+        lines.append(f"{'hook':<45}{'count':>8}{'mean (ms)':>12}{'max (ms)':>12}")
+        for hook_name, hook in report["hooks"].items():
+            lines.append(
+                f"{hook_name:<45}{hook['count']:>8}"
+                f"{hook['mean'] * 1000:>12.2f}{hook['max'] * 1000:>12.2f}"
+            )
+        lines.append(
+            "events: " + ", ".join(f"{name}={count}" for name, count in report["events"].items())
+        )
+        lines.append(
+            "databag sizes: "
+            + ", ".join(f"{name}={size}B" for name, size in report["databag_sizes"].items())
+        )
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Parses the command line and prints the reports."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--units", type=int, default=10, help="requirer units to relate")
+    parser.add_argument("--scale-out", type=int, default=5, help="units added on scale-out")
+    parser.add_argument("--scale-in", type=int, default=5, help="units removed on scale-in")
+    parser.add_argument(
+        "--ca-rotation-batch-size", type=int, default=10, help="certificates re-issued per hook"
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=SCENARIOS,
+        dest="scenarios",
+        help="scenario to run after relating the units (repeatable, default: all)",
+    )
+    parser.add_argument("--json", action="store_true", help="print the reports as JSON")
+    args = parser.parse_args(argv)
+    reports = simulate(
+        units=args.units,
+        scale_out=args.scale_out,
+        scale_in=args.scale_in,
+        ca_rotation_batch_size=args.ca_rotation_batch_size,
+        scenarios=args.scenarios,
+    )
+    print(json.dumps(reports, indent=2) if args.json else format_report(reports))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+from tests.simulation.v2.scale_simulator import SCENARIOS, format_report, simulate
+
+
+def test_given_small_fleet_when_simulate_then_all_scenarios_are_reported():
+    reports = simulate(units=3, scale_out=2, scale_in=2, ca_rotation_batch_size=2)
+
+    assert [report["scenario"] for report in reports] == SCENARIOS
+    assert [report["units"] for report in reports] == [3, 5, 5, 5, 3]
+    assert "== ca-rotation (5 units" in format_report(reports)
+
+
+def test_given_small_fleet_when_relate_then_each_unit_gets_a_certificate():
+    relate = simulate(units=3, scale_out=0, scale_in=0, scenarios=["relate"])[0]
+
+    assert relate["events"]["certificate_creation_request"] == 3
+    assert relate["events"]["certificate_available"] == 3
+    assert relate["hooks"]["provider: certificates-relation-changed"]["count"] == 3
+    assert relate["databag_sizes"]["provider_application"] > 0
+
+
+def test_given_small_fleet_when_ca_rotation_then_all_certificates_are_reissued():
+    ca_rotation = simulate(
+        units=5, scale_out=0, scale_in=0, ca_rotation_batch_size=2, scenarios=["ca-rotation"]
+    )[1]
+
+    assert ca_rotation["events"]["certificate_creation_request"] == 5
+    assert ca_rotation["hooks"]["provider: update-status"]["count"] >= 2
+
+
+def test_given_small_fleet_when_scale_in_then_certificates_of_removed_units_are_revoked():
+    scale_in = simulate(units=3, scale_out=0, scale_in=2, scenarios=["scale-in"])[1]
+
+    assert scale_in["units"] == 1
+    assert scale_in["events"]["certificate_revocation_request"] == 2
+    assert scale_in["events"]["all_certificates_invalidated"] == 2
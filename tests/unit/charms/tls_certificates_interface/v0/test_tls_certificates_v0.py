@@ -12,6 +12,8 @@ from charms.tls_certificates_interface.v0.tls_certificates import (
     TLSCertificatesProvides,
     TLSCertificatesRequires,
 )
+from ops import testing
+from ops.charm import CharmBase
 
 PROVIDER_UNIT_NAME = "whatever provider unit name"
 REQUIRER_UNIT_NAME = "whatever requirer unit name"
@@ -227,52 +229,131 @@ class TestTLSCertificatesProvides(unittest.TestCase):
 
         self.assertEqual(certificate["ca"], relation_data["ca"])
 
+    @patch(
+        f"{CHARM_LIB_PATH}.CertificatesProviderCharmEvents.certificate_requests",
+        new_callable=PropertyMock,
+    )
+    @patch(
+        f"{CHARM_LIB_PATH}.CertificatesProviderCharmEvents.certificate_request",
+        new_callable=PropertyMock,
+    )
+    def test_given_batched_requests_and_cert_requests_in_relation_data_when_relation_changed_then_single_certificate_requests_event_is_emitted(  # noqa: E501
+        self, patch_certificate_request, patch_certificate_requests
+    ):
+        self.tls_relation_provides.batch_certificate_requests = True
+        event = Mock()
+        event.relation.data = {
+            self.requirer_unit: {
+                "cert_requests": json.dumps(
+                    [{"common_name": "server"}, {"common_name": "server"}]
+                ),
+                "client_cert_requests": json.dumps(
+                    [{"common_name": "client", "sans": ["client.com"]}]
+                ),
+            },
+            self.provider_unit: {},
+        }
+        event.relation.id = 1
+        event.unit = self.requirer_unit
 
-class TestTLSCertificatesRequires(unittest.TestCase):
-    def setUp(self):
-        class CharmOnMock:
-            certificates = Mock()
-            certificate_request = Mock()
+        self.tls_relation_provides._on_relation_changed(event)
 
-            def __getitem__(self, key):
-                return getattr(self, key)
+        patch_certificate_request.assert_not_called()
+        patch_certificate_requests.assert_has_calls(
+            [
+                call().emit(
+                    certificate_requests=[
+                        {"common_name": "server", "sans": None, "cert_type": "server"},
+                        {"common_name": "client", "sans": ["client.com"], "cert_type": "client"},
+                    ],
+                    relation_id=1,
+                )
+            ]
+        )
 
-        charm = Mock()
-        charm.on = CharmOnMock()
-        relationship_name = "certificates"
-        self.tls_certificate_requires = TLSCertificatesRequires(
-            charm=charm, relationship_name=relationship_name
+    def test_given_certificates_when_set_relation_certificates_then_each_changed_key_is_written_once(  # noqa: E501
+        self,
+    ):
+        class RecordingDict(dict):
+            writes: list = []
+
+            def __setitem__(self, key, value):
+                self.writes.append(key)
+                super().__setitem__(key, value)
+
+        unchanged_certificate = json.dumps({"key": "first key", "cert": "first cert"})
+
+        class Relation:
+            data: dict = {
+                self.provider_unit: RecordingDict(
+                    {
+                        "ca": "whatever ca",
+                        "chain": "whatever ca",
+                        "first.com": unchanged_certificate,
+                    }
+                ),
+                self.requirer_unit: dict(),
+            }
+
+        relation = Relation()
+        self.charm.framework.model.get_relation.return_value = relation
+        certificates = [
+            Cert(common_name="first.com", cert="first cert", key="first key", ca="whatever ca"),
+            Cert(common_name="second.com", cert="second cert", key="second key", ca="whatever ca"),
+            Cert(common_name="second.com", cert="second cert", key="second key", ca="whatever ca"),
+        ]
+
+        self.tls_relation_provides.set_relation_certificates(
+            certificates=certificates, relation_id=1
         )
-        self.charm = charm
+
+        relation_data = _load_relation_data(relation.data[self.provider_unit])
+        self.assertEqual(RecordingDict.writes, ["second.com"])
+        self.assertEqual(relation_data["second.com"], {"key": "second key", "cert": "second cert"})
+        self.charm.framework.model.get_relation.assert_called_once()
+
+
+class RequirerCharm(CharmBase):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.certificates = TLSCertificatesRequires(self, "certificates")
+
+
+REQUIRER_METADATA = """
+name: requirer
+requires:
+  certificates:
+    interface: tls-certificates
+"""
+
+
+class TestTLSCertificatesRequires(unittest.TestCase):
+    def setUp(self):
+        self.harness = testing.Harness(RequirerCharm, meta=REQUIRER_METADATA)
+        self.addCleanup(self.harness.cleanup)
+        self.harness.begin()
+        self.tls_certificate_requires = self.harness.charm.certificates
         self.provider_unit = LeaderUnitMock(name=PROVIDER_UNIT_NAME)
         self.requirer_unit = NonLeaderUnitMock(name=REQUIRER_UNIT_NAME)
-        self.charm.framework.model.unit = self.requirer_unit
 
     def test_given_client_when_request_certificate_then_client_cert_request_is_added_to_relation_data(  # noqa: E501
         self,
     ):
-        class Relation:
-            data: dict = {self.provider_unit: dict(), self.requirer_unit: dict()}
-
+        relation_id = self.harness.add_relation("certificates", "provider")
         common_name = "whatever common name"
-        relation = Relation()
-        self.charm.framework.model.get_relation.return_value = relation
 
         self.tls_certificate_requires.request_certificate(
             cert_type="client",
             common_name=common_name,
         )
 
-        self.assertIn("client_cert_requests", relation.data[self.requirer_unit])
-        client_cert_requests = json.loads(
-            relation.data[self.requirer_unit]["client_cert_requests"]
-        )
+        relation_data = self.harness.get_relation_data(relation_id, self.harness.charm.unit.name)
+        self.assertIn("client_cert_requests", relation_data)
+        client_cert_requests = json.loads(relation_data["client_cert_requests"])
         expected_client_cert_requests = [{"common_name": common_name, "sans": []}]
         self.assertEqual(expected_client_cert_requests, client_cert_requests)
 
     def test_given_no_relation_when_request_certificate_then_runtime_error_is_raised(self):
-        self.charm.framework.model.get_relation.return_value = None
-
         with pytest.raises(RuntimeError):
             self.tls_certificate_requires.request_certificate(
                 cert_type="client", common_name="whatever common name"
@@ -358,7 +439,7 @@ class TestTLSCertificatesRequires(unittest.TestCase):
             self.requirer_unit: {},
             self.provider_unit: relation_data,
         }
-        self.charm.framework.model.unit = LeaderUnitMock(name=PROVIDER_UNIT_NAME)
+        self.harness.set_leader(True)
 
         self.tls_certificate_requires._on_relation_changed(event)
 
@@ -368,3 +449,117 @@ class TestTLSCertificatesRequires(unittest.TestCase):
             )
         ]
         patch_emit.assert_has_calls(calls, any_order=True)
+
+    @patch(
+        f"{CHARM_LIB_PATH}.CertificatesRequirerCharmEvents.certificate_available",
+        new_callable=PropertyMock,
+    )
+    def test_given_unchanged_certificates_when_on_relation_changed_then_certificate_available_event_is_emitted_for_changed_certificates_only(  # noqa: E501
+        self, patch_emit
+    ):
+        ca = "whatever ca"
+        relation_data = {
+            "ca": ca,
+            "chain": ca,
+            "first.com": json.dumps({"cert": "first cert", "key": "first key"}),
+            "second.com": json.dumps({"cert": "second cert", "key": "second key"}),
+        }
+        event = Mock()
+        event.unit = self.provider_unit
+        event.relation.id = 1
+        event.relation.data = {self.requirer_unit: {}, self.provider_unit: relation_data}
+        self.tls_certificate_requires._on_relation_changed(event)
+        patch_emit.reset_mock()
+        relation_data["second.com"] = json.dumps({"cert": "new second cert", "key": "second key"})
+
+        self.tls_certificate_requires._on_relation_changed(event)
+        self.tls_certificate_requires._on_relation_changed(event)
+
+        patch_emit.assert_has_calls(
+            [
+                call().emit(
+                    certificate_data=Cert(
+                        common_name="second.com", cert="new second cert", key="second key", ca=ca
+                    )
+                )
+            ]
+        )
+        self.assertEqual(patch_emit.return_value.emit.call_count, 1)
+
+    def test_given_relation_data_when_parse_certificates_from_relation_data_then_relation_data_is_not_modified(  # noqa: E501
+        self,
+    ):
+        relation_data = {
+            "ca": "whatever ca",
+            "chain": "whatever ca",
+            "whatever.com": {"cert": "whatever cert", "key": "whatever key"},
+            "unit_name": "whatever unit name",
+        }
+        expected_relation_data = json.loads(json.dumps(relation_data))
+
+        certificates = TLSCertificatesRequires._parse_certificates_from_relation_data(
+            relation_data
+        )
+
+        self.assertEqual(relation_data, expected_relation_data)
+        self.assertEqual(
+            certificates,
+            [
+                Cert(
+                    common_name="whatever.com",
+                    cert="whatever cert",
+                    key="whatever key",
+                    ca="whatever ca",
+                )
+            ],
+        )
+
+    def _add_provider_unit_with_certificate(self, relation_id: int, unit_name: str) -> None:
+        self.harness.add_relation_unit(relation_id, unit_name)
+        self.harness.update_relation_data(
+            relation_id,
+            unit_name,
+            {
+                "ca": "whatever ca",
+                "chain": "whatever ca",
+                "whatever.com": json.dumps({"cert": "whatever cert", "key": "whatever key"}),
+            },
+        )
+
+    @patch(
+        f"{CHARM_LIB_PATH}.CertificatesRequirerCharmEvents.certificate_available",
+        new_callable=PropertyMock,
+    )
+    def test_given_certificates_received_when_relation_broken_then_certificates_are_forgotten(
+        self, patch_emit
+    ):
+        relation_id = self.harness.add_relation("certificates", "provider")
+        self._add_provider_unit_with_certificate(relation_id, "provider/0")
+        self.assertEqual(patch_emit.return_value.emit.call_count, 1)
+
+        self.harness.remove_relation(relation_id)
+
+        self.assertEqual(self.tls_certificate_requires._stored.certificate_digests, {})
+        new_relation_id = self.harness.add_relation("certificates", "provider")
+        self._add_provider_unit_with_certificate(new_relation_id, "provider/0")
+        self.assertEqual(patch_emit.return_value.emit.call_count, 2)
+
+    @patch(
+        f"{CHARM_LIB_PATH}.CertificatesRequirerCharmEvents.certificate_available",
+        new_callable=PropertyMock,
+    )
+    def test_given_certificates_received_from_several_units_when_relation_departed_then_only_departing_unit_certificates_are_forgotten(  # noqa: E501
+        self, patch_emit
+    ):
+        relation_id = self.harness.add_relation("certificates", "provider")
+        self._add_provider_unit_with_certificate(relation_id, "provider/0")
+        self._add_provider_unit_with_certificate(relation_id, "provider/1")
+
+        self.harness.remove_relation_unit(relation_id, "provider/0")
+
+        self.assertEqual(
+            list(self.tls_certificate_requires._stored.certificate_digests.keys()),
+            [f"{relation_id}/provider/1"],
+        )
+        self._add_provider_unit_with_certificate(relation_id, "provider/0")
+        self.assertEqual(patch_emit.return_value.emit.call_count, 3)
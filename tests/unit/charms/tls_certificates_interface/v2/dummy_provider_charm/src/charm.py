@@ -31,5 +31,21 @@ class DummyTLSCertificatesProviderCharm(CharmBase):
         pass
 
 
+class DummyTLSCertificatesDistributedProviderCharm(DummyTLSCertificatesProviderCharm):
+    def __init__(self, *args):
+        super(DummyTLSCertificatesProviderCharm, self).__init__(*args)
+        self.certificates = TLSCertificatesProvidesV2(
+            self, "certificates", peer_relation_name="replicas"
+        )
+        self.framework.observe(
+            self.certificates.on.certificate_creation_request,
+            self._on_certificate_creation_request,
+        )
+        self.framework.observe(
+            self.certificates.on.certificate_revocation_request,
+            self._on_certificate_revocation_request,
+        )
+
+
 if __name__ == "__main__":
     main(DummyTLSCertificatesProviderCharm)
@@ -2,19 +2,43 @@
 # Copyright 2021 Canonical Ltd.
 # See LICENSE file for licensing details.
 
+import hashlib
+import json
+import os
+import subprocess
+import sys
 import uuid
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 from charms.tls_certificates_interface.v2.tls_certificates import (
+    CLIENT_CERTIFICATE_PROFILE,
+    SERVER_CERTIFICATE_PROFILE,
+    CertificateProfile,
+    ProviderCertificate,
+    RequirerCSR,
+    TrustBundle,
+    clear_x509_cache,
+    configure_x509_cache,
     csr_matches_certificate,
+    disable_instrumentation,
+    enable_instrumentation,
     generate_ca,
     generate_certificate,
+    generate_crl,
     generate_csr,
+    generate_intermediate_ca,
     generate_pfx_package,
     generate_private_key,
+    get_instrumentation_snapshot,
+    get_x509_cache_info,
+    reset_instrumentation,
+    write_certificate_files,
 )
 from cryptography import x509
-from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
 from cryptography.hazmat.primitives.serialization import load_pem_private_key, pkcs12
 
@@ -31,6 +55,8 @@ from tests.unit.charms.tls_certificates_interface.v2.certificates import (
     generate_private_key as generate_private_key_helper,
 )
 
+LIB_PATH = Path(__file__).parents[5] / "lib"
+
 
 def validate_induced_data_from_pfx_is_equal_to_initial_data(
     pfx_file: bytes,
@@ -483,3 +509,440 @@ def test_given_csr_public_key_not_matching_certificate_public_key_when_csr_match
         ca_key=ca_key,
     )
     assert csr_matches_certificate(csr_key_2.decode(), certificate.decode()) is False
+
+
+def test_given_same_certificate_and_csr_when_csr_matches_certificate_called_twice_then_objects_are_parsed_once():  # noqa: E501
+    clear_x509_cache()
+    private_key = generate_private_key_helper()
+    csr = generate_csr_helper(private_key=private_key, subject="whatever")
+    ca_key = generate_private_key_helper()
+    ca = generate_ca_helper(private_key=ca_key, subject="whatever")
+    certificate = generate_certificate_helper(csr=csr, ca=ca, ca_key=ca_key)
+
+    csr_matches_certificate(csr.decode(), certificate.decode())
+    csr_matches_certificate(csr.decode(), certificate.decode())
+
+    cache_info = get_x509_cache_info()
+    assert cache_info["misses"] == 2
+    assert cache_info["hits"] == 2
+    assert cache_info["size"] == 2
+
+
+def test_given_cache_is_full_when_new_object_is_parsed_then_least_recently_used_object_is_evicted():  # noqa: E501
+    clear_x509_cache()
+    configure_x509_cache(maxsize=1)
+    try:
+        private_key = generate_private_key_helper()
+        csr_1 = generate_csr_helper(private_key=private_key, subject="subject 1")
+        csr_2 = generate_csr_helper(private_key=private_key, subject="subject 2")
+
+        csr_matches_certificate(csr_1.decode(), "invalid certificate")
+        csr_matches_certificate(csr_2.decode(), "invalid certificate")
+        csr_matches_certificate(csr_1.decode(), "invalid certificate")
+
+        cache_info = get_x509_cache_info()
+        assert cache_info["size"] == 1
+        assert cache_info["hits"] == 0
+    finally:
+        configure_x509_cache(maxsize=256)
+        clear_x509_cache()
+
+
+def test_given_cached_objects_when_clear_x509_cache_then_cache_is_emptied():
+    private_key = generate_private_key_helper()
+    csr = generate_csr_helper(private_key=private_key, subject="whatever")
+    csr_matches_certificate(csr.decode(), "invalid certificate")
+
+    clear_x509_cache()
+
+    assert get_x509_cache_info() == {"hits": 0, "misses": 0, "size": 0, "maxsize": 256}
+
+
+def test_given_server_profile_when_generate_certificate_then_profile_extensions_are_set():
+    ca_key = generate_private_key()
+    ca = generate_ca(private_key=ca_key, subject="ca")
+    private_key = generate_private_key()
+    csr = generate_csr(private_key=private_key, subject="server", sans_dns=["server.example"])
+
+    certificate = generate_certificate(
+        csr=csr, ca=ca, ca_key=ca_key, profile=SERVER_CERTIFICATE_PROFILE
+    )
+
+    certificate_object = x509.load_pem_x509_certificate(certificate)
+    ca_object = x509.load_pem_x509_certificate(ca)
+    extended_key_usage = certificate_object.extensions.get_extension_for_class(
+        x509.ExtendedKeyUsage
+    ).value
+    assert list(extended_key_usage) == [x509.oid.ExtendedKeyUsageOID.SERVER_AUTH]
+    key_usage = certificate_object.extensions.get_extension_for_class(x509.KeyUsage).value
+    assert key_usage.digital_signature is True
+    assert key_usage.key_cert_sign is False
+    basic_constraints = certificate_object.extensions.get_extension_for_class(
+        x509.BasicConstraints
+    ).value
+    assert basic_constraints.ca is False
+    authority_key_identifier = certificate_object.extensions.get_extension_for_class(
+        x509.AuthorityKeyIdentifier
+    ).value
+    ca_subject_key_identifier = ca_object.extensions.get_extension_for_class(
+        x509.SubjectKeyIdentifier
+    ).value
+    assert authority_key_identifier.key_identifier == ca_subject_key_identifier.digest
+    sans = certificate_object.extensions.get_extension_for_class(x509.SubjectAlternativeName)
+    assert sans.value.get_values_for_type(x509.DNSName) == ["server.example"]
+
+
+def test_given_profile_when_generate_certificate_then_csr_extensions_other_than_sans_are_not_copied():  # noqa: E501
+    ca_key = generate_private_key()
+    ca = generate_ca(private_key=ca_key, subject="ca")
+    private_key = generate_private_key()
+    csr = generate_csr(
+        private_key=private_key,
+        subject="client",
+        additional_critical_extensions=[x509.BasicConstraints(ca=True, path_length=None)],
+    )
+
+    certificate = generate_certificate(
+        csr=csr, ca=ca, ca_key=ca_key, profile=CLIENT_CERTIFICATE_PROFILE
+    )
+
+    certificate_object = x509.load_pem_x509_certificate(certificate)
+    basic_constraints = certificate_object.extensions.get_extension_for_class(
+        x509.BasicConstraints
+    ).value
+    assert basic_constraints.ca is False
+
+
+def test_given_profile_validity_when_generate_certificate_then_profile_validity_is_used():
+    profile = CertificateProfile(name="short", validity=10)
+    ca_key = generate_private_key()
+    ca = generate_ca(private_key=ca_key, subject="ca")
+    csr = generate_csr(private_key=generate_private_key(), subject="whatever")
+
+    certificate = generate_certificate(
+        csr=csr, ca=ca, ca_key=ca_key, validity=365, profile=profile
+    )
+
+    certificate_object = x509.load_pem_x509_certificate(certificate)
+    lifetime = certificate_object.not_valid_after - certificate_object.not_valid_before
+    assert lifetime.days == 10
+
+
+def test_given_profile_used_for_many_csrs_when_generate_certificate_then_authority_key_identifier_is_derived_once():  # noqa: E501
+    profile = CertificateProfile(name="server", key_usage=["digital_signature"])
+    ca_key = generate_private_key()
+    ca = generate_ca(private_key=ca_key, subject="ca")
+    private_key = generate_private_key()
+
+    with patch.object(
+        x509.AuthorityKeyIdentifier,
+        "from_issuer_subject_key_identifier",
+        wraps=x509.AuthorityKeyIdentifier.from_issuer_subject_key_identifier,
+    ) as patched_from_issuer_subject_key_identifier:
+        for subject in ["a", "b", "c"]:
+            csr = generate_csr(private_key=private_key, subject=subject)
+            generate_certificate(csr=csr, ca=ca, ca_key=ca_key, profile=profile)
+
+    patched_from_issuer_subject_key_identifier.assert_called_once()
+
+
+def test_given_unknown_key_usage_when_profile_extensions_are_built_then_value_error_is_raised():
+    profile = CertificateProfile(name="invalid", key_usage=["not a key usage"])
+
+    with pytest.raises(ValueError):
+        profile.extensions
+
+
+def test_given_root_ca_when_generate_intermediate_ca_then_intermediate_is_signed_by_root_and_can_sign_certificates():  # noqa: E501
+    root_key = generate_private_key()
+    root_ca = generate_ca(private_key=root_key, subject="root")
+    intermediate_key = generate_private_key()
+
+    intermediate_ca = generate_intermediate_ca(
+        private_key=intermediate_key, subject="intermediate", ca=root_ca, ca_key=root_key
+    )
+
+    root_object = x509.load_pem_x509_certificate(root_ca)
+    intermediate_object = x509.load_pem_x509_certificate(intermediate_ca)
+    assert intermediate_object.issuer == root_object.subject
+    basic_constraints = intermediate_object.extensions.get_extension_for_class(
+        x509.BasicConstraints
+    ).value
+    assert basic_constraints.ca is True
+    assert basic_constraints.path_length == 0
+    root_object.public_key().verify(  # type: ignore[call-arg, union-attr]
+        intermediate_object.signature,
+        intermediate_object.tbs_certificate_bytes,
+        padding.PKCS1v15(),  # type: ignore[arg-type]
+        intermediate_object.signature_hash_algorithm,  # type: ignore[arg-type]
+    )
+    csr = generate_csr(private_key=generate_private_key(), subject="leaf")
+    certificate = generate_certificate(csr=csr, ca=intermediate_ca, ca_key=intermediate_key)
+    certificate_object = x509.load_pem_x509_certificate(certificate)
+    assert certificate_object.issuer == intermediate_object.subject
+
+
+def test_given_revoked_certificates_when_generate_crl_then_crl_lists_revoked_serial_numbers():
+    ca_key = generate_private_key()
+    ca = generate_ca(private_key=ca_key, subject="ca")
+    revocation_date = datetime(2023, 1, 1)
+
+    crl = generate_crl(
+        ca=ca,
+        ca_key=ca_key,
+        revoked_certificates=[(1234, revocation_date), (5678, revocation_date)],
+        crl_number=3,
+    )
+
+    crl_object = x509.load_pem_x509_crl(crl)
+    ca_object = x509.load_pem_x509_certificate(ca)
+    assert crl_object.issuer == ca_object.subject
+    assert crl_object.is_signature_valid(ca_object.public_key())  # type: ignore[arg-type]
+    assert sorted(revoked.serial_number for revoked in crl_object) == [1234, 5678]
+    crl_number = crl_object.extensions.get_extension_for_class(x509.CRLNumber).value
+    assert crl_number.crl_number == 3
+    with pytest.raises(x509.ExtensionNotFound):
+        crl_object.extensions.get_extension_for_class(x509.DeltaCRLIndicator)
+
+
+def test_given_base_crl_number_when_generate_crl_then_delta_crl_is_generated():
+    ca_key = generate_private_key()
+    ca = generate_ca(private_key=ca_key, subject="ca")
+
+    crl = generate_crl(
+        ca=ca,
+        ca_key=ca_key,
+        revoked_certificates=[(1234, datetime(2023, 1, 1))],
+        crl_number=4,
+        base_crl_number=3,
+    )
+
+    crl_object = x509.load_pem_x509_crl(crl)
+    delta_crl_indicator = crl_object.extensions.get_extension_for_class(x509.DeltaCRLIndicator)
+    assert delta_crl_indicator.critical is True
+    assert delta_crl_indicator.value.crl_number == 3
+
+
+def test_given_instrumentation_enabled_when_generate_csr_then_signing_timing_is_recorded():
+    reset_instrumentation()
+    enable_instrumentation()
+    try:
+        generate_csr(private_key=generate_private_key(), subject="whatever")
+        generate_csr(private_key=generate_private_key(), subject="whatever")
+    finally:
+        disable_instrumentation()
+
+    snapshot = get_instrumentation_snapshot()
+    signing_timing = snapshot["timings"]["signing"]
+    assert signing_timing["count"] == 2
+    assert signing_timing["max"] <= signing_timing["total"]
+    assert sum(signing_timing["buckets"].values()) == 2
+    reset_instrumentation()
+
+
+def test_given_instrumentation_disabled_when_generate_csr_then_nothing_is_recorded():
+    reset_instrumentation()
+
+    generate_csr(private_key=generate_private_key(), subject="whatever")
+
+    assert get_instrumentation_snapshot() == {"enabled": False, "counters": {}, "timings": {}}
+
+
+def test_given_provider_certificate_when_to_dict_then_dict_is_keyed_like_relation_data():
+    provider_certificate = ProviderCertificate(
+        relation_id=1,
+        application_name="requirer",
+        csr="csr",
+        certificate="certificate",
+        ca="ca",
+        chain=["ca", "certificate"],
+    )
+
+    assert provider_certificate.to_dict() == {
+        "relation_id": 1,
+        "application_name": "requirer",
+        "certificate_signing_request": "csr",
+        "certificate": "certificate",
+        "ca": "ca",
+        "chain": ["ca", "certificate"],
+        "revoked": False,
+    }
+
+
+def test_given_requirer_csr_when_set_attribute_then_attribute_error_is_raised():
+    requirer_csr = RequirerCSR(
+        relation_id=1, application_name="requirer", unit_name="requirer/0", csr="csr"
+    )
+
+    with pytest.raises(AttributeError):
+        requirer_csr.csr = "other csr"  # type: ignore[misc]
+    assert not hasattr(requirer_csr, "__dict__")
+
+
+def test_given_provider_certificate_when_expiry_time_accessed_twice_then_certificate_is_parsed_once():  # noqa: E501
+    ca_key = generate_private_key()
+    ca = generate_ca(private_key=ca_key, subject="ca")
+    csr = generate_csr(private_key=generate_private_key(), subject="whatever")
+    certificate = generate_certificate(csr=csr, ca=ca, ca_key=ca_key, validity=10)
+    provider_certificate = ProviderCertificate(
+        relation_id=1,
+        application_name="requirer",
+        csr=csr.decode(),
+        certificate=certificate.decode(),
+        ca=ca.decode(),
+        chain=[ca.decode()],
+    )
+
+    with patch(
+        "charms.tls_certificates_interface.v2.tls_certificates._get_certificate_expiry_time",
+        return_value=datetime(2030, 1, 1),
+    ) as patch_get_expiry_time:
+        assert provider_certificate.expiry_time == datetime(2030, 1, 1)
+        assert provider_certificate.expiry_time == datetime(2030, 1, 1)
+
+    patch_get_expiry_time.assert_called_once_with(certificate.decode())
+
+
+def test_given_no_files_when_write_certificate_files_then_files_are_written_with_mode(tmp_path):
+    certificate_path = tmp_path / "certs" / "certificate.pem"
+    chain_path = tmp_path / "certs" / "chain.pem"
+
+    changed_paths = write_certificate_files(
+        certificate="certificate",
+        certificate_path=str(certificate_path),
+        ca="ca",
+        chain=["certificate", "ca"],
+        chain_path=str(chain_path),
+    )
+
+    assert changed_paths == [str(certificate_path), str(chain_path)]
+    assert certificate_path.read_text() == "certificate"
+    assert chain_path.read_text() == "certificate\nca"
+    assert certificate_path.stat().st_mode & 0o777 == 0o600
+    assert sorted(path.name for path in certificate_path.parent.iterdir()) == [
+        "certificate.pem",
+        "chain.pem",
+    ]
+
+
+def test_given_unchanged_files_when_write_certificate_files_then_only_changed_files_are_written(
+    tmp_path,
+):
+    certificate_path = str(tmp_path / "certificate.pem")
+    ca_path = str(tmp_path / "ca.pem")
+    write_certificate_files(
+        certificate="certificate",
+        certificate_path=certificate_path,
+        ca="ca",
+        ca_path=ca_path,
+    )
+
+    with patch("os.replace", wraps=os.replace) as patch_replace:
+        changed_paths = write_certificate_files(
+            certificate="certificate",
+            certificate_path=certificate_path,
+            ca="new ca",
+            ca_path=ca_path,
+        )
+
+    assert changed_paths == [ca_path]
+    patch_replace.assert_called_once()
+    assert (tmp_path / "ca.pem").read_text() == "new ca"
+    assert (
+        write_certificate_files(
+            certificate="certificate",
+            certificate_path=certificate_path,
+            ca="new ca",
+            ca_path=ca_path,
+        )
+        == []
+    )
+
+
+def generate_ca_and_certificate(subject: str) -> tuple:
+    private_key = generate_private_key()
+    ca = generate_ca(private_key=private_key, subject=f"{subject} ca").decode()
+    certificate = generate_certificate(
+        csr=generate_csr(private_key=private_key, subject=subject),
+        ca=ca.encode(),
+        ca_key=private_key,
+    ).decode()
+    return ca, certificate
+
+
+def test_given_same_ca_in_several_relations_when_trust_bundle_updated_then_ca_is_kept_once():
+    ca, certificate = generate_ca_and_certificate("first")
+    other_ca, _ = generate_ca_and_certificate("second")
+    trust_bundle = TrustBundle()
+
+    assert trust_bundle.update(1, [ca, certificate])
+    assert not trust_bundle.update(2, [certificate + ca])
+    assert trust_bundle.update(2, [ca, other_ca])
+
+    assert len(trust_bundle) == 2
+    assert trust_bundle.pem == "".join(
+        pem
+        for _, pem in sorted(
+            (x509.load_pem_x509_certificate(pem.encode()).fingerprint(hashes.SHA256()).hex(), pem)
+            for pem in [ca, other_ca]
+        )
+    )
+    assert trust_bundle.digest == hashlib.sha256(trust_bundle.pem.encode()).hexdigest()
+
+
+def test_given_ca_in_several_relations_when_relations_removed_then_ca_is_removed_with_last_one():
+    ca, _ = generate_ca_and_certificate("first")
+    trust_bundle = TrustBundle()
+    trust_bundle.update(1, [ca])
+    trust_bundle.update(2, [ca])
+
+    assert not trust_bundle.remove(1)
+    assert len(trust_bundle) == 1
+    assert trust_bundle.retain([])
+    assert len(trust_bundle) == 0
+    assert trust_bundle.pem == ""
+
+
+def test_given_unchanged_relation_data_when_update_from_relation_data_then_certificates_are_not_parsed():  # noqa: E501
+    ca, certificate = generate_ca_and_certificate("first")
+    relation_data = {
+        "certificates": json.dumps(
+            [
+                {
+                    "certificate": certificate,
+                    "certificate_signing_request": "csr",
+                    "ca": ca,
+                    "chain": [certificate, ca],
+                }
+            ]
+        )
+    }
+    trust_bundle = TrustBundle()
+    assert trust_bundle.update_from_relation_data(1, relation_data)
+
+    with patch(
+        "charms.tls_certificates_interface.v2.tls_certificates._load_relation_data"
+    ) as patch_load_relation_data:
+        assert not trust_bundle.update_from_relation_data(1, relation_data)
+
+    patch_load_relation_data.assert_not_called()
+    assert len(trust_bundle) == 1
+
+
+def import_lib_in_subprocess(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        env={**os.environ, "PYTHONPATH": str(LIB_PATH)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_given_fresh_interpreter_when_lib_is_imported_then_cryptography_and_jsonschema_are_not_imported():  # noqa: E501
+    result = import_lib_in_subprocess(
+        "import sys; import charms.tls_certificates_interface.v2.tls_certificates; "
+        "print(sorted(m for m in sys.modules if m.startswith(('cryptography', 'jsonschema'))))"
+    )
+
+    assert result.stdout.strip() == "[]"
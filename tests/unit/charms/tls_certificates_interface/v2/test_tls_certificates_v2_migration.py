@@ -0,0 +1,246 @@
+# Copyright 2023 Canonical Ltd.
+# See LICENSE file for licensing details.
+
+import json
+import unittest
+
+from charms.tls_certificates_interface.v2.tls_certificates import (
+    TLSCertificatesMigrationV2,
+    TLSCertificatesProvidesV2,
+    csr_matches_certificate,
+    generate_ca,
+    generate_certificate,
+    generate_csr,
+    generate_private_key,
+)
+from ops import testing
+from ops.charm import CharmBase
+
+PROVIDER_METADATA = """
+name: provider
+provides:
+  certificates:
+    interface: tls-certificates
+"""
+
+REQUIRER_METADATA = """
+name: requirer
+requires:
+  certificates:
+    interface: tls-certificates
+"""
+
+
+class MigrationCharm(CharmBase):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.migration = TLSCertificatesMigrationV2(self, "certificates", batch_size=2)
+
+
+class MigratingProviderCharm(CharmBase):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.certificates = TLSCertificatesProvidesV2(self, "certificates")
+        self.migration = TLSCertificatesMigrationV2(self, "certificates", batch_size=2)
+        self.revoked_certificates: list = []
+        self.framework.observe(
+            self.certificates.on.certificate_revocation_request,
+            self._on_certificate_revocation_request,
+        )
+
+    def _on_certificate_revocation_request(self, event):
+        self.revoked_certificates.append(event.certificate)
+
+
+def generate_v0_relation_data(common_names: list) -> dict:
+    ca_private_key = generate_private_key()
+    ca = generate_ca(private_key=ca_private_key, subject="ca.example.com").decode()
+    relation_data = {"ca": ca, "chain": ca, "unit_name": "provider/0"}
+    for common_name in common_names:
+        private_key = generate_private_key()
+        csr = generate_csr(private_key=private_key, subject=common_name, sans_dns=[common_name])
+        certificate = generate_certificate(csr=csr, ca=ca.encode(), ca_key=ca_private_key).decode()
+        relation_data[common_name] = json.dumps({"key": private_key.decode(), "cert": certificate})
+    return relation_data
+
+
+class TestTLSCertificatesMigrationV2Provider(unittest.TestCase):
+    def setUp(self):
+        self.harness = testing.Harness(MigrationCharm, meta=PROVIDER_METADATA)
+        self.addCleanup(self.harness.cleanup)
+        self.harness.set_leader(True)
+        self.harness.begin()
+        self.relation_id = self.harness.add_relation("certificates", "requirer")
+        self.harness.add_relation_unit(self.relation_id, "requirer/0")
+        self.v0_relation_data = generate_v0_relation_data(
+            ["a.example.com", "b.example.com", "c.example.com"]
+        )
+        self.harness.update_relation_data(
+            self.relation_id, self.harness.charm.unit.name, self.v0_relation_data
+        )
+
+    def get_v2_certificates(self) -> list:
+        relation_data = self.harness.get_relation_data(
+            self.relation_id, self.harness.charm.app.name
+        )
+        return json.loads(relation_data.get("certificates", "[]"))
+
+    def test_given_v0_certificates_when_migrate_then_batch_size_certificates_are_migrated_per_call(  # noqa: E501
+        self,
+    ):
+        assert self.harness.charm.migration.migrate() == 2
+        assert len(self.get_v2_certificates()) == 2
+        assert self.harness.charm.migration.get_migration_status() == {
+            self.relation_id: {"pending": 1, "failed": 0}
+        }
+
+        assert self.harness.charm.migration.migrate() == 1
+        assert len(self.get_v2_certificates()) == 3
+        assert self.harness.charm.migration.migration_is_complete()
+        assert self.harness.charm.migration.migrate() == 0
+
+    def test_given_v0_certificates_when_migrate_then_v2_entries_match_v0_certificates_and_v0_data_is_kept(  # noqa: E501
+        self,
+    ):
+        self.harness.charm.migration.migrate()
+        self.harness.charm.migration.migrate()
+
+        v0_certificate = json.loads(self.v0_relation_data["a.example.com"])
+        v2_certificate = next(
+            certificate
+            for certificate in self.get_v2_certificates()
+            if certificate["certificate"] == v0_certificate["cert"]
+        )
+        assert csr_matches_certificate(
+            v2_certificate["certificate_signing_request"], v2_certificate["certificate"]
+        )
+        assert v2_certificate["ca"] == self.v0_relation_data["ca"]
+        assert v2_certificate["chain"] == [self.v0_relation_data["ca"].strip()]
+        assert (
+            self.harness.get_relation_data(self.relation_id, self.harness.charm.unit.name)
+            == self.v0_relation_data
+        )
+
+    def test_given_non_leader_when_migrate_then_nothing_is_migrated(self):
+        self.harness.set_leader(False)
+
+        assert self.harness.charm.migration.migrate() == 0
+
+    def test_given_invalid_private_key_when_migrate_then_entry_is_recorded_as_failed(self):
+        v0_certificate = json.loads(self.v0_relation_data["c.example.com"])
+        self.harness.update_relation_data(
+            self.relation_id,
+            self.harness.charm.unit.name,
+            {"c.example.com": json.dumps({"key": "invalid", "cert": v0_certificate["cert"]})},
+        )
+
+        self.harness.charm.migration.migrate()
+        self.harness.charm.migration.migrate()
+
+        assert len(self.get_v2_certificates()) == 2
+        assert self.harness.charm.migration.get_migration_status() == {
+            self.relation_id: {"pending": 0, "failed": 1}
+        }
+
+
+class TestTLSCertificatesMigrationV2WithProvider(unittest.TestCase):
+    def setUp(self):
+        self.harness = testing.Harness(MigratingProviderCharm, meta=PROVIDER_METADATA)
+        self.addCleanup(self.harness.cleanup)
+        self.harness.set_leader(True)
+        self.harness.begin()
+        self.relation_id = self.harness.add_relation("certificates", "requirer")
+        self.harness.add_relation_unit(self.relation_id, "requirer/0")
+        self.v0_relation_data = generate_v0_relation_data(
+            ["a.example.com", "b.example.com", "c.example.com"]
+        )
+        self.harness.update_relation_data(
+            self.relation_id, self.harness.charm.unit.name, self.v0_relation_data
+        )
+
+    def get_v2_certificates(self) -> list:
+        relation_data = self.harness.get_relation_data(
+            self.relation_id, self.harness.charm.app.name
+        )
+        return json.loads(relation_data.get("certificates", "[]"))
+
+    def test_given_migrated_certificates_not_adopted_when_requirer_requests_v2_certificate_then_migrated_certificates_are_not_revoked(  # noqa: E501
+        self,
+    ):
+        self.harness.charm.migration.migrate()
+        self.harness.charm.migration.migrate()
+        migrated_certificates = self.get_v2_certificates()
+        csr = generate_csr(private_key=generate_private_key(), subject="d.example.com")
+
+        self.harness.update_relation_data(
+            self.relation_id,
+            "requirer/0",
+            {
+                "certificate_signing_requests": json.dumps(
+                    [{"certificate_signing_request": csr.decode()}]
+                )
+            },
+        )
+
+        assert self.harness.charm.revoked_certificates == []
+        assert self.get_v2_certificates() == migrated_certificates
+
+    def test_given_v0_certificate_removed_when_relation_changed_then_migrated_certificate_is_revoked(  # noqa: E501
+        self,
+    ):
+        self.harness.charm.migration.migrate()
+        self.harness.charm.migration.migrate()
+        v0_certificate = json.loads(self.v0_relation_data["c.example.com"])["cert"]
+        self.harness.update_relation_data(
+            self.relation_id, self.harness.charm.unit.name, {"c.example.com": ""}
+        )
+
+        self.harness.update_relation_data(
+            self.relation_id, "requirer/0", {"certificate_signing_requests": "[]"}
+        )
+
+        assert self.harness.charm.revoked_certificates == [v0_certificate]
+        assert len(self.get_v2_certificates()) == 2
+
+
+class TestTLSCertificatesMigrationV2Requirer(unittest.TestCase):
+    def setUp(self):
+        self.harness = testing.Harness(MigrationCharm, meta=REQUIRER_METADATA)
+        self.addCleanup(self.harness.cleanup)
+        self.harness.begin()
+        self.relation_id = self.harness.add_relation("certificates", "provider")
+        self.harness.add_relation_unit(self.relation_id, "provider/0")
+        self.v0_relation_data = generate_v0_relation_data(["a.example.com", "b.example.com"])
+
+    def test_given_provider_migrated_v0_certificates_when_migrate_then_requested_csrs_are_adopted(  # noqa: E501
+        self,
+    ):
+        self.harness.update_relation_data(
+            self.relation_id,
+            self.harness.charm.unit.name,
+            {"cert_requests": json.dumps([{"common_name": "a.example.com", "sans": []}])},
+        )
+        self.harness.update_relation_data(self.relation_id, "provider/0", self.v0_relation_data)
+        v2_certificates = [
+            {
+                "certificate_signing_request": f"csr for {common_name}",
+                "certificate": json.loads(self.v0_relation_data[common_name])["cert"],
+                "ca": self.v0_relation_data["ca"],
+                "chain": [self.v0_relation_data["ca"]],
+            }
+            for common_name in ["a.example.com", "b.example.com"]
+        ]
+        self.harness.update_relation_data(
+            self.relation_id, "provider", {"certificates": json.dumps(v2_certificates)}
+        )
+
+        self.harness.charm.migration.migrate()
+
+        relation_data = self.harness.get_relation_data(
+            self.relation_id, self.harness.charm.unit.name
+        )
+        assert json.loads(relation_data["certificate_signing_requests"]) == [
+            {"certificate_signing_request": "csr for a.example.com"}
+        ]
+        assert "cert_requests" in relation_data
+        assert self.harness.charm.migration.migration_is_complete()
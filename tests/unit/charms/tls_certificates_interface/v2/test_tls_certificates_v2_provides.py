@@ -4,11 +4,35 @@
 
 import json
 import unittest
+from datetime import timedelta
 from unittest.mock import PropertyMock, call, patch
 
+from cryptography import x509
 from ops import testing
 
+from lib.charms.tls_certificates_interface.v2 import tls_certificates
+from lib.charms.tls_certificates_interface.v2.tls_certificates import (
+    ProviderCertificate,
+    RequirerCSR,
+    disable_instrumentation,
+    enable_instrumentation,
+    get_instrumentation_snapshot,
+    reset_instrumentation,
+)
+from tests.unit.charms.tls_certificates_interface.v2.certificates import (
+    generate_ca as generate_ca_helper,
+)
+from tests.unit.charms.tls_certificates_interface.v2.certificates import (
+    generate_certificate as generate_certificate_helper,
+)
+from tests.unit.charms.tls_certificates_interface.v2.certificates import (
+    generate_csr as generate_csr_helper,
+)
+from tests.unit.charms.tls_certificates_interface.v2.certificates import (
+    generate_private_key as generate_private_key_helper,
+)
 from tests.unit.charms.tls_certificates_interface.v2.dummy_provider_charm.src.charm import (
+    DummyTLSCertificatesDistributedProviderCharm,
     DummyTLSCertificatesProviderCharm,
 )
 
@@ -1227,3 +1251,1340 @@ class TestTLSCertificatesProvides(unittest.TestCase):
 
         actual_csrs_info = self.harness.charm.certificates.get_requirer_csrs_with_no_certs()
         self.assertEqual(actual_csrs_info, [])
+
+    def test_given_csrs_in_relation_data_when_iter_requirer_csrs_then_one_record_per_csr_is_yielded(  # noqa: E501
+        self,
+    ):
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [
+                        {"certificate_signing_request": "csr 1"},
+                        {"certificate_signing_request": "csr 2"},
+                    ]
+                )
+            },
+        )
+
+        requirer_csrs = list(self.harness.charm.certificates.iter_requirer_csrs())
+
+        self.assertEqual(
+            requirer_csrs,
+            [
+                RequirerCSR(
+                    relation_id=relation_id,
+                    application_name=self.remote_app,
+                    unit_name=self.remote_unit_name,
+                    csr=csr,
+                )
+                for csr in ["csr 1", "csr 2"]
+            ],
+        )
+
+    def test_given_revoked_certificate_when_iter_issued_certificates_then_revoked_certificate_is_not_yielded(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(is_leader=True)
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.harness.charm.app.name,
+            key_values={
+                "certificates": json.dumps(
+                    [
+                        {
+                            "certificate": "certificate 1",
+                            "certificate_signing_request": "csr 1",
+                            "ca": "ca",
+                            "chain": ["ca"],
+                        },
+                        {
+                            "certificate": "certificate 2",
+                            "certificate_signing_request": "csr 2",
+                            "ca": "ca",
+                            "chain": ["ca"],
+                            "revoked": True,
+                        },
+                    ]
+                )
+            },
+        )
+
+        issued_certificates = list(self.harness.charm.certificates.iter_issued_certificates())
+
+        self.assertEqual(
+            issued_certificates,
+            [
+                ProviderCertificate(
+                    relation_id=relation_id,
+                    application_name=self.remote_app,
+                    csr="csr 1",
+                    certificate="certificate 1",
+                    ca="ca",
+                    chain=["ca"],
+                )
+            ],
+        )
+
+    def test_given_csr_with_and_csr_without_certificate_when_iter_pending_csrs_then_only_csr_without_certificate_is_yielded(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(is_leader=True)
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        ca_key = generate_private_key_helper()
+        ca = generate_ca_helper(private_key=ca_key, subject="ca")
+        issued_csr = generate_csr_helper(private_key=generate_private_key_helper(), subject="1")
+        pending_csr = generate_csr_helper(private_key=generate_private_key_helper(), subject="2")
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [
+                        {"certificate_signing_request": issued_csr.decode().strip()},
+                        {"certificate_signing_request": pending_csr.decode().strip()},
+                    ]
+                )
+            },
+        )
+        self.harness.charm.certificates.set_relation_certificate(
+            certificate=generate_certificate_helper(csr=issued_csr, ca=ca, ca_key=ca_key).decode(),
+            certificate_signing_request=issued_csr.decode(),
+            ca=ca.decode(),
+            chain=[ca.decode()],
+            relation_id=relation_id,
+        )
+
+        pending_csrs = list(self.harness.charm.certificates.iter_pending_csrs())
+
+        self.assertEqual(
+            [pending.csr for pending in pending_csrs],
+            [pending_csr.decode().strip()],
+        )
+
+    def test_given_two_relations_when_first_issued_certificate_is_consumed_then_only_first_relation_is_decoded(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(is_leader=True)
+        for remote_app in ["app-1", "app-2"]:
+            relation_id = self.harness.add_relation(
+                relation_name=self.relation_name, remote_app=remote_app
+            )
+            self.harness.update_relation_data(
+                relation_id=relation_id,
+                app_or_unit=self.harness.charm.app.name,
+                key_values={
+                    "certificates": json.dumps(
+                        [
+                            {
+                                "certificate": f"{remote_app} certificate",
+                                "certificate_signing_request": f"{remote_app} csr",
+                                "ca": "ca",
+                                "chain": ["ca"],
+                            }
+                        ]
+                    )
+                },
+            )
+
+        with patch(
+            f"{LIB_DIR}._load_relation_data",
+            wraps=tls_certificates._load_relation_data,
+        ) as patch_load_relation_data:
+            issued_certificates = self.harness.charm.certificates.iter_issued_certificates()
+            first_certificate = next(issued_certificates)
+
+        self.assertEqual(first_certificate.application_name, "app-1")
+        patch_load_relation_data.assert_called_once()
+
+    def create_certificates_relation_with_certificates_for_sans(
+        self, sans_and_validities: list
+    ) -> int:
+        self.harness.set_leader(is_leader=True)
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        ca_key = generate_private_key_helper()
+        ca = generate_ca_helper(private_key=ca_key, subject="ca")
+        csrs = [
+            tls_certificates.generate_csr(
+                private_key=generate_private_key_helper(),
+                subject=sans_dns[0],
+                sans_dns=sans_dns,
+                sans_ip=sans_ip,
+            )
+            for sans_dns, sans_ip, _ in sans_and_validities
+        ]
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [{"certificate_signing_request": csr.decode().strip()} for csr in csrs]
+                )
+            },
+        )
+        for csr, (_, _, validity) in zip(csrs, sans_and_validities):
+            self.harness.charm.certificates.set_relation_certificate(
+                certificate=tls_certificates.generate_certificate(
+                    csr=csr, ca=ca, ca_key=ca_key, validity=validity
+                ).decode(),
+                certificate_signing_request=csr.decode(),
+                ca=ca.decode(),
+                chain=[ca.decode()],
+                relation_id=relation_id,
+            )
+        return relation_id
+
+    def test_given_issued_certificates_when_get_certificate_inventory_then_certificates_are_indexed_by_application_unit_san_and_expiry(  # noqa: E501
+        self,
+    ):
+        self.create_certificates_relation_with_certificates_for_sans(
+            [(["a.example.com"], None, 10), (["*.example.org"], ["10.0.0.1"], 100)]
+        )
+
+        inventory = self.harness.charm.certificates.get_certificate_inventory()
+
+        self.assertEqual(len(inventory), 2)
+        self.assertEqual(len(inventory.get_certificates_by_application(self.remote_app)), 2)
+        self.assertEqual(len(inventory.get_certificates_by_unit(self.remote_unit_name)), 2)
+        self.assertEqual(
+            [
+                certificate.sans
+                for certificate in inventory.get_certificates_by_san("a.example.com")
+            ],
+            [("a.example.com",)],
+        )
+        self.assertEqual(
+            [
+                set(certificate.sans)
+                for certificate in inventory.get_certificates_by_san("foo.example.org")
+            ],
+            [{"*.example.org", "10.0.0.1"}],
+        )
+        self.assertEqual(len(inventory.get_certificates_by_san("10.0.0.1")), 1)
+        self.assertEqual(inventory.get_certificates_by_san("b.example.com"), [])
+        self.assertEqual(
+            [
+                certificate.sans
+                for certificate in inventory.get_expiring_certificates(
+                    within=timedelta(days=30), application_name=self.remote_app
+                )
+            ],
+            [("a.example.com",)],
+        )
+        self.assertEqual(
+            inventory.get_expiring_certificates(
+                within=timedelta(days=30), application_name="other app"
+            ),
+            [],
+        )
+
+    def test_given_relation_data_unchanged_when_get_certificate_inventory_twice_then_inventory_is_built_once(  # noqa: E501
+        self,
+    ):
+        relation_id = self.create_certificates_relation_with_certificates_for_sans(
+            [(["a.example.com"], None, 10)]
+        )
+
+        inventory = self.harness.charm.certificates.get_certificate_inventory()
+        self.assertIs(self.harness.charm.certificates.get_certificate_inventory(), inventory)
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={"certificate_signing_requests": json.dumps([])},
+        )
+
+        self.assertIsNot(self.harness.charm.certificates.get_certificate_inventory(), inventory)
+
+    def test_given_certificate_inventory_cache_when_inventory_is_rebuilt_then_certificates_are_not_parsed_again(  # noqa: E501
+        self,
+    ):
+        self.create_certificates_relation_with_certificates_for_sans(
+            [(["a.example.com"], None, 10)]
+        )
+        self.harness.charm.certificates.certificate_inventory_cache = True
+        self.harness.charm.certificates.get_certificate_inventory()
+        self.harness.charm.certificates._certificate_inventory = None
+
+        with patch(
+            f"{LIB_DIR}._get_certificate_metadata",
+            wraps=tls_certificates._get_certificate_metadata,
+        ) as patch_get_certificate_metadata:
+            inventory = self.harness.charm.certificates.get_certificate_inventory()
+
+        patch_get_certificate_metadata.assert_not_called()
+        self.assertEqual(len(inventory.get_certificates_by_san("a.example.com")), 1)
+
+    def generate_certificate(self, ca: bytes, ca_key: bytes, subject: str) -> str:
+        csr = generate_csr_helper(private_key=generate_private_key_helper(), subject=subject)
+        return generate_certificate_helper(csr=csr, ca=ca, ca_key=ca_key).decode()
+
+    def test_given_certificate_removed_when_publish_crl_then_crl_with_certificate_serial_number_is_set_in_relation_data(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(is_leader=True)
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        ca_key = generate_private_key_helper()
+        ca = generate_ca_helper(private_key=ca_key, subject="ca")
+        certificate = self.generate_certificate(ca=ca, ca_key=ca_key, subject="whatever")
+
+        self.harness.charm.certificates.remove_certificate(certificate=certificate)
+        self.harness.charm.certificates.publish_crl(ca=ca.decode(), ca_key=ca_key.decode())
+
+        provider_relation_data = self.harness.get_relation_data(
+            relation_id, self.harness.charm.app.name
+        )
+        crl = x509.load_pem_x509_crl(provider_relation_data["crl"].encode())
+        certificate_object = x509.load_pem_x509_certificate(certificate.encode())
+        self.assertEqual(
+            [revoked.serial_number for revoked in crl], [certificate_object.serial_number]
+        )
+        self.assertNotIn("delta_crl", provider_relation_data)
+
+    def test_given_complete_crl_published_and_new_certificate_revoked_when_publish_crl_then_only_delta_crl_is_signed(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(is_leader=True)
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        ca_key = generate_private_key_helper()
+        ca = generate_ca_helper(private_key=ca_key, subject="ca")
+        certificate_1 = self.generate_certificate(ca=ca, ca_key=ca_key, subject="whatever 1")
+        certificate_2 = self.generate_certificate(ca=ca, ca_key=ca_key, subject="whatever 2")
+        self.harness.charm.certificates.remove_certificate(certificate=certificate_1)
+        self.harness.charm.certificates.publish_crl(ca=ca.decode(), ca_key=ca_key.decode())
+        initial_crl = self.harness.get_relation_data(relation_id, self.harness.charm.app.name)[
+            "crl"
+        ]
+
+        self.harness.charm.certificates.remove_certificate(certificate=certificate_2)
+        self.harness.charm.certificates.publish_crl(ca=ca.decode(), ca_key=ca_key.decode())
+
+        provider_relation_data = self.harness.get_relation_data(
+            relation_id, self.harness.charm.app.name
+        )
+        self.assertEqual(provider_relation_data["crl"], initial_crl)
+        delta_crl = x509.load_pem_x509_crl(provider_relation_data["delta_crl"].encode())
+        certificate_2_object = x509.load_pem_x509_certificate(certificate_2.encode())
+        self.assertEqual(
+            [revoked.serial_number for revoked in delta_crl],
+            [certificate_2_object.serial_number],
+        )
+        delta_crl_indicator = delta_crl.extensions.get_extension_for_class(
+            x509.DeltaCRLIndicator
+        ).value
+        self.assertEqual(delta_crl_indicator.crl_number, 1)
+
+    @patch(f"{LIB_DIR}.generate_crl")
+    def test_given_no_new_revocation_when_publish_crl_then_crl_is_not_signed_again(
+        self, patch_generate_crl
+    ):
+        patch_generate_crl.return_value = b"whatever crl"
+        self.harness.set_leader(is_leader=True)
+        self.create_certificates_relation_with_1_remote_unit()
+        self.harness.charm.certificates.publish_crl(ca="whatever ca", ca_key="whatever key")
+
+        self.harness.charm.certificates.publish_crl(ca="whatever ca", ca_key="whatever key")
+
+        patch_generate_crl.assert_called_once()
+
+    def create_certificates_relation_with_issued_certificates(self, number_of_certificates: int):
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        csrs = [f"whatever csr {i}" for i in range(number_of_certificates)]
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.harness.charm.app.name,
+            key_values={
+                "certificates": json.dumps(
+                    [
+                        {
+                            "certificate": f"whatever certificate {i}",
+                            "certificate_signing_request": csr,
+                            "ca": "old ca",
+                            "chain": ["old ca"],
+                        }
+                        for i, csr in enumerate(csrs)
+                    ]
+                )
+            },
+        )
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [{"certificate_signing_request": csr} for csr in csrs]
+                )
+            },
+        )
+        return relation_id, csrs
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    def test_given_issued_certificates_when_start_ca_rotation_then_first_batch_is_requested_and_both_cas_are_published(  # noqa: E501
+        self, patch_certificate_creation_request
+    ):
+        self.harness.set_leader(is_leader=True)
+        relation_id, csrs = self.create_certificates_relation_with_issued_certificates(3)
+
+        self.harness.charm.certificates.start_ca_rotation(ca="new ca", batch_size=2)
+
+        patch_certificate_creation_request.return_value.emit.assert_has_calls(
+            [
+                call(certificate_signing_request=csrs[0], relation_id=relation_id),
+                call(certificate_signing_request=csrs[1], relation_id=relation_id),
+            ]
+        )
+        self.assertEqual(patch_certificate_creation_request.return_value.emit.call_count, 2)
+        provider_relation_data = self.harness.get_relation_data(
+            relation_id, self.harness.charm.app.name
+        )
+        self.assertEqual(json.loads(provider_relation_data["ca_bundle"]), ["old ca", "new ca"])
+        self.assertEqual(
+            self.harness.charm.certificates.get_ca_rotation_status(),
+            {"in_progress": True, "total": 3, "reissued": 0, "in_flight": 2, "pending": 1},
+        )
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    def test_given_batch_not_delivered_when_update_status_then_no_new_certificate_is_requested(
+        self, patch_certificate_creation_request
+    ):
+        self.harness.set_leader(is_leader=True)
+        self.create_certificates_relation_with_issued_certificates(3)
+        self.harness.charm.certificates.start_ca_rotation(ca="new ca", batch_size=2)
+
+        self.harness.charm.on.update_status.emit()
+
+        self.assertEqual(patch_certificate_creation_request.return_value.emit.call_count, 2)
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    def test_given_certificate_reissued_with_new_ca_when_update_status_then_next_certificate_is_requested(  # noqa: E501
+        self, patch_certificate_creation_request
+    ):
+        self.harness.set_leader(is_leader=True)
+        relation_id, csrs = self.create_certificates_relation_with_issued_certificates(3)
+        self.harness.charm.certificates.start_ca_rotation(ca="new ca", batch_size=2)
+        self.harness.charm.certificates.set_relation_certificate(
+            certificate="new certificate 0",
+            certificate_signing_request=csrs[0],
+            ca="new ca",
+            chain=["new ca"],
+            relation_id=relation_id,
+        )
+
+        self.harness.charm.on.update_status.emit()
+
+        patch_certificate_creation_request.assert_has_calls(
+            [call().emit(certificate_signing_request=csrs[2], relation_id=relation_id)]
+        )
+        self.assertEqual(
+            self.harness.charm.certificates.get_ca_rotation_status(),
+            {"in_progress": True, "total": 3, "reissued": 1, "in_flight": 2, "pending": 0},
+        )
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    def test_given_all_certificates_reissued_when_set_relation_certificate_then_rotation_is_completed_and_old_ca_is_removed(  # noqa: E501
+        self, _
+    ):
+        self.harness.set_leader(is_leader=True)
+        relation_id, csrs = self.create_certificates_relation_with_issued_certificates(2)
+        self.harness.charm.certificates.start_ca_rotation(ca="new ca", batch_size=2)
+
+        for i, csr in enumerate(csrs):
+            self.harness.charm.certificates.set_relation_certificate(
+                certificate=f"new certificate {i}",
+                certificate_signing_request=csr,
+                ca="new ca",
+                chain=["new ca"],
+                relation_id=relation_id,
+            )
+
+        provider_relation_data = self.harness.get_relation_data(
+            relation_id, self.harness.charm.app.name
+        )
+        self.assertNotIn("ca_bundle", provider_relation_data)
+        self.assertFalse(self.harness.charm.certificates.get_ca_rotation_status()["in_progress"])
+        self.assertEqual(
+            [
+                certificate["ca"]
+                for certificate in json.loads(provider_relation_data["certificates"])
+            ],
+            ["new ca", "new ca"],
+        )
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    def test_given_ca_rotation_when_old_certificate_is_replaced_then_it_is_added_to_revoked_certificates(  # noqa: E501
+        self, _
+    ):
+        self.harness.set_leader(is_leader=True)
+        ca_key = generate_private_key_helper()
+        ca = generate_ca_helper(private_key=ca_key, subject="old ca")
+        csr = generate_csr_helper(private_key=generate_private_key_helper(), subject="whatever")
+        certificate = generate_certificate_helper(csr=csr, ca=ca, ca_key=ca_key).decode()
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [{"certificate_signing_request": csr.decode()}]
+                )
+            },
+        )
+        self.harness.charm.certificates.set_relation_certificate(
+            certificate=certificate,
+            certificate_signing_request=csr.decode(),
+            ca=ca.decode(),
+            chain=[ca.decode()],
+            relation_id=relation_id,
+        )
+        self.harness.charm.certificates.start_ca_rotation(ca="new ca")
+        self.assertEqual(self.harness.charm.certificates.get_revoked_serial_numbers(), [])
+
+        self.harness.charm.certificates.set_relation_certificate(
+            certificate="new certificate",
+            certificate_signing_request=csr.decode(),
+            ca="new ca",
+            chain=["new ca"],
+            relation_id=relation_id,
+        )
+
+        self.assertEqual(
+            self.harness.charm.certificates.get_revoked_serial_numbers(),
+            [x509.load_pem_x509_certificate(certificate.encode()).serial_number],
+        )
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_requests",
+        new_callable=PropertyMock,
+    )
+    def test_given_batch_certificate_requests_when_relation_changed_then_single_certificate_creation_requests_event_is_emitted(  # noqa: E501
+        self, patch_certificate_creation_requests, patch_certificate_creation_request
+    ):
+        self.harness.set_leader(is_leader=True)
+        self.harness.charm.certificates.batch_certificate_requests = True
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [
+                        {"certificate_signing_request": "whatever csr 1"},
+                        {"certificate_signing_request": "whatever csr 2"},
+                    ]
+                )
+            },
+        )
+
+        patch_certificate_creation_requests.return_value.emit.assert_called_once_with(
+            certificate_creation_requests=[
+                {"relation_id": relation_id, "certificate_signing_request": "whatever csr 1"},
+                {"relation_id": relation_id, "certificate_signing_request": "whatever csr 2"},
+            ]
+        )
+        patch_certificate_creation_request.return_value.emit.assert_not_called()
+
+    def test_given_certificates_when_set_relation_certificates_then_certificates_are_added_to_relation_data_and_previous_certificate_is_replaced(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(is_leader=True)
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        self.harness.charm.certificates.set_relation_certificate(
+            certificate="old certificate",
+            certificate_signing_request="whatever csr 1",
+            ca="whatever ca",
+            chain=["whatever ca"],
+            relation_id=relation_id,
+        )
+
+        self.harness.charm.certificates.set_relation_certificates(
+            [
+                {
+                    "relation_id": relation_id,
+                    "certificate": f"whatever certificate {i}",
+                    "certificate_signing_request": f"whatever csr {i}",
+                    "ca": "whatever ca",
+                    "chain": ["whatever ca"],
+                }
+                for i in (1, 2)
+            ]
+        )
+
+        provider_relation_data = _load_relation_data(
+            self.harness.get_relation_data(relation_id, self.harness.charm.app.name)
+        )
+        self.assertEqual(
+            provider_relation_data["certificates"],
+            [
+                {
+                    "certificate": f"whatever certificate {i}",
+                    "certificate_signing_request": f"whatever csr {i}",
+                    "ca": "whatever ca",
+                    "chain": ["whatever ca"],
+                }
+                for i in (1, 2)
+            ],
+        )
+
+    def create_certificates_relation_with_csrs(self, csrs: list) -> int:
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [{"certificate_signing_request": csr} for csr in csrs]
+                )
+            },
+        )
+        return relation_id
+
+    def test_given_csr_already_queued_when_queue_certificate_creation_request_then_csr_is_not_queued_twice(  # noqa: E501
+        self,
+    ):
+        self.assertTrue(
+            self.harness.charm.certificates.queue_certificate_creation_request(
+                certificate_signing_request="whatever csr", relation_id=1
+            )
+        )
+
+        self.assertFalse(
+            self.harness.charm.certificates.queue_certificate_creation_request(
+                certificate_signing_request="whatever csr\n", relation_id=1
+            )
+        )
+        self.assertEqual(
+            self.harness.charm.certificates.get_pending_certificate_creation_requests(),
+            [{"certificate_signing_request": "whatever csr", "relation_id": 1}],
+        )
+
+    def test_given_queued_requests_when_process_certificate_creation_requests_with_max_requests_then_oldest_requests_are_handled_and_others_stay_queued(  # noqa: E501
+        self,
+    ):
+        csrs = [f"whatever csr {i}" for i in range(3)]
+        relation_id = self.create_certificates_relation_with_csrs(csrs)
+        for csr in csrs:
+            self.harness.charm.certificates.queue_certificate_creation_request(
+                certificate_signing_request=csr, relation_id=relation_id
+            )
+        handled_requests = []
+
+        handled = self.harness.charm.certificates.process_certificate_creation_requests(
+            handler=lambda csr, relation_id: handled_requests.append((csr, relation_id)),
+            max_requests=2,
+        )
+
+        self.assertEqual(handled, 2)
+        self.assertEqual(handled_requests, [(csrs[0], relation_id), (csrs[1], relation_id)])
+        self.assertEqual(
+            self.harness.charm.certificates.get_pending_certificate_creation_requests(),
+            [{"certificate_signing_request": csrs[2], "relation_id": relation_id}],
+        )
+
+    def test_given_queued_csr_no_longer_requested_when_process_certificate_creation_requests_then_request_is_dropped(  # noqa: E501
+        self,
+    ):
+        relation_id = self.create_certificates_relation_with_csrs(["whatever csr"])
+        self.harness.charm.certificates.queue_certificate_creation_request(
+            certificate_signing_request="old csr", relation_id=relation_id
+        )
+        handled_requests = []
+
+        handled = self.harness.charm.certificates.process_certificate_creation_requests(
+            handler=lambda csr, relation_id: handled_requests.append(csr)
+        )
+
+        self.assertEqual(handled, 0)
+        self.assertEqual(handled_requests, [])
+        self.assertEqual(
+            self.harness.charm.certificates.get_pending_certificate_creation_requests(), []
+        )
+
+    def test_given_handler_raises_when_process_certificate_creation_requests_then_request_stays_queued(  # noqa: E501
+        self,
+    ):
+        relation_id = self.create_certificates_relation_with_csrs(["whatever csr"])
+        self.harness.charm.certificates.queue_certificate_creation_request(
+            certificate_signing_request="whatever csr", relation_id=relation_id
+        )
+
+        def handler(csr: str, relation_id: int) -> None:
+            raise ValueError("CA not available")
+
+        with self.assertRaises(ValueError):
+            self.harness.charm.certificates.process_certificate_creation_requests(handler=handler)
+
+        self.assertEqual(
+            len(self.harness.charm.certificates.get_pending_certificate_creation_requests()), 1
+        )
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    def test_given_max_csrs_per_unit_when_relation_changed_then_excess_csrs_are_throttled(
+        self, patch_certificate_creation_request
+    ):
+        self.harness.set_leader(is_leader=True)
+        self.harness.charm.certificates.max_csrs_per_unit = 2
+        csrs = [f"whatever csr {i}" for i in range(3)]
+
+        relation_id = self.create_certificates_relation_with_csrs(csrs)
+
+        patch_certificate_creation_request.return_value.emit.assert_has_calls(
+            [
+                call(certificate_signing_request=csrs[0], relation_id=relation_id),
+                call(certificate_signing_request=csrs[1], relation_id=relation_id),
+            ]
+        )
+        self.assertEqual(patch_certificate_creation_request.return_value.emit.call_count, 2)
+        self.assertEqual(
+            self.harness.charm.certificates.get_throttled_certificate_requests(),
+            [
+                {
+                    "relation_id": relation_id,
+                    "unit_name": self.remote_unit_name,
+                    "certificate_signing_request": csrs[2],
+                    "reason": "unit_limit",
+                }
+            ],
+        )
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    def test_given_max_csrs_per_application_when_relation_changed_for_second_unit_then_its_csrs_are_throttled(  # noqa: E501
+        self, patch_certificate_creation_request
+    ):
+        self.harness.set_leader(is_leader=True)
+        self.harness.charm.certificates.max_csrs_per_application = 1
+        relation_id = self.create_certificates_relation_with_csrs(["whatever csr 0"])
+        second_unit_name = f"{self.remote_app}/1"
+        self.harness.add_relation_unit(relation_id=relation_id, remote_unit_name=second_unit_name)
+
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=second_unit_name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [{"certificate_signing_request": "whatever csr 1"}]
+                )
+            },
+        )
+
+        patch_certificate_creation_request.return_value.emit.assert_called_once_with(
+            certificate_signing_request="whatever csr 0", relation_id=relation_id
+        )
+        throttled_requests = self.harness.charm.certificates.get_throttled_certificate_requests()
+        self.assertEqual(len(throttled_requests), 1)
+        self.assertEqual(throttled_requests[0]["unit_name"], second_unit_name)
+        self.assertEqual(throttled_requests[0]["reason"], "application_limit")
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    @patch(f"{LIB_DIR}.time.time")
+    def test_given_issuance_rate_exceeded_when_tokens_are_refilled_and_update_status_then_throttled_csrs_are_requested(  # noqa: E501
+        self, patch_time, patch_certificate_creation_request
+    ):
+        patch_time.return_value = 1000.0
+        self.harness.set_leader(is_leader=True)
+        self.harness.charm.certificates.issuance_rate = 2
+        csrs = [f"whatever csr {i}" for i in range(3)]
+        relation_id = self.create_certificates_relation_with_csrs(csrs)
+        self.assertEqual(patch_certificate_creation_request.return_value.emit.call_count, 2)
+        self.assertEqual(
+            self.harness.charm.certificates.get_throttled_certificate_requests()[0]["reason"],
+            "rate_limit",
+        )
+
+        patch_time.return_value = 1030.0
+        self.harness.charm.on.update_status.emit()
+
+        patch_certificate_creation_request.return_value.emit.assert_called_with(
+            certificate_signing_request=csrs[2], relation_id=relation_id
+        )
+        self.assertEqual(self.harness.charm.certificates.get_throttled_certificate_requests(), [])
+
+    def test_given_instrumentation_enabled_with_log_per_hook_when_framework_commits_then_one_line_is_logged(  # noqa: E501
+        self,
+    ):
+        reset_instrumentation()
+        enable_instrumentation(log_per_hook=True)
+        self.addCleanup(reset_instrumentation)
+        self.addCleanup(disable_instrumentation)
+        self.harness.set_leader(is_leader=True)
+        self.create_certificates_relation_with_csrs(["whatever csr"])
+
+        with self.assertLogs(LIB_DIR, level="INFO") as logs:
+            self.harness.framework.on.commit.emit()
+            self.harness.framework.on.commit.emit()
+
+        instrumentation_logs = [
+            log for log in logs.output if "tls-certificates instrumentation" in log
+        ]
+        self.assertEqual(len(instrumentation_logs), 1)
+        snapshot = get_instrumentation_snapshot()
+        self.assertEqual(snapshot["counters"]["certificate_creation_requests"], 1)
+        self.assertIn("json_decode", snapshot["timings"])
+        self.assertIn("schema_validation", snapshot["timings"])
+
+    def test_given_certificates_with_same_ca_when_get_relation_data_sizes_then_duplicated_ca_and_chain_size_is_returned(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(is_leader=True)
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        for i in range(2):
+            self.harness.charm.certificates.set_relation_certificate(
+                certificate=f"certificate {i}",
+                certificate_signing_request=f"csr {i}",
+                ca="ca",
+                chain=["ca", f"certificate {i}"],
+                relation_id=relation_id,
+            )
+
+        sizes = self.harness.charm.certificates.get_relation_data_sizes()[relation_id]
+
+        certificates_value = self.harness.get_relation_data(
+            relation_id, self.harness.charm.app.name
+        )["certificates"]
+        self.assertEqual(
+            sizes["keys"], {"certificates": len("certificates") + len(certificates_value)}
+        )
+        self.assertEqual(sizes["total"], len("certificates") + len(certificates_value))
+        self.assertEqual(
+            sizes["certificates"],
+            {
+                "certificate": 26,
+                "certificate_signing_request": 10,
+                "ca": 4,
+                "chain": 30,
+                "duplicated_ca_and_chain": 6,
+            },
+        )
+        self.assertEqual(sizes["requirer_units"], {self.remote_unit_name: 0})
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.relation_data_size_warning",
+        new_callable=PropertyMock,
+    )
+    def test_given_relation_data_above_threshold_when_framework_pre_commits_then_relation_data_size_warning_is_emitted_once(  # noqa: E501
+        self, patch_relation_data_size_warning
+    ):
+        self.harness.set_leader(is_leader=True)
+        self.harness.charm.certificates.relation_data_size_threshold = 50
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        self.harness.charm.certificates.set_relation_certificate(
+            certificate="whatever certificate",
+            certificate_signing_request="whatever csr",
+            ca="whatever ca",
+            chain=["whatever ca"],
+            relation_id=relation_id,
+        )
+        size = self.harness.charm.certificates.get_relation_data_sizes()[relation_id]["total"]
+
+        self.harness.framework.on.pre_commit.emit()
+        self.harness.framework.on.pre_commit.emit()
+
+        patch_relation_data_size_warning.return_value.emit.assert_called_once_with(
+            relation_id=relation_id, size=size, threshold=50
+        )
+
+    def test_given_relation_data_size_threshold_when_framework_pre_commits_then_requirer_databags_are_not_read(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(is_leader=True)
+        self.harness.charm.certificates.relation_data_size_threshold = 50
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        requirer_unit = self.harness.model.get_unit(self.remote_unit_name)
+
+        with patch(
+            f"{LIB_DIR}._get_databag_size", wraps=tls_certificates._get_databag_size
+        ) as patch_get_databag_size:
+            self.harness.framework.on.pre_commit.emit()
+
+        patch_get_databag_size.assert_called_once()
+        relation = self.harness.model.get_relation(self.relation_name, relation_id)
+        self.assertIsNot(patch_get_databag_size.call_args.args[0], relation.data[requirer_unit])
+
+
+class TestTLSCertificatesProvidesDistributedSigning(unittest.TestCase):
+    def setUp(self):
+        self.relation_name = "certificates"
+        self.peer_relation_name = "replicas"
+        self.app_name = "tls-certificates-interface-provider"
+        self.peer_unit_name = f"{self.app_name}/1"
+        self.remote_app = "tls-certificates-requirer"
+        self.remote_unit_name = "tls-certificates-requirer/0"
+        self.harness = testing.Harness(DummyTLSCertificatesDistributedProviderCharm)
+        self.addCleanup(self.harness.cleanup)
+        self.harness.begin()
+
+    def create_peer_relation_with_1_peer_unit(self) -> int:
+        peer_relation_id = self.harness.add_relation(
+            relation_name=self.peer_relation_name, remote_app=self.app_name
+        )
+        self.harness.add_relation_unit(
+            relation_id=peer_relation_id, remote_unit_name=self.peer_unit_name
+        )
+        return peer_relation_id
+
+    def create_certificates_relation_with_1_remote_unit(self) -> int:
+        relation_id = self.harness.add_relation(
+            relation_name=self.relation_name, remote_app=self.remote_app
+        )
+        self.harness.add_relation_unit(
+            relation_id=relation_id, remote_unit_name=self.remote_unit_name
+        )
+        return relation_id
+
+    def get_csr_assigned_to_unit(self, unit_name: str) -> str:
+        for index in range(100):
+            csr = f"whatever csr {index}"
+            if self.harness.charm.certificates.get_signing_unit(csr) == unit_name:
+                return csr
+        raise AssertionError(f"No CSR assigned to {unit_name}")
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    def test_given_csr_assigned_to_other_unit_when_relation_changed_then_certificate_creation_request_is_not_emitted(  # noqa: E501
+        self, patch_certificate_creation_request
+    ):
+        self.harness.set_leader(is_leader=True)
+        self.create_peer_relation_with_1_peer_unit()
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        csr = self.get_csr_assigned_to_unit(self.peer_unit_name)
+
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={
+                "certificate_signing_requests": json.dumps([{"certificate_signing_request": csr}])
+            },
+        )
+
+        patch_certificate_creation_request.assert_not_called()
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    def test_given_csr_assigned_to_non_leader_unit_when_relation_changed_then_certificate_creation_request_is_emitted(  # noqa: E501
+        self, patch_certificate_creation_request
+    ):
+        self.create_peer_relation_with_1_peer_unit()
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        csr = self.get_csr_assigned_to_unit(self.harness.charm.unit.name)
+
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={
+                "certificate_signing_requests": json.dumps([{"certificate_signing_request": csr}])
+            },
+        )
+
+        patch_certificate_creation_request.assert_has_calls(
+            [call().emit(certificate_signing_request=csr, relation_id=relation_id)]
+        )
+
+    def test_given_non_leader_unit_when_set_relation_certificate_then_certificate_is_stored_in_peer_relation_data(  # noqa: E501
+        self,
+    ):
+        peer_relation_id = self.create_peer_relation_with_1_peer_unit()
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+
+        self.harness.charm.certificates.set_relation_certificate(
+            certificate="whatever certificate",
+            certificate_signing_request="whatever csr",
+            ca="whatever ca",
+            chain=["whatever intermediate", "whatever ca"],
+            relation_id=relation_id,
+        )
+
+        peer_unit_data = self.harness.get_relation_data(
+            peer_relation_id, self.harness.charm.unit.name
+        )
+        self.assertEqual(
+            json.loads(peer_unit_data["certificates_issued_certificates"]),
+            [
+                {
+                    "relation_id": relation_id,
+                    "certificate": "whatever certificate",
+                    "certificate_signing_request": "whatever csr",
+                    "ca": "whatever ca",
+                    "chain": ["whatever intermediate", "whatever ca"],
+                }
+            ],
+        )
+
+    def test_given_certificate_issued_by_peer_unit_when_peer_relation_changed_then_leader_publishes_certificate(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(is_leader=True)
+        peer_relation_id = self.create_peer_relation_with_1_peer_unit()
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        csr = self.get_csr_assigned_to_unit(self.peer_unit_name)
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={
+                "certificate_signing_requests": json.dumps([{"certificate_signing_request": csr}])
+            },
+        )
+        issued_certificate = {
+            "relation_id": relation_id,
+            "certificate": "whatever certificate",
+            "certificate_signing_request": csr,
+            "ca": "whatever ca",
+            "chain": ["whatever intermediate", "whatever ca"],
+        }
+
+        self.harness.update_relation_data(
+            relation_id=peer_relation_id,
+            app_or_unit=self.peer_unit_name,
+            key_values={"certificates_issued_certificates": json.dumps([issued_certificate])},
+        )
+
+        provider_relation_data = _load_relation_data(
+            self.harness.get_relation_data(relation_id, self.harness.charm.app.name)
+        )
+        issued_certificate.pop("relation_id")
+        self.assertEqual(provider_relation_data["certificates"], [issued_certificate])
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    def test_given_pending_csr_assigned_to_peer_unit_when_peer_unit_departs_then_certificate_creation_request_is_emitted(  # noqa: E501
+        self, patch_certificate_creation_request
+    ):
+        self.harness.set_leader(is_leader=True)
+        peer_relation_id = self.create_peer_relation_with_1_peer_unit()
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        csr = self.get_csr_assigned_to_unit(self.peer_unit_name)
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={
+                "certificate_signing_requests": json.dumps([{"certificate_signing_request": csr}])
+            },
+        )
+        patch_certificate_creation_request.assert_not_called()
+
+        self.harness.remove_relation_unit(
+            relation_id=peer_relation_id, remote_unit_name=self.peer_unit_name
+        )
+
+        patch_certificate_creation_request.assert_has_calls(
+            [call().emit(certificate_signing_request=csr, relation_id=relation_id)]
+        )
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    def test_given_csr_issued_by_peer_unit_when_peer_unit_joins_then_certificate_creation_request_is_not_emitted(  # noqa: E501
+        self, patch_certificate_creation_request
+    ):
+        peer_relation_id = self.create_peer_relation_with_1_peer_unit()
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        csr = self.get_csr_assigned_to_unit(self.harness.charm.unit.name)
+        self.harness.update_relation_data(
+            relation_id=peer_relation_id,
+            app_or_unit=self.peer_unit_name,
+            key_values={
+                "certificates_issued_certificates": json.dumps(
+                    [
+                        {
+                            "relation_id": relation_id,
+                            "certificate": "whatever certificate",
+                            "certificate_signing_request": csr,
+                            "ca": "whatever ca",
+                            "chain": ["whatever ca"],
+                        }
+                    ]
+                )
+            },
+        )
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={
+                "certificate_signing_requests": json.dumps([{"certificate_signing_request": csr}])
+            },
+        )
+        patch_certificate_creation_request.reset_mock()
+
+        self.harness.add_relation_unit(
+            relation_id=peer_relation_id, remote_unit_name=f"{self.app_name}/2"
+        )
+
+        patch_certificate_creation_request.assert_not_called()
+
+    def publish_certificate_as_leader(self, relation_id: int, csr: str) -> None:
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={
+                "certificate_signing_requests": json.dumps([{"certificate_signing_request": csr}])
+            },
+        )
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.app_name,
+            key_values={
+                "certificates": json.dumps(
+                    [
+                        {
+                            "certificate": "whatever certificate",
+                            "certificate_signing_request": csr,
+                            "ca": "whatever ca",
+                            "chain": ["whatever ca"],
+                        }
+                    ]
+                )
+            },
+        )
+        self.harness.framework.on.pre_commit.emit()
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    def test_given_certificate_published_by_leader_when_peer_membership_changes_on_non_leader_then_certificate_creation_request_is_not_emitted(  # noqa: E501
+        self, patch_certificate_creation_request
+    ):
+        self.harness.set_leader(is_leader=True)
+        peer_relation_id = self.create_peer_relation_with_1_peer_unit()
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        csr = self.get_csr_assigned_to_unit(self.peer_unit_name)
+        self.publish_certificate_as_leader(relation_id, csr)
+        self.harness.set_leader(is_leader=False)
+        patch_certificate_creation_request.reset_mock()
+
+        self.harness.remove_relation_unit(
+            relation_id=peer_relation_id, remote_unit_name=self.peer_unit_name
+        )
+
+        self.assertTrue(self.harness.charm.certificates.csr_is_assigned_to_unit(csr))
+        patch_certificate_creation_request.assert_not_called()
+
+    @patch(
+        f"{LIB_DIR}.CertificatesProviderCharmEvents.certificate_creation_request",
+        new_callable=PropertyMock,
+    )
+    def test_given_certificate_published_by_leader_when_relation_changed_on_non_leader_then_certificate_creation_request_is_not_emitted(  # noqa: E501
+        self, patch_certificate_creation_request
+    ):
+        self.harness.set_leader(is_leader=True)
+        self.create_peer_relation_with_1_peer_unit()
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        csr = self.get_csr_assigned_to_unit(self.harness.charm.unit.name)
+        self.publish_certificate_as_leader(relation_id, csr)
+        self.harness.set_leader(is_leader=False)
+        patch_certificate_creation_request.reset_mock()
+
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_unit_name,
+            key_values={"whatever key": "whatever value"},
+        )
+
+        patch_certificate_creation_request.assert_not_called()
+
+    def test_given_crl_published_by_previous_leader_when_new_leader_publishes_crl_then_revoked_certificates_and_crl_number_are_kept(  # noqa: E501
+        self,
+    ):
+        ca_key = generate_private_key_helper()
+        ca = generate_ca_helper(private_key=ca_key, subject="ca")
+        certificates = [
+            generate_certificate_helper(
+                csr=generate_csr_helper(
+                    private_key=generate_private_key_helper(), subject=subject
+                ),
+                ca=ca,
+                ca_key=ca_key,
+            ).decode()
+            for subject in ["whatever 1", "whatever 2"]
+        ]
+        self.harness.set_leader(is_leader=True)
+        peer_relation_id = self.create_peer_relation_with_1_peer_unit()
+        self.create_certificates_relation_with_1_remote_unit()
+        self.harness.charm.certificates.remove_certificate(certificate=certificates[0])
+        self.harness.charm.certificates.publish_crl(ca=ca.decode(), ca_key=ca_key.decode())
+        peer_app_data = dict(self.harness.get_relation_data(peer_relation_id, self.app_name))
+        new_leader_harness = testing.Harness(DummyTLSCertificatesDistributedProviderCharm)
+        self.addCleanup(new_leader_harness.cleanup)
+        new_leader_harness.set_leader(is_leader=True)
+        new_leader_harness.begin()
+        new_leader_peer_relation_id = new_leader_harness.add_relation(
+            relation_name=self.peer_relation_name, remote_app=self.app_name
+        )
+        new_leader_harness.update_relation_data(
+            new_leader_peer_relation_id, self.app_name, peer_app_data
+        )
+        relation_id = new_leader_harness.add_relation(
+            relation_name=self.relation_name, remote_app=self.remote_app
+        )
+
+        new_leader_harness.charm.certificates.remove_certificate(certificate=certificates[1])
+        new_leader_harness.charm.certificates.publish_crl(
+            ca=ca.decode(), ca_key=ca_key.decode(), max_delta_crl_size=0
+        )
+
+        crl = x509.load_pem_x509_crl(
+            new_leader_harness.get_relation_data(relation_id, self.app_name)["crl"].encode()
+        )
+        self.assertEqual(
+            {revoked.serial_number for revoked in crl},
+            {
+                x509.load_pem_x509_certificate(certificate.encode()).serial_number
+                for certificate in certificates
+            },
+        )
+        self.assertEqual(
+            crl.extensions.get_extension_for_class(x509.CRLNumber).value.crl_number, 2
+        )
+
+    def test_given_ca_rotation_started_by_previous_leader_when_new_leader_delivers_certificate_then_rotation_progresses(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(is_leader=True)
+        peer_relation_id = self.create_peer_relation_with_1_peer_unit()
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        csrs = ["whatever csr 0", "whatever csr 1"]
+        relation_data = {
+            self.app_name: {
+                "certificates": json.dumps(
+                    [
+                        {
+                            "certificate": f"whatever certificate {csr}",
+                            "certificate_signing_request": csr,
+                            "ca": "old ca",
+                            "chain": ["old ca"],
+                        }
+                        for csr in csrs
+                    ]
+                )
+            },
+            self.remote_unit_name: {
+                "certificate_signing_requests": json.dumps(
+                    [{"certificate_signing_request": csr} for csr in csrs]
+                )
+            },
+        }
+        for app_or_unit, key_values in relation_data.items():
+            self.harness.update_relation_data(relation_id, app_or_unit, key_values)
+        self.harness.charm.certificates.start_ca_rotation(ca="new ca", batch_size=1)
+        peer_app_data = dict(self.harness.get_relation_data(peer_relation_id, self.app_name))
+        new_leader_harness = testing.Harness(DummyTLSCertificatesDistributedProviderCharm)
+        self.addCleanup(new_leader_harness.cleanup)
+        new_leader_harness.set_leader(is_leader=True)
+        new_leader_harness.begin()
+        new_leader_harness.add_relation(
+            relation_name=self.peer_relation_name, remote_app=self.app_name
+        )
+        new_leader_harness.update_relation_data(peer_relation_id, self.app_name, peer_app_data)
+        new_leader_harness.add_relation(
+            relation_name=self.relation_name, remote_app=self.remote_app
+        )
+        new_leader_harness.add_relation_unit(relation_id, self.remote_unit_name)
+        for app_or_unit, key_values in relation_data.items():
+            new_leader_harness.update_relation_data(relation_id, app_or_unit, key_values)
+
+        new_leader_harness.charm.certificates.set_relation_certificate(
+            certificate="new certificate 0",
+            certificate_signing_request=csrs[0],
+            ca="new ca",
+            chain=["new ca"],
+            relation_id=relation_id,
+        )
+
+        self.assertEqual(
+            new_leader_harness.charm.certificates.get_ca_rotation_status(),
+            {"in_progress": True, "total": 2, "reissued": 1, "in_flight": 0, "pending": 1},
+        )
+        self.assertEqual(
+            json.loads(
+                new_leader_harness.get_relation_data(relation_id, self.app_name)["ca_bundle"]
+            ),
+            ["old ca", "new ca"],
+        )
+
+    def test_given_issued_certificates_when_start_ca_rotation_then_only_csr_fingerprints_are_stored_in_peer_relation_data(  # noqa: E501
+        self,
+    ):
+        self.harness.set_leader(is_leader=True)
+        peer_relation_id = self.create_peer_relation_with_1_peer_unit()
+        relation_id = self.create_certificates_relation_with_1_remote_unit()
+        csr = "whatever csr"
+        self.harness.update_relation_data(
+            relation_id,
+            self.remote_unit_name,
+            {"certificate_signing_requests": json.dumps([{"certificate_signing_request": csr}])},
+        )
+        self.harness.update_relation_data(
+            relation_id,
+            self.app_name,
+            {
+                "certificates": json.dumps(
+                    [
+                        {
+                            "certificate": "whatever certificate",
+                            "certificate_signing_request": csr,
+                            "ca": "old ca",
+                            "chain": ["old ca"],
+                        }
+                    ]
+                )
+            },
+        )
+
+        self.harness.charm.certificates.start_ca_rotation(ca="new ca")
+
+        provider_state = json.loads(
+            self.harness.get_relation_data(peer_relation_id, self.app_name)[
+                "certificates_provider_state"
+            ]
+        )
+        self.assertEqual(
+            provider_state["rotation_pending"],
+            {tls_certificates._get_csr_fingerprint(csr): relation_id},
+        )
+        self.assertNotIn("whatever certificate", json.dumps(provider_state))
+
+    def test_given_peer_units_when_get_signing_unit_then_csrs_are_spread_across_units(self):
+        self.create_peer_relation_with_1_peer_unit()
+
+        signing_units = {
+            self.harness.charm.certificates.get_signing_unit(f"whatever csr {index}")
+            for index in range(50)
+        }
+
+        self.assertEqual(signing_units, {self.harness.charm.unit.name, self.peer_unit_name})
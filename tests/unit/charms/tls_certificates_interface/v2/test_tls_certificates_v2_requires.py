@@ -8,8 +8,22 @@ from datetime import datetime, timedelta
 from unittest.mock import patch
 
 import pytest
+from cryptography import x509
 from ops import testing
 
+from lib.charms.tls_certificates_interface.v2.tls_certificates import (
+    ProviderCertificate,
+    TLSCertificatesRequiresV2,
+    _get_csr_fingerprint,
+    clear_x509_cache,
+    disable_instrumentation,
+    enable_instrumentation,
+    generate_certificate,
+    generate_csr,
+    generate_intermediate_ca,
+    get_instrumentation_snapshot,
+    reset_instrumentation,
+)
 from tests.unit.charms.tls_certificates_interface.v2.certificates import (
     generate_ca as generate_ca_helper,
 )
@@ -211,34 +225,131 @@ class TestJuju2(unittest.TestCase):
 
         self.assertEqual(dict(), unit_relation_data)
 
-    @patch(f"{LIB_DIR}.TLSCertificatesRequiresV2.request_certificate_creation")
-    @patch(f"{LIB_DIR}.TLSCertificatesRequiresV2.request_certificate_revocation")
-    def test_given_certificate_revocation_success_when_request_certificate_renewal_then_certificate_creation_is_called(  # noqa: E501
-        self, _, patch_certificate_creation
+    def test_given_old_csr_in_relation_data_when_request_certificate_renewal_then_csr_is_replaced_in_single_write(  # noqa: E501
+        self,
     ):
-        old_csr = b"whatever old csr"
-        new_csr = b"whatever new csr"
+        relation_id = self.create_certificates_relation()
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.harness.charm.unit.name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [
+                        {"certificate_signing_request": "whatever old csr"},
+                        {"certificate_signing_request": "other csr"},
+                    ]
+                )
+            },
+        )
+
+        with patch.object(
+            TLSCertificatesRequiresV2,
+            "_set_relation_requirer_csrs",
+            autospec=True,
+            side_effect=TLSCertificatesRequiresV2._set_relation_requirer_csrs,
+        ) as patch_set_relation_requirer_csrs:
+            self.harness.charm.certificates.request_certificate_renewal(
+                old_certificate_signing_request=b"whatever old csr",
+                new_certificate_signing_request=b"whatever new csr",
+            )
+
+        patch_set_relation_requirer_csrs.assert_called_once()
+        unit_relation_data = self.harness.get_relation_data(
+            relation_id=relation_id, app_or_unit=self.harness.charm.unit
+        )
+        self.assertEqual(
+            json.loads(unit_relation_data["certificate_signing_requests"]),
+            [
+                {"certificate_signing_request": "other csr"},
+                {"certificate_signing_request": "whatever new csr"},
+            ],
+        )
+
+    def test_given_old_csr_not_in_relation_data_when_request_certificate_renewal_then_new_csr_is_sent_in_relation_data(  # noqa: E501
+        self,
+    ):
+        relation_id = self.create_certificates_relation()
 
         self.harness.charm.certificates.request_certificate_renewal(
-            old_certificate_signing_request=old_csr, new_certificate_signing_request=new_csr
+            old_certificate_signing_request=b"whatever old csr",
+            new_certificate_signing_request=b"whatever new csr",
         )
 
-        patch_certificate_creation.assert_called_with(certificate_signing_request=new_csr)
+        unit_relation_data = self.harness.get_relation_data(
+            relation_id=relation_id, app_or_unit=self.harness.charm.unit
+        )
+        self.assertEqual(
+            json.loads(unit_relation_data["certificate_signing_requests"]),
+            [{"certificate_signing_request": "whatever new csr"}],
+        )
 
-    @patch(f"{LIB_DIR}.TLSCertificatesRequiresV2.request_certificate_creation")
-    @patch(f"{LIB_DIR}.TLSCertificatesRequiresV2.request_certificate_revocation")
-    def test_given_certificate_revocation_failed_when_request_certificate_renewal_then_certificate_creation_is_called_anyway(  # noqa: E501
-        self, patch_certificate_revocation, patch_certificate_creation
+    def test_given_no_relation_when_request_certificate_renewal_then_runtime_error_is_raised(
+        self,
     ):
-        old_csr = b"whatever old csr"
-        new_csr = b"whatever new csr"
-        patch_certificate_revocation.side_effect = RuntimeError()
+        with pytest.raises(RuntimeError):
+            self.harness.charm.certificates.request_certificate_renewal(
+                old_certificate_signing_request=b"whatever old csr",
+                new_certificate_signing_request=b"whatever new csr",
+            )
 
-        self.harness.charm.certificates.request_certificate_renewal(
-            old_certificate_signing_request=old_csr, new_certificate_signing_request=new_csr
+    def test_given_csrs_when_request_certificates_creation_then_new_csrs_are_sent_in_single_write(
+        self,
+    ):
+        relation_id = self.create_certificates_relation()
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.harness.charm.unit.name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [{"certificate_signing_request": "csr 0"}]
+                )
+            },
+        )
+
+        with patch.object(
+            TLSCertificatesRequiresV2,
+            "_set_relation_requirer_csrs",
+            autospec=True,
+            side_effect=TLSCertificatesRequiresV2._set_relation_requirer_csrs,
+        ) as patch_set_relation_requirer_csrs:
+            self.harness.charm.certificates.request_certificates_creation(
+                certificate_signing_requests=[f"csr {i}".encode() for i in [0, 1, 2, 1]]
+            )
+
+        patch_set_relation_requirer_csrs.assert_called_once()
+        unit_relation_data = self.harness.get_relation_data(
+            relation_id=relation_id, app_or_unit=self.harness.charm.unit
+        )
+        self.assertEqual(
+            json.loads(unit_relation_data["certificate_signing_requests"]),
+            [{"certificate_signing_request": f"csr {i}"} for i in range(3)],
         )
 
-        patch_certificate_creation.assert_called_with(certificate_signing_request=new_csr)
+    def test_given_csrs_in_relation_data_when_request_certificates_revocation_then_csrs_are_removed_from_relation_data(  # noqa: E501
+        self,
+    ):
+        relation_id = self.create_certificates_relation()
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.harness.charm.unit.name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [{"certificate_signing_request": f"csr {i}"} for i in range(3)]
+                )
+            },
+        )
+
+        self.harness.charm.certificates.request_certificates_revocation(
+            certificate_signing_requests=[b"csr 0", b"csr 2", b"unknown csr"]
+        )
+
+        unit_relation_data = self.harness.get_relation_data(
+            relation_id=relation_id, app_or_unit=self.harness.charm.unit
+        )
+        self.assertEqual(
+            json.loads(unit_relation_data["certificate_signing_requests"]),
+            [{"certificate_signing_request": "csr 1"}],
+        )
 
     @patch(f"{BASE_CHARM_DIR}._on_certificate_available")
     def test_given_csr_in_unit_relation_data_and_certificate_in_remote_relation_data_when_relation_changed_then_certificate_available_event_emitted(  # noqa: E501
@@ -387,6 +498,15 @@ class TestJuju2(unittest.TestCase):
                 ]
             )
         }
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.harness.charm.unit.name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [{"certificate_signing_request": certificate_signing_request.decode()}]
+                )
+            },
+        )
         self.harness.update_relation_data(
             relation_id=relation_id,
             app_or_unit=self.remote_app,
@@ -486,6 +606,15 @@ class TestJuju2(unittest.TestCase):
                 ]
             )
         }
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.harness.charm.unit.name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [{"certificate_signing_request": certificate_signing_request.decode()}]
+                )
+            },
+        )
         self.harness.update_relation_data(
             relation_id=relation_id,
             app_or_unit=self.remote_app,
@@ -774,6 +903,597 @@ class TestJuju2(unittest.TestCase):
 
         patch_on_all_certificates_invalidated.assert_called()
 
+    def test_given_crls_in_remote_relation_data_when_get_crls_then_crls_are_returned(self):
+        relation_id = self.create_certificates_relation()
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_app,
+            key_values={
+                "certificates": json.dumps([]),
+                "crl": "whatever crl",
+                "delta_crl": "whatever delta crl",
+            },
+        )
+
+        crls = self.harness.charm.certificates.get_crls()
+
+        self.assertEqual(crls, {"crl": "whatever crl", "delta_crl": "whatever delta crl"})
+
+    def test_given_no_crl_in_remote_relation_data_when_get_crls_then_empty_dict_is_returned(self):
+        relation_id = self.create_certificates_relation()
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_app,
+            key_values={"certificates": json.dumps([])},
+        )
+
+        self.assertEqual(self.harness.charm.certificates.get_crls(), {})
+
+    def test_given_ca_bundle_in_remote_relation_data_when_get_ca_bundle_then_cas_are_returned(
+        self,
+    ):
+        relation_id = self.create_certificates_relation()
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_app,
+            key_values={
+                "certificates": json.dumps([]),
+                "ca_bundle": json.dumps(["old ca", "new ca"]),
+            },
+        )
+
+        self.assertEqual(self.harness.charm.certificates.get_ca_bundle(), ["old ca", "new ca"])
+
+    def test_given_certificates_for_several_units_in_remote_relation_data_when_get_assigned_certificates_then_only_this_unit_certificates_are_returned(  # noqa: E501
+        self,
+    ):
+        relation_id = self.create_certificates_relation()
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.harness.charm.unit.name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [{"certificate_signing_request": "unit csr"}]
+                )
+            },
+        )
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_app,
+            key_values={
+                "certificates": json.dumps(
+                    [
+                        {
+                            "certificate": f"{csr} certificate",
+                            "certificate_signing_request": csr,
+                            "ca": "ca",
+                            "chain": ["ca"],
+                        }
+                        for csr in ["unit csr", "other unit csr"]
+                    ]
+                )
+            },
+        )
+
+        assigned_certificates = self.harness.charm.certificates.get_assigned_certificates()
+
+        self.assertEqual(len(self.harness.charm.certificates.get_provider_certificates()), 2)
+        self.assertEqual(
+            assigned_certificates,
+            [
+                ProviderCertificate(
+                    relation_id=relation_id,
+                    application_name=self.harness.charm.app.name,
+                    csr="unit csr",
+                    certificate="unit csr certificate",
+                    ca="ca",
+                    chain=["ca"],
+                )
+            ],
+        )
+
+    def get_unit_csrs(self, relation_id: int) -> list:
+        unit_relation_data = self.harness.get_relation_data(
+            relation_id=relation_id, app_or_unit=self.harness.charm.unit
+        )
+        return [
+            csr["certificate_signing_request"]
+            for csr in json.loads(unit_relation_data.get("certificate_signing_requests", "[]"))
+        ]
+
+    def test_given_several_relations_when_request_certificate_creation_then_csr_is_sent_to_least_loaded_relation(  # noqa: E501
+        self,
+    ):
+        first_relation_id = self.create_certificates_relation()
+        second_relation_id = self.harness.add_relation(
+            relation_name=self.relation_name, remote_app="other-provider"
+        )
+        self.harness.update_relation_data(
+            relation_id=first_relation_id,
+            app_or_unit=self.harness.charm.unit.name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [{"certificate_signing_request": "first csr"}]
+                )
+            },
+        )
+
+        self.harness.charm.certificates.request_certificate_creation(
+            certificate_signing_request=b"second csr"
+        )
+        self.harness.charm.certificates.request_certificate_creation(
+            certificate_signing_request=b"third csr"
+        )
+
+        self.assertEqual(self.get_unit_csrs(first_relation_id), ["first csr", "third csr"])
+        self.assertEqual(self.get_unit_csrs(second_relation_id), ["second csr"])
+
+    def test_given_relation_id_when_request_certificate_creation_then_csr_is_sent_in_given_relation(  # noqa: E501
+        self,
+    ):
+        first_relation_id = self.create_certificates_relation()
+        second_relation_id = self.harness.add_relation(
+            relation_name=self.relation_name, remote_app="other-provider"
+        )
+
+        self.harness.charm.certificates.request_certificate_creation(
+            certificate_signing_request=b"csr", relation_id=second_relation_id
+        )
+        self.harness.charm.certificates.request_certificate_creation(
+            certificate_signing_request=b"csr", relation_id=first_relation_id
+        )
+
+        self.assertEqual(self.get_unit_csrs(first_relation_id), [])
+        self.assertEqual(self.get_unit_csrs(second_relation_id), ["csr"])
+
+    def test_given_csr_in_second_relation_when_request_certificate_renewal_then_new_csr_is_sent_in_same_relation(  # noqa: E501
+        self,
+    ):
+        first_relation_id = self.create_certificates_relation()
+        second_relation_id = self.harness.add_relation(
+            relation_name=self.relation_name, remote_app="other-provider"
+        )
+        self.harness.charm.certificates.request_certificate_creation(
+            certificate_signing_request=b"old csr", relation_id=second_relation_id
+        )
+
+        self.harness.charm.certificates.request_certificate_renewal(
+            old_certificate_signing_request=b"old csr",
+            new_certificate_signing_request=b"new csr",
+        )
+
+        self.assertEqual(self.get_unit_csrs(first_relation_id), [])
+        self.assertEqual(self.get_unit_csrs(second_relation_id), ["new csr"])
+
+    @patch(f"{LIB_DIR}.time.time")
+    def test_given_csr_pending_for_longer_than_timeout_when_update_status_then_csr_is_requested_in_other_relation(  # noqa: E501
+        self, patch_time
+    ):
+        self.harness.charm.certificates.pending_csr_timeout = 600
+        first_relation_id = self.create_certificates_relation()
+        second_relation_id = self.harness.add_relation(
+            relation_name=self.relation_name, remote_app="other-provider"
+        )
+        patch_time.return_value = 1000
+        self.harness.charm.certificates.request_certificate_creation(
+            certificate_signing_request=b"csr", relation_id=first_relation_id
+        )
+        patch_time.return_value = 1500
+        self.harness.charm.certificates.fail_over_pending_certificate_requests()
+        self.assertEqual(self.get_unit_csrs(first_relation_id), ["csr"])
+
+        patch_time.return_value = 1600
+        self.harness.charm.certificates.fail_over_pending_certificate_requests()
+
+        self.assertEqual(self.get_unit_csrs(first_relation_id), [])
+        self.assertEqual(self.get_unit_csrs(second_relation_id), ["csr"])
+
+    def test_given_no_pending_csr_timeout_when_request_certificate_creation_then_pending_csr_is_not_stored(  # noqa: E501
+        self,
+    ):
+        relation_id = self.create_certificates_relation()
+
+        self.harness.charm.certificates.request_certificate_creation(
+            certificate_signing_request=b"csr", relation_id=relation_id
+        )
+
+        self.assertEqual(self.get_unit_csrs(relation_id), ["csr"])
+        self.assertEqual(dict(self.harness.charm.certificates._stored.pending_csrs), {})
+
+    @patch(f"{LIB_DIR}.time.time")
+    def test_given_certificate_issued_for_csr_when_fail_over_pending_certificate_requests_then_csr_is_not_moved(  # noqa: E501
+        self, patch_time
+    ):
+        self.harness.charm.certificates.pending_csr_timeout = 600
+        first_relation_id = self.create_certificates_relation()
+        self.harness.add_relation(relation_name=self.relation_name, remote_app="other-provider")
+        patch_time.return_value = 1000
+        self.harness.charm.certificates.request_certificate_creation(
+            certificate_signing_request=b"csr", relation_id=first_relation_id
+        )
+        self.harness.update_relation_data(
+            relation_id=first_relation_id,
+            app_or_unit=self.remote_app,
+            key_values={
+                "certificates": json.dumps(
+                    [
+                        {
+                            "certificate": "certificate",
+                            "certificate_signing_request": "csr",
+                            "ca": "ca",
+                            "chain": ["ca"],
+                        }
+                    ]
+                )
+            },
+        )
+        patch_time.return_value = 2000
+
+        self.harness.charm.certificates.fail_over_pending_certificate_requests()
+
+        self.assertEqual(self.get_unit_csrs(first_relation_id), ["csr"])
+
+    def test_given_certificates_in_several_relations_when_get_provider_certificates_with_relation_id_then_only_relation_certificates_are_returned(  # noqa: E501
+        self,
+    ):
+        first_relation_id = self.create_certificates_relation()
+        second_relation_id = self.harness.add_relation(
+            relation_name=self.relation_name, remote_app="other-provider"
+        )
+        for relation_id, remote_app in [
+            (first_relation_id, self.remote_app),
+            (second_relation_id, "other-provider"),
+        ]:
+            self.harness.update_relation_data(
+                relation_id=relation_id,
+                app_or_unit=remote_app,
+                key_values={
+                    "certificates": json.dumps(
+                        [
+                            {
+                                "certificate": f"{remote_app} certificate",
+                                "certificate_signing_request": f"{remote_app} csr",
+                                "ca": "ca",
+                                "chain": ["ca"],
+                            }
+                        ]
+                    )
+                },
+            )
+
+        certificates = self.harness.charm.certificates.get_provider_certificates(
+            relation_id=second_relation_id
+        )
+
+        self.assertEqual(len(self.harness.charm.certificates.get_provider_certificates()), 2)
+        self.assertEqual(
+            [(certificate.relation_id, certificate.csr) for certificate in certificates],
+            [(second_relation_id, "other-provider csr")],
+        )
+
+    def test_given_same_ca_published_in_several_relations_when_get_trust_bundle_then_ca_is_returned_once(  # noqa: E501
+        self,
+    ):
+        ca_key = generate_private_key_helper()
+        ca = generate_ca_helper(private_key=ca_key, subject="ca").decode()
+        first_relation_id = self.create_certificates_relation()
+        second_relation_id = self.harness.add_relation(
+            relation_name=self.relation_name, remote_app="other-provider"
+        )
+        for relation_id, remote_app in [
+            (first_relation_id, self.remote_app),
+            (second_relation_id, "other-provider"),
+        ]:
+            self.harness.update_relation_data(
+                relation_id=relation_id,
+                app_or_unit=remote_app,
+                key_values={
+                    "certificates": json.dumps(
+                        [
+                            {
+                                "certificate": "certificate",
+                                "certificate_signing_request": f"{remote_app} csr",
+                                "ca": ca,
+                                "chain": [ca],
+                            }
+                        ]
+                    )
+                },
+            )
+
+        trust_bundle = self.harness.charm.certificates.get_trust_bundle()
+        digest = trust_bundle.digest
+        self.harness.remove_relation(first_relation_id)
+
+        self.assertEqual(len(trust_bundle), 1)
+        self.assertEqual(self.harness.charm.certificates.get_trust_bundle().digest, digest)
+
+    @patch(f"{BASE_CHARM_DIR}._on_all_certificates_invalidated")
+    @patch(f"{BASE_CHARM_DIR}._on_certificate_invalidated")
+    def test_given_several_relations_when_relation_broken_then_only_its_certificates_are_invalidated_and_its_csrs_are_requested_again(  # noqa: E501
+        self, patch_on_certificate_invalidated, patch_on_all_certificates_invalidated
+    ):
+        self.harness.charm.certificates.pending_csr_timeout = 600
+        first_relation_id = self.create_certificates_relation()
+        second_relation_id = self.harness.add_relation(
+            relation_name=self.relation_name, remote_app="other-provider"
+        )
+        self.harness.charm.certificates.request_certificate_creation(
+            certificate_signing_request=b"first csr", relation_id=first_relation_id
+        )
+        self.harness.charm.certificates.request_certificate_creation(
+            certificate_signing_request=b"second csr", relation_id=second_relation_id
+        )
+        for relation_id, remote_app, csr in [
+            (first_relation_id, self.remote_app, "first csr"),
+            (second_relation_id, "other-provider", "second csr"),
+        ]:
+            self.harness.update_relation_data(
+                relation_id=relation_id,
+                app_or_unit=remote_app,
+                key_values={
+                    "certificates": json.dumps(
+                        [
+                            {
+                                "certificate": f"{csr} certificate",
+                                "certificate_signing_request": csr,
+                                "ca": "ca",
+                                "chain": ["ca"],
+                            }
+                        ]
+                    )
+                },
+            )
+
+        self.harness.remove_relation(first_relation_id)
+
+        patch_on_all_certificates_invalidated.assert_not_called()
+        patch_on_certificate_invalidated.assert_called_once()
+        event = patch_on_certificate_invalidated.call_args.args[0]
+        self.assertEqual(event.reason, "relation_broken")
+        self.assertEqual(event.certificate_signing_request, "first csr")
+        self.assertEqual(self.get_unit_csrs(second_relation_id), ["second csr", "first csr"])
+        self.assertEqual(
+            self.harness.charm.certificates._stored.pending_csrs[
+                _get_csr_fingerprint("first csr")
+            ]["relation_id"],
+            second_relation_id,
+        )
+
+    @patch(f"{BASE_CHARM_DIR}._on_certificate_invalidated")
+    def test_given_expired_certificate_published_by_other_provider_when_update_status_then_certificate_invalidated_is_not_emitted(  # noqa: E501
+        self, patch_on_certificate_invalidated
+    ):
+        first_relation_id = self.create_certificates_relation()
+        second_relation_id = self.harness.add_relation(
+            relation_name=self.relation_name, remote_app="other-provider"
+        )
+        ca_key = generate_private_key_helper()
+        ca = generate_ca_helper(private_key=ca_key, subject="ca")
+        csr = generate_csr_helper(private_key=generate_private_key_helper(), subject="whatever")
+        certificate = generate_certificate_helper(ca=ca, ca_key=ca_key, csr=csr, validity=-1)
+        self.harness.charm.certificates.request_certificate_creation(
+            certificate_signing_request=csr, relation_id=first_relation_id
+        )
+        self.harness.update_relation_data(
+            relation_id=second_relation_id,
+            app_or_unit="other-provider",
+            key_values={
+                "certificates": json.dumps(
+                    [
+                        {
+                            "certificate": certificate.decode(),
+                            "certificate_signing_request": csr.decode(),
+                            "ca": ca.decode(),
+                            "chain": [ca.decode()],
+                        }
+                    ]
+                )
+            },
+        )
+
+        self.harness.charm.on.update_status.emit()
+
+        patch_on_certificate_invalidated.assert_not_called()
+
+    def publish_certificates_issued_by_intermediate_ca(self, subjects: list, ca: str) -> tuple:
+        ca_key = generate_private_key_helper()
+        root_ca = generate_ca_helper(private_key=ca_key, subject="root ca")
+        intermediate_ca_key = generate_private_key_helper()
+        intermediate_ca = generate_intermediate_ca(
+            private_key=intermediate_ca_key,
+            subject="intermediate ca",
+            ca=root_ca,
+            ca_key=ca_key,
+        )
+        relation_id = self.create_certificates_relation()
+        certificates = []
+        for subject in subjects:
+            csr = generate_csr(private_key=generate_private_key_helper(), subject=subject)
+            certificate = generate_certificate(
+                csr=csr, ca=intermediate_ca, ca_key=intermediate_ca_key
+            )
+            certificates.append(
+                {
+                    "certificate": certificate.decode(),
+                    "certificate_signing_request": csr.decode(),
+                    "ca": ca or root_ca.decode(),
+                    "chain": [certificate.decode(), intermediate_ca.decode(), root_ca.decode()],
+                }
+            )
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.harness.charm.unit.name,
+            key_values={
+                "certificate_signing_requests": json.dumps(
+                    [
+                        {"certificate_signing_request": certificate["certificate_signing_request"]}
+                        for certificate in certificates
+                    ]
+                )
+            },
+        )
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_app,
+            key_values={"certificates": json.dumps(certificates)},
+        )
+        return certificates
+
+    @patch(f"{BASE_CHARM_DIR}._on_certificate_invalidated")
+    @patch(f"{BASE_CHARM_DIR}._on_certificate_available")
+    def test_given_chain_verification_and_valid_chain_when_relation_changed_then_certificate_available_event_emitted(  # noqa: E501
+        self, patch_on_certificate_available, patch_on_certificate_invalidated
+    ):
+        self.harness.charm.certificates.verify_certificate_chain = True
+
+        self.publish_certificates_issued_by_intermediate_ca(subjects=["first"], ca="")
+
+        patch_on_certificate_available.assert_called_once()
+        patch_on_certificate_invalidated.assert_not_called()
+
+    @patch(f"{BASE_CHARM_DIR}._on_certificate_invalidated")
+    @patch(f"{BASE_CHARM_DIR}._on_certificate_available")
+    def test_given_chain_verification_and_chain_not_issued_by_ca_when_relation_changed_then_certificate_invalidated_event_with_reason_invalid_chain_emitted(  # noqa: E501
+        self, patch_on_certificate_available, patch_on_certificate_invalidated
+    ):
+        self.harness.charm.certificates.verify_certificate_chain = True
+        other_ca = generate_ca_helper(
+            private_key=generate_private_key_helper(), subject="other ca"
+        ).decode()
+
+        self.publish_certificates_issued_by_intermediate_ca(subjects=["first"], ca=other_ca)
+
+        patch_on_certificate_available.assert_not_called()
+        self.assertEqual(patch_on_certificate_invalidated.call_args[0][0].reason, "invalid_chain")
+
+    def test_given_certificates_sharing_intermediate_ca_when_relation_changed_then_intermediate_ca_signature_is_verified_once(  # noqa: E501
+        self,
+    ):
+        self.harness.charm.certificates.verify_certificate_chain = True
+        clear_x509_cache()
+        reset_instrumentation()
+        enable_instrumentation()
+        try:
+            self.publish_certificates_issued_by_intermediate_ca(
+                subjects=["first", "second", "third"], ca=""
+            )
+        finally:
+            disable_instrumentation()
+
+        snapshot = get_instrumentation_snapshot()
+        reset_instrumentation()
+        self.assertEqual(snapshot["timings"]["chain_verification"]["count"], 4)
+        self.assertEqual(snapshot["counters"]["chain_link_cache_hits"], 2)
+
+    def generate_certificate(self, subject: str, validity: int) -> tuple:
+        ca_key = generate_private_key_helper()
+        ca = generate_ca_helper(private_key=ca_key, subject="ca")
+        csr = generate_csr_helper(private_key=generate_private_key_helper(), subject=subject)
+        certificate = generate_certificate_helper(
+            csr=csr, ca=ca, ca_key=ca_key, validity=validity
+        ).decode()
+        return certificate, csr.decode()
+
+    def test_given_renewal_fraction_when_get_renewal_time_then_renewal_time_is_fraction_of_lifetime(  # noqa: E501
+        self,
+    ):
+        certificate, csr = self.generate_certificate(subject="whatever", validity=90)
+        self.harness.charm.certificates.renewal_fraction = 2 / 3
+
+        renewal_time = self.harness.charm.certificates.get_renewal_time(certificate, csr)
+
+        certificate_object = x509.load_pem_x509_certificate(certificate.encode())
+        assert renewal_time == certificate_object.not_valid_before + timedelta(hours=60)
+
+    def test_given_renewal_jitter_when_get_renewal_time_then_renewal_time_is_brought_forward_deterministically(  # noqa: E501
+        self,
+    ):
+        self.harness.charm.certificates.renewal_fraction = 2 / 3
+        self.harness.charm.certificates.renewal_jitter = 0.1
+        renewal_offsets = set()
+        for i in range(5):
+            certificate, csr = self.generate_certificate(subject=f"whatever {i}", validity=900)
+            certificate_object = x509.load_pem_x509_certificate(certificate.encode())
+            fraction_renewal_time = certificate_object.not_valid_before + timedelta(hours=600)
+
+            renewal_time = self.harness.charm.certificates.get_renewal_time(certificate, csr)
+
+            assert renewal_time is not None
+            assert renewal_time == self.harness.charm.certificates.get_renewal_time(
+                certificate, csr
+            )
+            assert (
+                fraction_renewal_time - timedelta(hours=90)
+                <= renewal_time
+                <= fraction_renewal_time
+            )
+            renewal_offsets.add(fraction_renewal_time - renewal_time)
+        assert len(renewal_offsets) > 1
+
+    def test_given_invalid_renewal_fraction_when_requirer_initialized_then_value_error_is_raised(
+        self,
+    ):
+        with pytest.raises(ValueError):
+            TLSCertificatesRequiresV2(self.harness.charm, "certificates", renewal_fraction=1.5)
+
+    @patch(f"{BASE_CHARM_DIR}._on_certificate_expiring")
+    def test_given_renewal_time_reached_before_expiry_notification_time_when_update_status_then_certificate_expiring_is_emitted(  # noqa: E501
+        self, patch_on_certificate_expiring
+    ):
+        certificate, csr = self.generate_certificate(subject="whatever", validity=24 * 30)
+        self.harness.charm.certificates.renewal_fraction = 0.01
+        relation_id = self.create_certificates_relation()
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.harness.charm.unit.name,
+            key_values={
+                "certificate_signing_requests": json.dumps([{"certificate_signing_request": csr}])
+            },
+        )
+        self.harness.update_relation_data(
+            relation_id=relation_id,
+            app_or_unit=self.remote_app,
+            key_values={
+                "certificates": json.dumps(
+                    [
+                        {
+                            "ca": "whatever ca",
+                            "chain": ["whatever ca"],
+                            "certificate_signing_request": csr,
+                            "certificate": certificate,
+                        }
+                    ]
+                )
+            },
+        )
+
+        with patch(f"{LIB_DIR}.datetime") as patch_datetime:
+            patch_datetime.utcnow.return_value = datetime.utcnow() + timedelta(days=1)
+            self.harness.charm.on.update_status.emit()
+
+        patch_on_certificate_expiring.assert_called_once()
+
+    def test_given_csrs_in_unit_relation_data_when_get_relation_data_sizes_then_sizes_are_returned(
+        self,
+    ):
+        relation_id = self.create_certificates_relation()
+        self.harness.charm.certificates.request_certificate_creation(b"whatever csr")
+
+        sizes = self.harness.charm.certificates.get_relation_data_sizes()[relation_id]
+
+        csrs_value = self.harness.get_relation_data(relation_id, self.harness.charm.unit.name)[
+            "certificate_signing_requests"
+        ]
+        self.assertEqual(
+            sizes["keys"],
+            {
+                "certificate_signing_requests": len("certificate_signing_requests")
+                + len(csrs_value)
+            },
+        )
+        self.assertEqual(sizes["provider"], 0)
+
 
 class FakeJujuVersion:
     @classmethod